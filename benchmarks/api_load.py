@@ -0,0 +1,126 @@
+# benchmarks/api_load.py
+"""
+Latency under concurrent load for blocking work in async API routes.
+
+Builds a small FastAPI app with a "parse" route that makes a blocking call
+(a sleep standing in for a parser or a synchronous HTTP client) and a
+"health" route that does nothing, then drives it with N concurrent clients
+issuing a mix of both. The app is built twice:
+
+- inline:  the blocking call runs directly inside `async def` (the old
+           behaviour of the ingestion / metadata routes)
+- offload: the call goes through src.api.executor.ApiExecutor
+
+and one JSON line per (mode, route) reports p50 / p99 latency. The app runs
+on its own event loop in a server thread, so a stalled server loop shows up
+in client latency the way it would behind uvicorn.
+
+    python benchmarks/api_load.py
+    python benchmarks/api_load.py --clients 50 --requests 10 --block-ms 50 --limit 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.api.executor import ApiExecutor, _percentile  # noqa: E402
+
+
+def build_app(mode: str, block_seconds: float, executor: ApiExecutor) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/parse")
+    async def parse():
+        if mode == "inline":
+            time.sleep(block_seconds)
+        else:
+            await executor.offload("parse", time.sleep, block_seconds)
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+class ServerLoopTransport(httpx.AsyncBaseTransport):
+    """Serve `app` on a dedicated event loop thread; clients stay on the caller's loop."""
+
+    def __init__(self, app: FastAPI):
+        self._inner = httpx.ASGITransport(app=app)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        future = asyncio.run_coroutine_threadsafe(self._inner.handle_async_request(request), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def aclose(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+async def drive(app: FastAPI, clients: int, requests_per_client: int):
+    latencies = {"parse": [], "health": []}
+    transport = ServerLoopTransport(app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one_client(i: int):
+            for n in range(requests_per_client):
+                route = "parse" if (i + n) % 2 == 0 else "health"
+                start = time.perf_counter()
+                if route == "parse":
+                    r = await client.post("/parse")
+                else:
+                    r = await client.get("/health")
+                r.raise_for_status()
+                latencies[route].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_client(i) for i in range(clients)))
+        wall = time.perf_counter() - start
+    return latencies, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API blocking-call latency benchmark")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    parser.add_argument("--block-ms", type=float, default=50.0, help="Duration of the blocking call")
+    parser.add_argument("--threads", type=int, default=32, help="Offload thread pool size")
+    parser.add_argument("--limit", type=int, default=16, help="Per-route concurrency limit")
+    args = parser.parse_args()
+
+    for mode in ("inline", "offload"):
+        executor = ApiExecutor(thread_workers=args.threads, default_limit=args.limit)
+        app = build_app(mode, args.block_ms / 1000.0, executor)
+        try:
+            latencies, wall = asyncio.run(drive(app, args.clients, args.requests))
+        finally:
+            executor.shutdown()
+        total = sum(len(v) for v in latencies.values())
+        for route, samples in latencies.items():
+            print(json.dumps({
+                "mode": mode,
+                "route": route,
+                "clients": args.clients,
+                "requests": len(samples),
+                "p50_ms": round(_percentile(samples, 0.50) * 1000, 1),
+                "p99_ms": round(_percentile(samples, 0.99) * 1000, 1),
+                "throughput_rps": round(total / wall, 1),
+            }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+# benchmarks/e2e.py
+"""
+End-to-end benchmark of the detection pipeline on the repository's test PDFs.
+
+Stages (each timed on its own, in a fresh subprocess so peak RSS is per stage):
+
+    ingest_pdf        parse_pdf on tests/testPDF3.pdf and tests/testPDF5.pdf
+    chunking          auto_chunk_section + merge_chunks_to_blocks per section
+    key_sentences     select_key_sentences per block
+    module2_search    process_document_async (Perplexity / Google)
+    module3_evidence  process_module3 (candidate page fetches, matching, scoring)
+    clean_module3     clean_module3_output on tests/plag_output.json
+
+Nothing leaves the machine: search APIs and result pages are served from
+benchmarks/fixtures/ by benchmarks/stub_server.py, with the search / fetch
+caches disabled so every iteration does the full round trip. One JSON line
+per stage reports latency percentiles, throughput and peak RSS; stages whose
+models are not installed are reported as "skipped".
+
+    python benchmarks/e2e.py
+    python benchmarks/e2e.py --stage ingest_pdf --stage chunking --iterations 20
+    python benchmarks/e2e.py --save-baseline                 # write benchmarks/baseline.json
+    python benchmarks/e2e.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+With --baseline the run is compared stage by stage (p50 latency, throughput,
+peak RSS) and the exit status is 1 if any stage regressed by more than the
+tolerance, or if a stage that is "ok" on one side could not be compared.
+--save-baseline refuses to write a baseline unless every stage ran and the
+search stages reached the stub, so record it on a machine with the spaCy and
+sentence-transformers models installed. Baselines are only comparable on the
+same machine, which is why none is checked in.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, ".."))
+TEST_PDFS = [os.path.join(REPO_ROOT, "tests", name) for name in ("testPDF3.pdf", "testPDF5.pdf")]
+PLAG_OUTPUT = os.path.join(REPO_ROOT, "tests", "plag_output.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+CLEAN_COPIES = 100
+
+STAGES = ["ingest_pdf", "chunking", "key_sentences", "module2_search", "module3_evidence", "clean_module3"]
+# Stages that talk to the stub; a baseline without stub traffic never measured them
+NETWORK_STAGES = {"module2_search", "module3_evidence"}
+# Optional model dependencies: their absence skips a stage instead of failing it
+MODEL_PACKAGES = {"spacy", "sentence_transformers", "torch", "transformers"}
+
+sys.path.insert(0, REPO_ROOT)
+
+from stub_server import StubServer  # noqa: E402
+
+
+def stub_environ(base_url: str, upload_dir: str) -> dict:
+    """Environment for a child run: clients pointed at the stub, caches and rate limits off."""
+    return {
+        # parse_pdf writes <doc_id>.txt on every call; keep that out of the repo
+        "DF_UPLOAD_DIR": upload_dir,
+        "PERPLEXITY_API_URL": f"{base_url}/perplexity/search",
+        "PERPLEXITY_API_KEY": "fixture",
+        "GOOGLE_CSE_URL": f"{base_url}/customsearch/v1",
+        "GOOGLE_API_KEY": "fixture",
+        "GOOGLE_CSE_ID": "fixture",
+        "PERPLEXITY_RATE_PER_SEC": "0",
+        "GOOGLE_RATE_PER_SEC": "0",
+        "SEARCH_CACHE_MODE": "off",
+        "FETCH_CACHE_PATH": "",
+        "CORPUS_INDEX_ENABLED": "false",
+        "DF_TRACE_ENABLED": "false",
+    }
+
+
+# ============================================================
+# Stages (run inside the child process)
+# ============================================================
+def _module1_docs():
+    from src.ingestion.parsers import parse_pdf
+    docs = [parse_pdf(path) for path in TEST_PDFS]
+    # parse_pdf logs and returns an empty document on failure; don't time nothing
+    for path, doc in zip(TEST_PDFS, docs):
+        if not doc.get("raw_text", "").strip():
+            raise RuntimeError(f"No text extracted from {path}")
+    return docs
+
+
+def _blocks(docs):
+    from src.similarity_search.pipeline import _iter_document_blocks
+    return [block for doc in docs for _, _, block in _iter_document_blocks(doc)]
+
+
+def _reset_caches():
+    from src.similarity_search.fetch_cache import get_fetch_cache
+    get_fetch_cache().clear()
+
+
+def setup_stage(stage: str):
+    """Return (unit, run) where run() does one iteration and returns the number of items processed."""
+    if stage == "ingest_pdf":
+        return "documents", lambda: len(_module1_docs())
+
+    if stage == "chunking":
+        from src.similarity_search import configs
+        from src.similarity_search.section_merger import auto_chunk_section, merge_chunks_to_blocks
+        sections = [s for doc in _module1_docs() for s in doc.get("sections", []) if s.get("text", "").strip()]
+
+        def run():
+            for section in sections:
+                merge_chunks_to_blocks(auto_chunk_section(section["text"]),
+                                       target_words=configs.TARGET_WORDS_PER_BLOCK,
+                                       min_words=configs.MIN_WORDS_PER_BLOCK,
+                                       max_words=configs.MAX_WORDS_PER_BLOCK)
+            return len(sections)
+        return "sections", run
+
+    if stage == "key_sentences":
+        from src.similarity_search.query_generator import select_key_sentences
+        texts = [block["text"] for block in _blocks(_module1_docs())]
+
+        def run():
+            for text in texts:
+                select_key_sentences(text)
+            return len(texts)
+        return "blocks", run
+
+    if stage == "module2_search":
+        from src.similarity_search.pipeline import process_document_async
+        docs = _module1_docs()
+
+        def run():
+            return sum(len(asyncio.run(process_document_async(doc))["blocks"]) for doc in docs)
+        return "blocks", run
+
+    if stage == "module3_evidence":
+        from src.similarity_search.pipeline import process_document_async
+        from src.similarity_search.module3_engine import process_module3
+        from src.ingestion.utils import split_sentences
+        docs = [(asyncio.run(process_document_async(doc)), doc["raw_text"]) for doc in _module1_docs()]
+        sentences = sum(len(split_sentences(b.get("key_sentences", ""))) for m2, _ in docs for b in m2["blocks"])
+
+        def run():
+            _reset_caches()
+            for module2_json, raw_text in docs:
+                asyncio.run(process_module3(module2_json, raw_text=raw_text))
+            return sentences
+        return "sentences", run
+
+    if stage == "clean_module3":
+        from src.models.module3_models import Module3Item
+        from src.similarity_search.cleanjson import clean_module3_output
+        with open(PLAG_OUTPUT, "r", encoding="utf-8") as f:
+            cleaned = json.load(f)
+        # The recorded output is one short document; repeat it (as distinct sentences) to get
+        # a run long enough to time
+        items = [
+            Module3Item(sentence=f"{entry['sentence']} [{copy}]",
+                        type=(source.get("highlights") or [{}])[0].get("type"),
+                        source_text=source.get("source_text"), source_url=source.get("source_url"),
+                        plagiarism_score=source.get("plagiarism_score"),
+                        semantic_similarity=source.get("semantic_similarity"))
+            for copy in range(CLEAN_COPIES) for entry in cleaned for source in entry["sources"]
+        ]
+
+        def run():
+            clean_module3_output(items)
+            return len(items)
+        return "items", run
+
+    raise ValueError(f"Unknown stage {stage!r}")
+
+
+def _percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _missing_model(e: BaseException) -> bool:
+    """True for the failures of an optional model that isn't installed, and nothing else."""
+    if isinstance(e, ImportError):
+        return (e.name or "").split(".")[0] in MODEL_PACKAGES
+    # spaCy raises OSError E050 when the pipeline package (en_core_web_sm) is missing
+    return isinstance(e, OSError) and "[E050]" in str(e)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_stage(stage: str, iterations: int, warmup: int) -> dict:
+    result = {"stage": stage}
+    samples = []
+    items = 0
+    try:
+        unit, run = setup_stage(stage)
+        for _ in range(warmup):
+            run()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            items += run()
+            samples.append(time.perf_counter() - start)
+    except (ImportError, OSError) as e:
+        # Anything else (stub down, missing fixture) propagates and the stage reports "error"
+        if not _missing_model(e):
+            raise
+        return dict(result, status="skipped", reason=f"{type(e).__name__}: {e}"[:300], peak_rss_mb=_peak_rss_mb())
+
+    total = sum(samples)
+    return dict(
+        result,
+        status="ok",
+        iterations=iterations,
+        unit=unit,
+        items_per_iteration=items // iterations,
+        p50_ms=round(_percentile(samples, 0.50) * 1000, 2),
+        p95_ms=round(_percentile(samples, 0.95) * 1000, 2),
+        p99_ms=round(_percentile(samples, 0.99) * 1000, 2),
+        mean_ms=round(total / iterations * 1000, 2),
+        throughput_per_sec=round(items / total, 2) if total else 0.0,
+        peak_rss_mb=_peak_rss_mb(),
+    )
+
+
+# ============================================================
+# Parent: orchestration and regression check
+# ============================================================
+def run_child(stage: str, args, base_url: str, upload_dir: str) -> dict:
+    env = dict(os.environ, **stub_environ(base_url, upload_dir))
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", stage,
+           "--iterations", str(args.iterations), "--warmup", str(args.warmup)]
+    proc = subprocess.run(cmd, env=env, cwd=REPO_ROOT, capture_output=True, text=True)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"stage": stage, "status": "error", "reason": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    Per-metric ratio current / baseline; a stage regresses when any ratio is worse than
+    the tolerance. A stage that is "ok" on only one side is "missing": it was not compared.
+    """
+    ok_now, ok_before = current.get("status") == "ok", baseline.get("status") == "ok"
+    if not (ok_now and ok_before):
+        status = "missing" if (ok_now or ok_before) else "not_compared"
+        return {"status": status, "current": current.get("status"), "baseline": baseline.get("status", "absent")}
+    checks = {
+        "p50_ms": (current["p50_ms"], baseline["p50_ms"], True),
+        "throughput_per_sec": (current["throughput_per_sec"], baseline["throughput_per_sec"], False),
+        "peak_rss_mb": (current["peak_rss_mb"], baseline["peak_rss_mb"], True),
+    }
+    out = {"status": "ok", "ratios": {}, "regressions": []}
+    for metric, (now, before, lower_is_better) in checks.items():
+        if not before:
+            continue
+        ratio = now / before
+        out["ratios"][metric] = round(ratio, 3)
+        worse = ratio > 1 + tolerance if lower_is_better else ratio < 1 - tolerance
+        if worse:
+            out["regressions"].append(metric)
+    if out["regressions"]:
+        out["status"] = "regressed"
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against recorded fixtures")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="Stage to run (repeatable; default all)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Delay added to every stub response")
+    parser.add_argument("--output", help="Write the full report (meta + stages) to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this report and exit 1 on regression")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help=f"Write this run as the baseline (default {os.path.relpath(DEFAULT_BASELINE, REPO_ROOT)})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_stage(args.child, args.iterations, args.warmup)), flush=True)
+        return
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": args.iterations,
+            "stub_latency_ms": args.stub_latency_ms,
+        },
+        "stages": {},
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    stages = args.stage or STAGES
+    upload_dir = tempfile.mkdtemp(prefix="df-bench-uploads-")
+    try:
+        with StubServer(latency_ms=args.stub_latency_ms) as stub:
+            for stage in stages:
+                result = run_child(stage, args, stub.base_url, upload_dir)
+                if baseline is not None:
+                    result["baseline"] = compare(result, baseline["stages"].get(stage, {}), args.tolerance)
+                report["stages"][stage] = result
+                print(json.dumps(result), flush=True)
+            report["meta"]["stub_requests"] = stub.requests_served
+    finally:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    if args.output:
+        _write_report(args.output, report)
+
+    status = 0
+    if args.save_baseline:
+        incomplete = sorted(s for s, r in report["stages"].items() if r["status"] != "ok")
+        if incomplete or (NETWORK_STAGES & set(stages) and not report["meta"]["stub_requests"]):
+            print(f"Not saving a baseline: stages {incomplete or stages} did not run completely "
+                  f"(stub requests: {report['meta']['stub_requests']})", file=sys.stderr)
+            status = 2
+        else:
+            _write_report(args.save_baseline, report)
+
+    errors = [s for s, r in report["stages"].items() if r["status"] == "error"]
+    if baseline is not None:
+        outcome = {"regressed": [], "missing": [], "not_compared": []}
+        for stage, result in report["stages"].items():
+            outcome.get(result["baseline"]["status"], []).append(stage)
+        print(json.dumps({"baseline": args.baseline, "tolerance": args.tolerance, "errors": errors, **outcome}),
+              flush=True)
+        if outcome["regressed"] or outcome["missing"]:
+            status = status or 1
+    if errors:
+        status = status or 1
+    sys.exit(status)
+
+
+def _write_report(path: str, report: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/executor_scaling.py
+"""
+Core-scaling curve for the Module 3 execution backends.
+
+Runs a synthetic batch workload for one stage on the thread pool and on
+process pools of 1, 2, 4, ... workers and prints one JSON line per run
+(items/sec and speedup over the single-worker thread run).
+
+    python benchmarks/executor_scaling.py --stage fuzzy
+    python benchmarks/executor_scaling.py --stage nlp --max-workers 32 --items 20000
+
+The "nlp" and "embed" stages need the spaCy / sentence-transformers models.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.similarity_search import executors  # noqa: E402
+
+WORDS = (
+    "model data network learning results method analysis training study system "
+    "approach performance features accuracy proposed evaluate show improve large small"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int = 18) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def make_jobs(stage: str, items: int, batch: int, seed: int = 13):
+    """[(func, args)] covering `items` work items in batches of `batch`."""
+    rng = random.Random(seed)
+    jobs = []
+    if stage == "fuzzy":
+        user_file = []
+        offset = 0
+        for _ in range(200):
+            s = _sentence(rng)
+            user_file.append({"sentence": s, "start": offset, "end": offset + len(s)})
+            offset += len(s) + 1
+        for i in range(0, items, batch):
+            sents = [_sentence(rng) for _ in range(min(batch, items - i))]
+            jobs.append((executors.fuzzy_offsets_batch, (sents, user_file)))
+    elif stage == "nlp":
+        for i in range(0, items, batch):
+            jobs.append((executors.meaningful_batch, ([_sentence(rng) for _ in range(min(batch, items - i))],)))
+    elif stage == "embed":
+        for i in range(0, items, batch):
+            pairs = [(_sentence(rng), _sentence(rng)) for _ in range(min(batch, items - i))]
+            jobs.append((executors.semantic_batch, (pairs,)))
+    else:
+        raise SystemExit(f"Unsupported stage {stage!r}")
+    return jobs
+
+
+def run(pool, jobs) -> float:
+    # Warm every worker (model preload happens in the initializer) before timing
+    list(pool.map(_noop, range(getattr(pool, "_max_workers", 1) * 2)))
+    start = time.perf_counter()
+    futures = [pool.submit(func, *args) for func, args in jobs]
+    for f in futures:
+        f.result()
+    return time.perf_counter() - start
+
+
+def _noop(_):
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Module 3 executor core-scaling benchmark")
+    parser.add_argument("--stage", choices=["fuzzy", "nlp", "embed"], default="fuzzy")
+    parser.add_argument("--items", type=int, default=2000, help="Sentences (or pairs) per run")
+    parser.add_argument("--batch", type=int, default=64, help="Items per job")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=8, help="Thread pool size for the baseline run")
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.stage, args.items, args.batch)
+
+    baseline = None
+    runs = [("thread", 1), ("thread", args.threads)]
+    workers = 1
+    while workers <= args.max_workers:
+        runs.append(("process", workers))
+        workers *= 2
+    if runs[-1] != ("process", args.max_workers):
+        runs.append(("process", args.max_workers))
+
+    for backend, n in runs:
+        if backend == "thread":
+            pool = ThreadPoolExecutor(max_workers=n)
+        else:
+            pool = executors.make_process_executor(args.stage, max_workers=n)
+        with pool:
+            seconds = run(pool, jobs)
+        baseline = baseline or seconds
+        print(json.dumps({
+            "stage": args.stage,
+            "backend": backend,
+            "workers": n,
+            "items": args.items,
+            "seconds": round(seconds, 3),
+            "items_per_sec": round(args.items / seconds, 1),
+            "speedup": round(baseline / seconds, 2),
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# benchmarks/stub_server.py
+"""
+Local stand-in for the external services the pipeline calls, so the
+end-to-end benchmark runs offline and reproducibly.
+
+Serves from benchmarks/fixtures/:
+
+    POST /perplexity/search   recorded Perplexity responses   (search.json)
+    GET  /customsearch/v1     recorded Google CSE responses   (search.json)
+    GET  /pages/<name>        recorded web pages              (pages/<name>.html)
+
+A query that was recorded gets its own response; any other query gets the
+recorded response whose query shares the most words with it, so runs are
+deterministic. Result URLs are stored as "{stub}/pages/<name>" and point
+back at this server.
+
+With record=True the stub forwards to the real services (the client's own
+Authorization header / key parameter pass through), rewrites result URLs to
+/pages/<name>, downloads those pages on first request and writes everything
+back to the fixtures directory on stop().
+
+    python benchmarks/stub_server.py --port 8765      # serve until Ctrl-C
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PERPLEXITY_UPSTREAM = "https://api.perplexity.ai/search"
+GOOGLE_UPSTREAM = "https://www.googleapis.com/customsearch/v1"
+PLACEHOLDER = "{stub}"
+
+
+def _normalize(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def page_name(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+class StubServer:
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, record: bool = False):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency_ms / 1000.0
+        self.record = record
+        self.search = self._load_search()
+        self.page_sources: Dict[str, str] = dict(self.search.get("page_sources", {}))
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self.record:
+            self._save_search()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------
+    # Fixtures
+    # ------------------------------------------------------------
+    def _load_search(self) -> Dict[str, Any]:
+        path = os.path.join(self.fixtures_dir, "search.json")
+        if not os.path.exists(path):
+            return {"perplexity": [], "google": [], "page_sources": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_search(self) -> None:
+        self.search["page_sources"] = self.page_sources
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        with open(os.path.join(self.fixtures_dir, "search.json"), "w", encoding="utf-8") as f:
+            json.dump(self.search, f, indent=2, ensure_ascii=False)
+
+    def _lookup(self, provider: str, query: str) -> Dict[str, Any]:
+        recorded = self.search.get(provider, [])
+        if not recorded:
+            return {}
+        wanted = _normalize(query)
+        for entry in recorded:
+            if _normalize(entry["query"]) == wanted:
+                return entry["response"]
+        # Closest recorded query by shared words; the hash only breaks ties
+        words = set(wanted.split())
+        tiebreak = zlib.crc32(wanted.encode("utf-8"))
+        best = max(range(len(recorded)), key=lambda i: (
+            len(words & set(_normalize(recorded[i]["query"]).split())), (i + tiebreak) % len(recorded)))
+        return recorded[best]["response"]
+
+    def _render(self, response: Dict[str, Any]) -> bytes:
+        return json.dumps(response).replace(PLACEHOLDER, self.base_url).encode("utf-8")
+
+    def _to_stub_url(self, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return url
+        name = page_name(url)
+        self.page_sources[name] = url
+        return f"{PLACEHOLDER}/pages/{name}"
+
+    # ------------------------------------------------------------
+    # Upstream passthrough (record mode)
+    # ------------------------------------------------------------
+    def _record_perplexity(self, body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        resp = requests.post(PERPLEXITY_UPSTREAM, json=body, timeout=60,
+                             headers={"Authorization": headers.get("Authorization", "")})
+        resp.raise_for_status()
+        data = resp.json()
+        for r in data.get("results", []):
+            r["url"] = self._to_stub_url(r.get("url"))
+        with self._lock:
+            self.search.setdefault("perplexity", []).append({"query": body.get("query", ""), "response": data})
+        return data
+
+    def _record_google(self, params: Dict[str, str]) -> Dict[str, Any]:
+        resp = requests.get(GOOGLE_UPSTREAM, params=params, timeout=60)
+        resp.raise_for_status()
+        data = resp.json()
+        for it in data.get("items", []):
+            it["link"] = self._to_stub_url(it.get("link"))
+        with self._lock:
+            self.search.setdefault("google", []).append({"query": params.get("q", ""), "response": data})
+        return data
+
+    def _page(self, name: str) -> Optional[bytes]:
+        path = os.path.join(self.fixtures_dir, "pages", f"{name}.html")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        source = self.page_sources.get(name)
+        if not self.record or not source:
+            return None
+        resp = requests.get(source, timeout=60)
+        if resp.status_code != 200:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(resp.content)
+        return resp.content
+
+    # ------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub._lock:
+                    stub.requests_served += 1
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if urlparse(self.path).path != "/perplexity/search":
+                    return self._send(404, b"{}")
+                if stub.record:
+                    data = stub._record_perplexity(body, dict(self.headers))
+                else:
+                    data = stub._lookup("perplexity", body.get("query", ""))
+                self._send(200, stub._render(data))
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == "/customsearch/v1":
+                    params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                    data = stub._record_google(params) if stub.record else stub._lookup("google", params.get("q", ""))
+                    return self._send(200, stub._render(data))
+                if parsed.path.startswith("/pages/"):
+                    content = stub._page(parsed.path[len("/pages/"):])
+                    if content is None:
+                        return self._send(404, b"", "text/plain")
+                    return self._send(200, content, "text/html; charset=utf-8")
+                self._send(404, b"{}")
+
+        return Handler
+
+    def environ(self) -> Dict[str, str]:
+        """Settings that point the pipeline's clients at this stub."""
+        return {
+            "PERPLEXITY_API_URL": f"{self.base_url}/perplexity/search",
+            "GOOGLE_CSE_URL": f"{self.base_url}/customsearch/v1",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded search / page fixtures locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument("--record", action="store_true", help="Forward to the real services and record")
+    args = parser.parse_args()
+    stub = StubServer(port=args.port, latency_ms=args.latency_ms, record=args.record).start()
+    print(json.dumps(stub.environ()), flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from fpdf import FPDF
 from io import BytesIO
 import tempfile
 import os
+import time
 import requests
 import re  # <--- REQUIRED FOR SMART MATCHING
 
@@ -65,7 +66,15 @@ def smart_highlight(text, sentence_to_find, color, badge_html):
     return pattern.sub(replacement, text)
 
 # ---------- Backend API URL ----------
-API_URL = "http://127.0.0.1:8000/pipeline/full"
+API_BASE = "http://127.0.0.1:8000/pipeline"
+JOB_POLL_SECONDS = 1.0
+JOB_TIMEOUT_SECONDS = 600  # give up polling a job after this long
+JOB_STAGE_LABELS = {
+    "module1": "Parsing document",
+    "module2": "Searching for sources",
+    "module3": "Collecting evidence",
+    "enrich": "Preparing report",
+}
 
 def get_pipeline_output(uploaded_file):
     try:
@@ -78,12 +87,44 @@ def get_pipeline_output(uploaded_file):
                 getattr(uploaded_file, "type", "application/pdf")
             )
         }
-        response = requests.post(API_URL, files=files, timeout=120)
+        # Submit a background job, then poll its status instead of holding one long request open
+        response = requests.post(f"{API_BASE}/jobs", files=files, timeout=30)
+        if response.status_code != 202:
+            st.error(f"Backend error {response.status_code}: {response.text}")
+            return None
+        job_id = response.json()["job_id"]
+
+        status_box = st.empty()
+        deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+        while True:
+            response = requests.get(f"{API_BASE}/jobs/{job_id}", timeout=10)
+            if response.status_code == 404:
+                status_box.empty()
+                st.error("Analysis job not found; the backend may have restarted. Please upload again.")
+                return None
+            if response.status_code != 200:
+                status_box.empty()
+                st.error(f"Backend error {response.status_code}: {response.text}")
+                return None
+            job = response.json()
+            if job["status"] in ("succeeded", "failed", "cancelled"):
+                break
+            if time.monotonic() > deadline:
+                status_box.empty()
+                st.error(f"Analysis did not finish within {JOB_TIMEOUT_SECONDS} seconds.")
+                return None
+            status_box.info(f"{JOB_STAGE_LABELS.get(job.get('stage'), 'Queued')}...")
+            time.sleep(JOB_POLL_SECONDS)
+        status_box.empty()
+
+        if job["status"] != "succeeded":
+            st.error(f"Analysis {job['status']}: {job.get('error') or ''}")
+            return None
 
+        response = requests.get(f"{API_BASE}/jobs/{job_id}/result", timeout=60)
         if response.status_code != 200:
             st.error(f"Backend error {response.status_code}: {response.text}")
             return None
-
         data = response.json()
         if "module3" not in data or "results" not in data["module3"]:
             st.error("Invalid backend response: 'module3.results' missing.")
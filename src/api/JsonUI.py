@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException
 from typing import List
 from ..similarity_search.cleanjson import clean_module3_output
 from ..RefinedOutput.callLLM import call_llm_for_metadata
+from .executor import offload
 
 # ✅ import models from module3_models
 from ..models.module3_models import Module3Input, Module3Item, BlockInput
@@ -38,13 +39,25 @@ async def metadata_enrich(payload: Module3Input):
                 if src["source_url"]:
                     urls.add(src["source_url"])
 
-        # Call LLM for metadata
-        metadata_map = call_llm_for_metadata(list(urls))
+        # Call LLM for metadata (synchronous client; keep it off the event loop)
+        metadata_map = await offload("metadata_enrich", call_llm_for_metadata, list(urls))
 
         # Attach metadata to each source
         for blk in cleaned_blocks:
             for src in blk["sources"]:
                 url = src["source_url"]
+                if url is None and src.get("source_doc_id"):
+                    # Corpus match: the source is an earlier submission, not a web page
+                    where = src["source_doc_id"]
+                    if src.get("source_section"):
+                        where += f", section {src['source_section']}"
+                    src["metadata"] = {
+                        "author": "Unknown",
+                        "publication_date": "Unknown",
+                        "document_type": "Prior submission",
+                        "citation": f"Prior submission {where}"
+                    }
+                    continue
                 src["metadata"] = metadata_map.get(
                     url,
                     {
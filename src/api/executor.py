@@ -0,0 +1,256 @@
+# src/api/executor.py
+"""
+Execution layer for the API routers.
+
+Blocking work (parsers, synchronous HTTP / LLM clients) must not run on the
+event loop: one slow call would stall every request in the worker. Routes
+hand it to `offload()`, which runs it on a sized thread pool (or a process
+pool for CPU-bound work) behind a per-route concurrency limit. Async work
+that is heavy but already non-blocking (Module 2 / Module 3) takes the
+same per-route limit through `route_limit()`.
+
+Every route records how long requests queued for their slot and how long
+they ran, so saturation shows up as queue time rather than as timeouts.
+
+    DF_API_THREAD_WORKERS   threads for offloaded calls (default 32)
+    DF_API_PROCESS_WORKERS  processes for kind="process" calls (default cpu count)
+    DF_API_ROUTE_CONCURRENCY  default in-flight limit per route (default 16)
+    DF_API_ROUTE_LIMITS     per-route overrides, e.g. "pipeline.full=2,metadata_enrich=8"
+"""
+import asyncio
+import atexit
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+API_THREAD_WORKERS = int(os.environ.get("DF_API_THREAD_WORKERS", 32))
+API_PROCESS_WORKERS = int(os.environ.get("DF_API_PROCESS_WORKERS", os.cpu_count() or 1))
+API_ROUTE_CONCURRENCY = int(os.environ.get("DF_API_ROUTE_CONCURRENCY", 16))
+API_ROUTE_LIMITS = os.environ.get("DF_API_ROUTE_LIMITS", "")
+API_METRIC_SAMPLES = 2048  # recent samples kept per route for percentiles
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        try:
+            limits[name.strip()] = int(value)
+        except ValueError:
+            logger.warning("Ignoring malformed DF_API_ROUTE_LIMITS entry %r", item)
+    return limits
+
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class RouteStats:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_seconds: Deque[float] = deque(maxlen=API_METRIC_SAMPLES)
+        self.run_seconds: Deque[float] = deque(maxlen=API_METRIC_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        queue, run = list(self.queue_seconds), list(self.run_seconds)
+        return {
+            "limit": self.limit,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_seconds_p50": round(_percentile(queue, 0.50), 6),
+            "queue_seconds_p99": round(_percentile(queue, 0.99), 6),
+            "run_seconds_p50": round(_percentile(run, 0.50), 6),
+            "run_seconds_p99": round(_percentile(run, 0.99), 6),
+        }
+
+
+class ApiExecutor:
+    def __init__(self, thread_workers: int = 32, process_workers: int = 1,
+                 default_limit: int = 16, limits: Optional[Dict[str, int]] = None):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.default_limit = max(1, default_limit)
+        self.limits = dict(limits or {})
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, RouteStats] = {}
+        # Semaphores belong to an event loop: loop -> {route: semaphore}
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    # ------------------------------------------------------------
+    # Pools
+    # ------------------------------------------------------------
+    def _pool(self, kind: str):
+        with self._lock:
+            if kind == "process":
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                return self._processes
+            if kind != "thread":
+                raise ValueError(f"Unknown offload kind {kind!r}; expected 'thread' or 'process'")
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.thread_workers,
+                                                   thread_name_prefix="api-offload")
+            return self._threads
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            pools = [p for p in (self._threads, self._processes) if p is not None]
+            self._threads = self._processes = None
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ------------------------------------------------------------
+    # Limits + metrics
+    # ------------------------------------------------------------
+    def _route(self, route: str):
+        stats = self._stats.get(route)
+        if stats is None:
+            stats = self._stats.setdefault(route, RouteStats(route, self.limits.get(route, self.default_limit)))
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        semaphore = semaphores.get(route)
+        if semaphore is None:
+            semaphore = semaphores.setdefault(route, asyncio.Semaphore(stats.limit))
+        return stats, semaphore
+
+    @asynccontextmanager
+    async def route_limit(self, route: str):
+        """Hold one of `route`'s concurrency slots for the body; records queue and run time."""
+        stats, semaphore = self._route(route)
+        queued = time.perf_counter()
+        stats.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        started = time.perf_counter()
+        stats.queue_seconds.append(started - queued)
+        stats.in_flight += 1
+        try:
+            yield
+        except BaseException:
+            stats.failed += 1
+            raise
+        else:
+            stats.completed += 1
+        finally:
+            stats.in_flight -= 1
+            stats.run_seconds.append(time.perf_counter() - started)
+            semaphore.release()
+
+    async def offload(self, route: str, func: Callable, *args, kind: str = "thread", **kwargs) -> Any:
+        """
+        Run blocking `func(*args, **kwargs)` off the event loop under `route`'s limit.
+        Queue time covers both the route slot and a free pool worker.
+        """
+        stats, semaphore = self._route(route)
+        queued = time.perf_counter()
+        stats.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        try:
+            call = partial(func, *args, **kwargs)
+            started_box: list = []
+
+            def _timed():
+                # Timestamp the moment a pool thread picks the call up
+                started_box.append(time.perf_counter())
+                return call()
+
+            # Process jobs must pickle, so they go without the timing wrapper or the
+            # copied context (which lets tracing spans in the thread nest under the route's)
+            if kind == "thread":
+                target = partial(contextvars.copy_context().run, _timed)
+            else:
+                target = call
+            future = asyncio.get_running_loop().run_in_executor(self._pool(kind), target)
+        except BaseException:
+            semaphore.release()
+            raise
+        stats.in_flight += 1
+        abandoned = [False]
+
+        def _finished(fut: asyncio.Future) -> None:
+            # A cancelled caller can't stop a pool thread, so the slot stays taken
+            # until the call really ends; that keeps the route limit honest
+            stats.in_flight -= 1
+            started = started_box[0] if started_box else queued
+            stats.queue_seconds.append(started - queued)
+            stats.run_seconds.append(time.perf_counter() - started)
+            # exception() also marks an abandoned call's error as retrieved
+            if (fut.cancelled() or fut.exception() is not None) or abandoned[0]:
+                stats.failed += 1
+            else:
+                stats.completed += 1
+            semaphore.release()
+
+        future.add_done_callback(_finished)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            abandoned[0] = True
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "routes": {name: s.snapshot() for name, s in sorted(self._stats.items())},
+        }
+
+
+_EXECUTOR: Optional[ApiExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_api_executor() -> ApiExecutor:
+    """Process-wide ApiExecutor configured from DF_API_*."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ApiExecutor(
+                    thread_workers=API_THREAD_WORKERS,
+                    process_workers=API_PROCESS_WORKERS,
+                    default_limit=API_ROUTE_CONCURRENCY,
+                    limits=_parse_limits(API_ROUTE_LIMITS),
+                )
+                atexit.register(_EXECUTOR.shutdown)
+    return _EXECUTOR
+
+
+async def offload(route: str, func: Callable, *args, kind: str = "thread", **kwargs) -> Any:
+    return await get_api_executor().offload(route, func, *args, kind=kind, **kwargs)
+
+
+def route_limit(route: str):
+    return get_api_executor().route_limit(route)
@@ -4,6 +4,7 @@ import json
 import os
 
 from ..similarity_search.module3_engine import process_module3
+from .executor import route_limit
 
 router = APIRouter(
     prefix="/similarity/forsenics",
@@ -42,7 +43,8 @@ async def module3_from_json(module2_output: dict):
         )
 
     try:
-        result = await process_module3(module2_output, raw_text=raw_text)
+        async with route_limit("module3"):
+            result = await process_module3(module2_output, raw_text=raw_text)
         return JSONResponse(content=result)
 
     except Exception as e:
@@ -87,7 +89,8 @@ async def module3_from_file(file: UploadFile = File(...)):
             )
 
         # Run Module 3
-        result = await process_module3(module2_json, raw_text=raw_text)
+        async with route_limit("module3"):
+            result = await process_module3(module2_json, raw_text=raw_text)
 
         return JSONResponse(content=result)
 
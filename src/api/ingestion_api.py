@@ -10,6 +10,7 @@ from pydantic import BaseModel
 from ..models.ingestion_models import URLInput, UploadResponse
 from ..ingestion.utils import normalize_file_path
 from ..ingestion.parsers import parse_pdf, parse_docx, parse_html, parse_text_file
+from .executor import offload
 
 router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 
@@ -20,7 +21,7 @@ UPLOAD_DIR = os.environ.get("DF_UPLOAD_DIR", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.post("/parse-text/")
-def parse_text_endpoint(payload: dict = Body(...)):
+async def parse_text_endpoint(payload: dict = Body(...)):
     """
     Accepts raw text input and parses it, saving it as a .txt file.
     Payload format: {"text": "Your text here"}
@@ -30,7 +31,7 @@ def parse_text_endpoint(payload: dict = Body(...)):
         raise HTTPException(status_code=400, detail="No text provided")
 
     from src.ingestion.parsers.text_parser import parse_text_string
-    result = parse_text_string(text)
+    result = await offload("ingestion.parse", parse_text_string, text)
     return JSONResponse(content=result)
 
 @router.post("/upload-file/", response_model=UploadResponse)
@@ -48,8 +49,8 @@ async def upload_file(file: UploadFile = File(...)):
     return {"status": "success", "file_id": file_id, "filename": file.filename, "path": file_path}
 
 @router.post("/fetch-url/", response_model=UploadResponse)
-def fetch_url(payload: URLInput):
-    r = requests.get(str(payload.url), timeout=15)
+async def fetch_url(payload: URLInput):
+    r = await offload("ingestion.fetch_url", requests.get, str(payload.url), timeout=15)
     if r.status_code != 200:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {r.status_code}")
     file_id = uuid.uuid4().hex
@@ -59,24 +60,28 @@ def fetch_url(payload: URLInput):
         f.write(r.content)
     return {"status": "success", "file_id": file_id, "filename": filename, "path": file_path}
 
+def _parse_path(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in [".pdf"]:
+        return parse_pdf(path)
+    elif ext in [".docx"]:
+        return parse_docx(path)
+    elif ext in [".html", ".htm"]:
+        return parse_html(path)
+    elif ext in [".txt"]:
+        return parse_text_file(path)
+    raise HTTPException(status_code=400, detail=f"Unsupported file extension: {ext}")
+
 @router.post("/parse/{file_id}")
-def parse_uploaded(file_id: str):
+async def parse_uploaded(file_id: str):
     candidates = [f for f in os.listdir(UPLOAD_DIR) if f.startswith(file_id)]
     if not candidates:
         raise HTTPException(status_code=404, detail="File not found")
     path = os.path.join(UPLOAD_DIR, candidates[0])
-    ext = os.path.splitext(path)[1].lower()
     try:
-        if ext in [".pdf"]:
-            result = parse_pdf(path)
-        elif ext in [".docx"]:
-            result = parse_docx(path)
-        elif ext in [".html", ".htm"]:
-            result = parse_html(path)
-        elif ext in [".txt"]:
-            result = parse_text_file(path)
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file extension: {ext}")
+        result = await offload("ingestion.parse", _parse_path, path)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     return JSONResponse(content=result)
@@ -0,0 +1,367 @@
+# src/api/jobs.py
+"""
+Background jobs for long-running pipeline requests.
+
+A submission is stored in a SQLite-backed queue (DF_JOBS_DB) and answered
+immediately with a job id; a bounded set of worker tasks on the server's
+event loop (DF_JOBS_WORKERS) claims queued jobs and runs the registered
+handler for their kind. Handlers report per-stage progress through a
+callback; progress, results and errors are persisted, so status and
+results can be read from any API worker process and jobs left behind by
+a crashed process are re-queued on start-up.
+
+Job lifecycle: queued -> running -> succeeded / failed / cancelled.
+Submissions beyond DF_JOBS_MAX_QUEUE queued + running jobs are rejected.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = os.environ.get("DF_JOBS_DB", os.path.join(".cache", "jobs.sqlite3"))
+JOBS_WORKERS = int(os.environ.get("DF_JOBS_WORKERS", 2))
+JOBS_MAX_QUEUE = int(os.environ.get("DF_JOBS_MAX_QUEUE", 100))
+JOBS_POLL_SECONDS = float(os.environ.get("DF_JOBS_POLL_SECONDS", 1.0))
+
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+_HOST = socket.gethostname()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress TEXT NOT NULL DEFAULT '[]',
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+# handler(payload, progress) -> result; progress(stage, **info) is awaitable
+ProgressFn = Callable[..., Awaitable[None]]
+Handler = Callable[[Dict[str, Any], ProgressFn], Awaitable[Any]]
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue is at its maximum depth."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler (from its progress callback) when its job was cancelled."""
+
+
+class JobStore:
+    """SQLite persistence for jobs; one connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def insert(self, kind: str, payload: Dict[str, Any], max_depth: int) -> str:
+        job_id = uuid.uuid4().hex
+        conn = self._conn()
+        # Depth check and insert in one write transaction, so concurrent submitters cannot overshoot
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+            if depth >= max_depth:
+                raise QueueFull(f"Job queue is full ({depth} jobs queued or running)")
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """Atomically move the oldest queued job to running and return it."""
+        return self._conn().execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, owner = ? WHERE id = "
+            "(SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+            "RETURNING *",
+            (time.time(), f"{_HOST}:{os.getpid()}"),
+        ).fetchone()
+
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        return self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def add_progress(self, job_id: str, event: Dict[str, Any]) -> bool:
+        """Append a progress event; returns whether cancellation was requested."""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET stage = ?, progress = json_insert(progress, '$[#]', json(?)) WHERE id = ?",
+            (event["stage"], json.dumps(event), job_id),
+        )
+        return bool(conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+            (status, None if result is None else json.dumps(result), error, time.time(), job_id),
+        )
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job outright or flag a running one; returns the resulting status."""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        row = self.get(job_id)
+        return row["status"] if row else None
+
+    def requeue_running(self) -> int:
+        """Jobs left running by a dead process on this host (or by this pid before) go back to the queue."""
+        conn = self._conn()
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status = 'running'").fetchall()
+        orphaned = [row["id"] for row in rows if _owner_is_gone(row["owner"])]
+        conn.executemany(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, stage = NULL, progress = '[]', owner = NULL "
+            "WHERE id = ? AND status = 'running'",
+            [(job_id,) for job_id in orphaned],
+        )
+        return len(orphaned)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+def _owner_is_gone(owner: Optional[str]) -> bool:
+    host, _, pid = (owner or "").rpartition(":")
+    if host != _HOST or not pid.isdigit():
+        # Jobs of other hosts are theirs to recover
+        return not owner
+    if int(pid) == os.getpid():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def job_view(row: sqlite3.Row, include_result: bool = False) -> Dict[str, Any]:
+    view = {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "stage": row["stage"],
+        "progress": json.loads(row["progress"]),
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+    if include_result:
+        view["result"] = json.loads(row["result"]) if row["result"] else None
+    return view
+
+
+class JobManager:
+    def __init__(self, store: JobStore, workers: int = 2, max_queue: int = 100,
+                 poll_seconds: float = 1.0):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.poll_seconds = poll_seconds
+        self._handlers: Dict[str, Handler] = {}
+        self._tasks: list = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancelled: set = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, recover: bool = True) -> None:
+        """Start the worker tasks on the running event loop (idempotent)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Event()
+        if recover:
+            requeued = self.store.requeue_running()
+            if requeued:
+                logger.info("Re-queued %d interrupted jobs", requeued)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
+    def submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job_id = self.store.insert(kind, payload, self.max_queue)
+        if not self._tasks:
+            self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        row = self.store.get(job_id)
+        return job_view(row, include_result) if row else None
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        status = self.store.cancel(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        return status
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Job snapshots whenever the stage, progress or status changes, until the job ends."""
+        last = None
+        while True:
+            view = self.get(job_id)
+            if view is None:
+                return
+            marker = (view["status"], len(view["progress"]))
+            if marker != last:
+                last = marker
+                yield view
+            if view["status"] in TERMINAL:
+                return
+            # Local jobs notify immediately; jobs run by other processes are picked up by polling
+            if self._changed is None:
+                await asyncio.sleep(self.poll_seconds)
+            else:
+                await self._wait(self._changed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "max_queue": self.max_queue,
+                "running_here": len(self._running), "jobs": self.store.counts()}
+
+    # ------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------
+    async def _wait(self, event: asyncio.Event) -> None:
+        """Wait for `event` for at most poll_seconds (asyncio.wait, unlike wait_for, never swallows a cancel)."""
+        waiter = asyncio.ensure_future(event.wait())
+        try:
+            await asyncio.wait({waiter}, timeout=self.poll_seconds)
+        finally:
+            waiter.cancel()
+
+    async def _notify(self) -> None:
+        # Wake every events() waiter, then arm a fresh event for the next change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            row = self.store.claim()
+            if row is None:
+                self._wakeup.clear()
+                await self._wait(self._wakeup)
+                continue
+            task = asyncio.create_task(self._run(row))
+            self._running[row["id"]] = task
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    # The worker itself is shutting down
+                    task.cancel()
+                    raise
+                # The job was cancelled before its handler got to run
+                self._cancelled.discard(row["id"])
+                self.store.finish(row["id"], "cancelled")
+                await self._notify()
+            finally:
+                self._running.pop(row["id"], None)
+
+    async def _run(self, row: sqlite3.Row) -> None:
+        job_id = row["id"]
+        handler = self._handlers.get(row["kind"])
+        started = time.perf_counter()
+
+        async def progress(stage: str, **info: Any) -> None:
+            event = {"stage": stage, "elapsed_seconds": round(time.perf_counter() - started, 3), **info}
+            if self.store.add_progress(job_id, event):
+                raise JobCancelled(job_id)
+            await self._notify()
+
+        await self._notify()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind {row['kind']!r}")
+            result = await handler(json.loads(row["payload"]), progress)
+            self.store.finish(job_id, "succeeded", result=result)
+        except JobCancelled:
+            self.store.finish(job_id, "cancelled")
+            logger.info("Job %s cancelled", job_id)
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                # Server shutdown: leave it running so the next start re-queues it
+                raise
+            self._cancelled.discard(job_id)
+            self.store.finish(job_id, "cancelled")
+            logger.info("Job %s cancelled", job_id)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            self.store.finish(job_id, "failed", error=str(e))
+        await self._notify()
+
+
+_MANAGER: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide JobManager configured from DF_JOBS_*."""
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = JobManager(JobStore(JOBS_DB), workers=JOBS_WORKERS, max_queue=JOBS_MAX_QUEUE,
+                              poll_seconds=JOBS_POLL_SECONDS)
+    return _MANAGER
@@ -1,4 +1,5 @@
 # src/api/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .ingestion_api import router as ingestion_router
 from .similarity_api import router as similarity_router
@@ -7,7 +8,27 @@ from .pipeline_api import router as pipeline_router
 from .JsonUI import router as JsonUI
 
 from .newjson import router as Clean_router
-app = FastAPI(title="DF Project - MVP")
+from .jobs import get_job_manager
+from .executor import get_api_executor
+from .metrics_api import router as metrics_router, metrics_middleware
+from ..observability import configure_logging
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background pipeline workers; re-queues jobs interrupted by a previous shutdown
+    get_job_manager().start()
+    yield
+    await get_job_manager().stop()
+
+
+app = FastAPI(title="DF Project - MVP", lifespan=lifespan)
+
+# Request latency / in-flight metrics for GET /metrics
+app.middleware("http")(metrics_middleware)
+app.include_router(metrics_router)
 
 # Include ingestion routes
 app.include_router(ingestion_router)
@@ -29,3 +50,8 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/health/executor")
+def executor_stats():
+    """Per-route concurrency, queue time and run time of the API execution layer."""
+    return get_api_executor().stats()
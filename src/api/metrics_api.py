@@ -0,0 +1,108 @@
+# src/api/metrics_api.py
+"""
+GET /metrics in the Prometheus text format.
+
+Request latency and in-flight counts come from `metrics_middleware`
+(installed in main.py); provider and embedding metrics are recorded where
+the calls happen. Everything that already keeps its own counters (API
+executor routes, job queue, Module 3 pools, fetch / search / embedding
+caches) is read at scrape time by the collectors below.
+"""
+import time
+
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from ..observability.metrics import (
+    REGISTRY, CONTENT_TYPE_LATEST, HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT,
+)
+from .executor import get_api_executor
+from .jobs import get_job_manager
+
+router = APIRouter(tags=["metrics"])
+
+
+async def metrics_middleware(request: Request, call_next):
+    method = request.method
+    in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method=method)
+    in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_flight.dec()
+        # Route template, not the raw path, so ids in URLs don't explode the label set
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(method=method, route=route, status=str(status)).observe(
+            time.perf_counter() - start)
+
+
+# ============================================================
+# Scrape-time collectors
+# ============================================================
+def _api_executor_families():
+    routes = get_api_executor().stats()["routes"]
+    yield ("df_api_route_waiting", "gauge", "Requests queued for a per-route concurrency slot.",
+           [({"route": r}, s["waiting"]) for r, s in routes.items()])
+    yield ("df_api_route_in_flight", "gauge", "Requests holding a per-route concurrency slot.",
+           [({"route": r}, s["in_flight"]) for r, s in routes.items()])
+    yield ("df_api_route_limit", "gauge", "Per-route concurrency limit.",
+           [({"route": r}, s["limit"]) for r, s in routes.items()])
+    yield ("df_api_route_queue_seconds_p99", "gauge", "p99 queue time of recent requests per route.",
+           [({"route": r}, s["queue_seconds_p99"]) for r, s in routes.items()])
+    yield ("df_api_route_calls", "counter", "Completed offloaded / limited calls per route and outcome.",
+           [({"route": r, "outcome": o}, s[o]) for r, s in routes.items() for o in ("completed", "failed")])
+
+
+def _job_families():
+    stats = get_job_manager().stats()
+    yield ("df_jobs", "gauge", "Pipeline jobs by status.",
+           [({"status": status}, n) for status, n in sorted(stats["jobs"].items())])
+    yield ("df_jobs_running_local", "gauge", "Jobs running in this process.", [({}, stats["running_here"])])
+    yield ("df_jobs_workers", "gauge", "Job worker tasks in this process.", [({}, stats["workers"])])
+
+
+def _stage_executor_families():
+    from ..similarity_search.executors import executor_stats
+    pools = executor_stats()
+    yield ("df_stage_executor_queued", "gauge", "Jobs waiting in the Module 3 stage executors.",
+           [({"pool": name}, s["queued"]) for name, s in sorted(pools.items())])
+    yield ("df_stage_executor_workers", "gauge", "Workers of the Module 3 stage executors.",
+           [({"pool": name}, s["workers"]) for name, s in sorted(pools.items())])
+
+
+def _cache_families():
+    from ..similarity_search.fetch_cache import get_fetch_cache
+    from ..similarity_search.search_cache import get_search_cache
+    from ..similarity_search.embedding_service import embedding_stats
+
+    fetch = get_fetch_cache().stats()
+    yield ("df_fetch_cache_lookups", "counter", "Fetch cache lookups by result.",
+           [({"result": result}, fetch.get(key, 0)) for result, key in (
+               ("hot_hit", "hot_hits"), ("disk_hit", "disk_hits"), ("stale_hit", "stale_hits"),
+               ("miss", "misses"), ("revalidated", "revalidated"))])
+    yield ("df_fetch_cache_hit_ratio", "gauge", "Fetch cache hit ratio (304 revalidations count as hits).",
+           [({}, fetch["hit_ratio"])])
+
+    search = get_search_cache().stats()
+    yield ("df_search_cache_lookups", "counter", "Search cache lookups per provider and result.",
+           [({"provider": p, "result": result}, s.get(result, 0))
+            for p, s in sorted(search.items()) for result in ("hits", "misses")])
+
+    embeddings = embedding_stats()
+    yield ("df_embedding_cache_hit_ratio", "gauge", "Embedding cache hit ratio per model.",
+           [({"model": s["model_name"]}, s["cache_hit_rate"]) for s in embeddings])
+    yield ("df_embedding_cache_entries", "gauge", "Cached embeddings per model.",
+           [({"model": s["model_name"]}, s["cache_entries"]) for s in embeddings])
+
+
+for _collector in (_api_executor_families, _job_families, _stage_executor_families, _cache_families):
+    REGISTRY.register_collector(_collector)
+
+
+@router.get("/metrics")
+def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
@@ -1,23 +1,35 @@
 # src/api/pipeline_api.py
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
+import json
+import logging
 import uuid
+from typing import Optional
 from fastapi.encoders import jsonable_encoder
 
 
 from ..ingestion.utils import normalize_file_path
 from ..ingestion.parsers import parse_pdf, parse_docx, parse_html, parse_text_file
-from ..similarity_search.pipeline import process_document
+from ..similarity_search.pipeline import process_document_async
 from ..similarity_search.module3_engine import process_module3
+from ..similarity_search.corpus_index import add_to_corpus_index
+from ..similarity_search import configs
 
 # ✅ Import all module3 models from models, not JsonUI
 from ..models.module3_models import Module3Input, BlockInput, Module3Item, UserFileOffset
 from .JsonUI import metadata_enrich  # only the enrichment endpoint
+from .jobs import get_job_manager, QueueFull
+from .executor import offload, route_limit
+from ..observability import span
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/pipeline", tags=["pipeline"])
 
 UPLOAD_DIR = os.environ.get("DF_UPLOAD_DIR", "uploads")
+# Embed the per-stage timing summary ("trace") in pipeline results by default
+TRACE_SUMMARY = os.environ.get("DF_TRACE_SUMMARY", "false").lower() == "true"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # -----------------------------
@@ -43,40 +55,101 @@ async def enrich_module3_for_jsonui(module3_json: dict) -> dict:
     return jsonable_encoder(enriched)
 
 # -----------------------------
-# Full pipeline — raw text
+# Shared pipeline runner
 # -----------------------------
-@router.post("/full-text")
-async def run_full_pipeline_text(payload: dict):
-    try:
-        text = payload.get("text", "").strip()
-        if not text:
-            raise HTTPException(status_code=400, detail="Text input is empty.")
+def parse_upload(file_path: str) -> dict:
+    """Module 1 for an uploaded file, by extension (blocking; run it off the event loop)."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        return parse_pdf(file_path)
+    elif ext == ".docx":
+        return parse_docx(file_path)
+    elif ext in [".html", ".htm"]:
+        return parse_html(file_path)
+    elif ext == ".txt":
+        return parse_text_file(file_path)
+    raise ValueError(f"Unsupported file type: {ext}")
 
-        # Save text file
-        file_id = uuid.uuid4().hex
-        file_path = normalize_file_path(os.path.join(UPLOAD_DIR, f"{file_id}.txt"))
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(text)
 
-        # Module1
-        module1_json = parse_text_file(file_path)
+async def run_pipeline(file_id: str, file_path: str, progress=None, include_trace: Optional[bool] = None) -> dict:
+    """
+    Module 1 -> Module 2 -> Module 3 -> JsonUI enrichment, reporting each stage to `progress`.
+    With `include_trace` (default DF_TRACE_SUMMARY) the result carries a per-stage timing summary.
+    """
+    async def report(stage: str, **info):
+        if progress is not None:
+            await progress(stage, **info)
+
+    with span("pipeline", file_id=file_id, extension=os.path.splitext(file_path)[1].lower()) as root:
+        # Module1 (parsers are synchronous and CPU/IO bound)
+        await report("module1")
+        with span("module1"):
+            module1_json = await offload("pipeline.parse", parse_upload, file_path)
+
+        # Make this submission visible to later ones (Module 3 excludes its own doc_id)
+        if configs.CORPUS_INDEX_AUTO_ADD:
+            with span("corpus.add"):
+                try:
+                    await offload("pipeline.corpus_add", add_to_corpus_index, module1_json)
+                except Exception as e:
+                    logger.warning("Could not add %s to the corpus index: %s", module1_json.get("doc_id"), e)
 
         # Module2
-        module2_json = process_document(module1_json)
+        await report("module2", sections=len(module1_json.get("sections", [])))
+        module2_json = await process_document_async(module1_json)
 
         # Module3
+        await report("module3", blocks=len(module2_json.get("blocks", [])))
         module3_json = await process_module3(module2_json, raw_text=module1_json["raw_text"])
 
         # JsonUI enrichment
-        enriched_json = await enrich_module3_for_jsonui(module3_json)
+        await report("enrich")
+        with span("enrich"):
+            enriched_json = await enrich_module3_for_jsonui(module3_json)
+
+    result = {
+        "file_id": file_id,
+        "module1": module1_json,
+        "module2": module2_json,
+        "module3": enriched_json
+    }
+    if (TRACE_SUMMARY if include_trace is None else include_trace) and root.trace is not None:
+        result["trace"] = root.trace.summary()
+    return result
+
+
+def _save_text(text: str):
+    file_id = uuid.uuid4().hex
+    file_path = normalize_file_path(os.path.join(UPLOAD_DIR, f"{file_id}.txt"))
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return file_id, file_path
+
 
-        return JSONResponse(content={
-            "file_id": file_id,
-            "module1": module1_json,
-            "module2": module2_json,
-            "module3": enriched_json
-        })
+async def _save_upload(file: UploadFile):
+    file_id = uuid.uuid4().hex
+    filename = f"{file_id}_{file.filename}"
+    file_path = normalize_file_path(os.path.join(UPLOAD_DIR, filename))
+    with open(file_path, "wb") as f:
+        f.write(await file.read())
+    return file_id, file_path
 
+# -----------------------------
+# Full pipeline — raw text
+# -----------------------------
+@router.post("/full-text")
+async def run_full_pipeline_text(payload: dict, trace: Optional[bool] = Query(None)):
+    try:
+        text = payload.get("text", "").strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="Text input is empty.")
+
+        file_id, file_path = _save_text(text)
+        async with route_limit("pipeline.full"):
+            return JSONResponse(content=await run_pipeline(file_id, file_path, include_trace=trace))
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Pipeline error: {str(e)}")
 
@@ -84,43 +157,100 @@ async def run_full_pipeline_text(payload: dict):
 # Full pipeline — file upload
 # -----------------------------
 @router.post("/full")
-async def run_full_pipeline(file: UploadFile = File(...)):
+async def run_full_pipeline(file: UploadFile = File(...), trace: Optional[bool] = Query(None)):
     try:
-        file_id = uuid.uuid4().hex
-        filename = f"{file_id}_{file.filename}"
-        file_path = normalize_file_path(os.path.join(UPLOAD_DIR, filename))
-
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-
-        # Parse file
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext == ".pdf":
-            module1_json = parse_pdf(file_path)
-        elif ext == ".docx":
-            module1_json = parse_docx(file_path)
-        elif ext in [".html", ".htm"]:
-            module1_json = parse_html(file_path)
-        elif ext == ".txt":
-            module1_json = parse_text_file(file_path)
-        else:
-            raise HTTPException(400, f"Unsupported file type: {ext}")
+        file_id, file_path = await _save_upload(file)
+        async with route_limit("pipeline.full"):
+            return JSONResponse(content=await run_pipeline(file_id, file_path, include_trace=trace))
 
-        # Module2
-        module2_json = process_document(module1_json)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Module3
-        module3_json = await process_module3(module2_json, raw_text=module1_json["raw_text"])
+# -----------------------------
+# Background jobs (see jobs.py)
+# -----------------------------
+async def _pipeline_job(payload: dict, progress) -> dict:
+    result = await run_pipeline(payload["file_id"], payload["file_path"], progress=progress)
+    return jsonable_encoder(result)
 
-        # JsonUI enrichment
-        enriched_json = await enrich_module3_for_jsonui(module3_json)
 
-        return JSONResponse(content={
-            "file_id": file_id,
-            "module1": module1_json,
-            "module2": module2_json,
-            "module3": enriched_json
-        })
+job_manager = get_job_manager()
+job_manager.register("pipeline", _pipeline_job)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+def _submit(file_id: str, file_path: str) -> JSONResponse:
+    try:
+        job_id = job_manager.submit("pipeline", {"file_id": file_id, "file_path": file_path})
+    except QueueFull as e:
+        # Capacity is checked atomically on insert, so the upload is already on disk
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        raise HTTPException(status_code=429, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "file_id": file_id,
+        "status": "queued",
+        "status_url": f"{router.prefix}/jobs/{job_id}",
+        "events_url": f"{router.prefix}/jobs/{job_id}/events",
+        "result_url": f"{router.prefix}/jobs/{job_id}/result",
+    })
+
+
+def _get_job(job_id: str, include_result: bool = False) -> dict:
+    job = job_manager.get(job_id, include_result=include_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@router.post("/jobs", status_code=202)
+async def submit_pipeline_job(file: UploadFile = File(...)):
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in (".pdf", ".docx", ".html", ".htm", ".txt"):
+        raise HTTPException(400, f"Unsupported file type: {ext}")
+    file_id, file_path = await _save_upload(file)
+    return _submit(file_id, file_path)
+
+
+@router.post("/jobs/text", status_code=202)
+async def submit_pipeline_text_job(payload: dict):
+    text = payload.get("text", "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Text input is empty.")
+    return _submit(*_save_text(text))
+
+
+@router.get("/jobs/{job_id}")
+async def get_pipeline_job(job_id: str):
+    return _get_job(job_id)
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_pipeline_job_result(job_id: str):
+    job = _get_job(job_id, include_result=True)
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail={"status": job["status"], "error": job["error"]})
+    return JSONResponse(content=job["result"])
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_pipeline_job(job_id: str):
+    """Server-sent events: one `data:` JSON snapshot per stage change, ending with the final status."""
+    _get_job(job_id)
+
+    async def event_stream():
+        async for view in job_manager.events(job_id):
+            yield f"event: {view['status']}\ndata: {json.dumps(view)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_pipeline_job(job_id: str):
+    _get_job(job_id)
+    return {"job_id": job_id, "status": job_manager.cancel(job_id)}
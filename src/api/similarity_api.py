@@ -4,8 +4,9 @@ from fastapi.responses import JSONResponse
 import json
 import tempfile
 import os
-from ..similarity_search.pipeline import process_document
+from ..similarity_search.pipeline import process_document_async
 from ..similarity_search.module3_engine import process_module3  # Module 3
+from .executor import route_limit
 
 from typing import List, Dict, Any
 router = APIRouter(
@@ -32,11 +33,12 @@ async def similarity_from_file(file: UploadFile = File(...)):
             tmp.flush()
             tmp_path = tmp.name
 
-        # Load JSON and run Module 2 pipeline (process_document handles auto-chunking)
+        # Load JSON and run Module 2 pipeline (process_document_async handles auto-chunking)
         with open(tmp_path, "r", encoding="utf-8") as f:
             doc_json = json.load(f)
 
-        output = process_document(doc_json)
+        async with route_limit("similarity"):
+            output = await process_document_async(doc_json)
 
         os.remove(tmp_path)
         return JSONResponse(content=output)
@@ -53,7 +55,8 @@ async def similarity_from_json(doc: dict):
     and returns the result JSON.
     """
     try:
-        output = process_document(doc)
+        async with route_limit("similarity"):
+            output = await process_document_async(doc)
         return JSONResponse(content=output)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
@@ -3,6 +3,7 @@ from .pdf_parser import parse_pdf
 from .docx_parser import parse_docx
 from .html_parser import parse_html
 from .ocr_utils import ocr_image
+from .ocr_pool import ocr_pdf_pages
 from .text_parser import parse_text_file
 
-__all__ = ["parse_pdf", "parse_docx", "parse_html", "ocr_image", "parse_text_file"]
+__all__ = ["parse_pdf", "parse_docx", "parse_html", "ocr_image", "ocr_pdf_pages", "parse_text_file"]
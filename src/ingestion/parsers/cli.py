@@ -6,6 +6,7 @@ from .docx_parser import parse_docx
 from .html_parser import parse_html
 from .text_parser import parse_text_file, parse_text_string
 import json
+from src.observability import configure_logging
 
 def main(argv=None):
     parser = argparse.ArgumentParser("df-ingest")
@@ -14,6 +15,7 @@ def main(argv=None):
     parser.add_argument("--ocr", action="store_true", help="Enable OCR fallback for PDFs")
     parser.add_argument("--text", type=str, help="Raw text input (for --type raw_text)")
     args = parser.parse_args(argv)
+    configure_logging()
 
     if args.type == "pdf":
         res = parse_pdf(args.path, ocr_if_no_text=args.ocr)
@@ -3,7 +3,9 @@ from typing import Dict, Any, List
 import uuid
 from docx import Document
 from ..utils import normalize_metadata, detect_language, section_splitter
+from src.observability import traced, set_attributes
 
+@traced("parse_docx")
 def parse_docx(path: str) -> Dict[str, Any]:
     doc_id = uuid.uuid4().hex
     doc = Document(path)
@@ -47,6 +49,7 @@ def parse_docx(path: str) -> Dict[str, Any]:
 
     sections = section_splitter(raw_text, [raw_text])
     metadata["language"] = detect_language(raw_text)
+    set_attributes(paragraphs=len(paragraphs), chars=len(raw_text), sections=len(sections))
 
     return {
         "doc_id": doc_id,
@@ -3,7 +3,9 @@ from typing import Dict, Any, List
 import uuid
 from bs4 import BeautifulSoup
 from ..utils import normalize_metadata, detect_language, section_splitter
+from src.observability import traced, set_attributes
 
+@traced("parse_html")
 def parse_html(path: str) -> Dict[str, Any]:
     """
     Parse an HTML file (path) saved locally into normalized JSON.
@@ -11,6 +13,7 @@ def parse_html(path: str) -> Dict[str, Any]:
     doc_id = uuid.uuid4().hex
     with open(path, "rb") as f:
         content = f.read()
+    set_attributes(bytes=len(content))
     soup = BeautifulSoup(content.decode("utf-8"), "html.parser")
 
     # Remove scripts & style
@@ -32,4 +35,5 @@ def parse_html(path: str) -> Dict[str, Any]:
     }
     sections = section_splitter(raw_text, [raw_text])
     metadata["language"] = detect_language(raw_text)
+    set_attributes(chars=len(raw_text), sections=len(sections))
     return {"doc_id": doc_id, "sections": sections, "metadata": metadata, "raw_text": raw_text, "images": []}
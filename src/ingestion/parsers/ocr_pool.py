@@ -0,0 +1,260 @@
+# src/ingestion/parsers/ocr_pool.py
+"""
+Parallel OCR for scanned PDF pages.
+
+Pages are rasterized and run through Tesseract in a pool of worker
+processes (DF_OCR_WORKERS), one page per job, with a quality profile
+(DF_OCR_PROFILE) choosing DPI, colour mode and Tesseract flags. Results are
+cached in SQLite (DF_OCR_CACHE_PATH) under two keys:
+
+- the page image hash + profile, so an identical scan inside another PDF
+  skips Tesseract
+- the PDF file hash + page number + profile, so a re-upload of the same
+  file skips rasterizing as well
+
+Every page reports its raster / OCR timings and whether it was cached.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from pdf2image import convert_from_path
+
+from .ocr_utils import ocr_image
+
+logger = logging.getLogger(__name__)
+
+OCR_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Quick pass for clean, high-contrast scans
+    "fast": {"dpi": 150, "grayscale": True, "config": "--oem 1 --psm 6"},
+    "balanced": {"dpi": 200, "grayscale": True, "config": "--oem 1 --psm 3"},
+    # Previous parse_pdf behaviour: 300 dpi colour, Tesseract defaults
+    "accurate": {"dpi": 300, "grayscale": False, "config": ""},
+}
+
+OCR_PROFILE = os.environ.get("DF_OCR_PROFILE", "accurate")
+OCR_DPI = os.environ.get("DF_OCR_DPI")  # overrides the profile's DPI when set
+OCR_LANG = os.environ.get("DF_OCR_LANG", "eng")
+OCR_WORKERS = int(os.environ.get("DF_OCR_WORKERS", os.cpu_count() or 1))
+OCR_START_METHOD = os.environ.get("DF_OCR_START_METHOD", "spawn")
+OCR_CACHE_PATH = os.environ.get("DF_OCR_CACHE_PATH", os.path.join(".cache", "ocr_cache.sqlite3"))  # "" = off
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    ocr_seconds REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+# ============================================================
+# Profiles
+# ============================================================
+def resolve_profile(profile: Optional[str] = None) -> Dict[str, Any]:
+    """Settings for `profile` (default DF_OCR_PROFILE), with DF_OCR_DPI / DF_OCR_LANG applied."""
+    name = profile or OCR_PROFILE
+    if name not in OCR_PROFILES:
+        raise ValueError(f"Unknown OCR profile {name!r}; expected one of {sorted(OCR_PROFILES)}")
+    settings = dict(OCR_PROFILES[name], name=name, lang=OCR_LANG)
+    if OCR_DPI:
+        settings["dpi"] = int(OCR_DPI)
+    return settings
+
+
+def _profile_key(settings: Dict[str, Any]) -> str:
+    return json.dumps({k: settings[k] for k in ("dpi", "grayscale", "config", "lang")}, sort_keys=True)
+
+
+# ============================================================
+# Cache (one SQLite connection per thread and process)
+# ============================================================
+def _conn(path: str) -> Optional[sqlite3.Connection]:
+    if not path:
+        return None
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid() or getattr(_local, "path", None) != path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), path
+    return conn
+
+
+def cache_get(path: str, key: str) -> Optional[str]:
+    try:
+        conn = _conn(path)
+        row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone() if conn else None
+    except sqlite3.Error as e:
+        logger.warning("OCR cache read failed: %s", e)
+        return None
+    return row[0] if row else None
+
+
+def cache_put(path: str, keys: Sequence[str], text: str, ocr_seconds: float) -> None:
+    try:
+        conn = _conn(path)
+        if conn is None:
+            return
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO ocr_cache (key, text, ocr_seconds, created_at) VALUES (?, ?, ?, ?)",
+            [(key, text, ocr_seconds, now) for key in keys],
+        )
+    except sqlite3.Error as e:
+        logger.warning("OCR cache write failed: %s", e)
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_page_key(digest: str, page_number: int, settings: Dict[str, Any]) -> str:
+    return "file:" + hashlib.sha256(f"{digest}:{page_number}:{_profile_key(settings)}".encode()).hexdigest()
+
+
+def _image_key(img, settings: Dict[str, Any]) -> str:
+    h = hashlib.sha256(f"{img.mode}:{img.size}:{_profile_key(settings)}".encode())
+    h.update(img.tobytes())
+    return "image:" + h.hexdigest()
+
+
+# ============================================================
+# Worker job
+# ============================================================
+def _init_worker() -> None:
+    # One Tesseract thread per process; the pool provides the parallelism
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _rasterize(pdf_path: str, page_number: int, settings: Dict[str, Any]):
+    images = convert_from_path(pdf_path, dpi=settings["dpi"], grayscale=settings["grayscale"],
+                               first_page=page_number + 1, last_page=page_number + 1)
+    for extra in images[1:]:
+        extra.close()
+    return images[0] if images else None
+
+
+def ocr_page_job(pdf_path: str, page_number: int, settings: Dict[str, Any],
+                 file_key: Optional[str] = None, cache_path: str = "") -> Dict[str, Any]:
+    """Rasterize and OCR one page (0-based), consulting the image-hash cache first."""
+    result = {"page": page_number + 1, "text": "", "cached": False,
+              "raster_seconds": 0.0, "ocr_seconds": 0.0, "error": None}
+    start = time.perf_counter()
+    img = _rasterize(pdf_path, page_number, settings)
+    result["raster_seconds"] = round(time.perf_counter() - start, 4)
+    if img is None:
+        return result
+    try:
+        image_key = _image_key(img, settings)
+        cached = cache_get(cache_path, image_key)
+        if cached is not None:
+            result.update(text=cached, cached=True)
+            cache_put(cache_path, [file_key] if file_key else [], cached, 0.0)
+            return result
+        start = time.perf_counter()
+        text = ocr_image(image=img, lang=settings["lang"], config=settings["config"])
+        result["ocr_seconds"] = round(time.perf_counter() - start, 4)
+        result["text"] = text
+        cache_put(cache_path, [image_key] + ([file_key] if file_key else []), text, result["ocr_seconds"])
+    finally:
+        img.close()
+    return result
+
+
+# ============================================================
+# Pool
+# ============================================================
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=OCR_WORKERS,
+                    mp_context=multiprocessing.get_context(OCR_START_METHOD),
+                    initializer=_init_worker,
+                )
+    return _pool
+
+
+def shutdown_ocr_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_ocr_pool)
+
+
+def ocr_pdf_pages(pdf_path: str, pages: Sequence[int], profile: Optional[str] = None,
+                  cache_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    OCR the given 0-based `pages` of `pdf_path`, in parallel across the OCR pool.
+    Returns one result per page, in input order:
+    {page (1-based), text, cached, raster_seconds, ocr_seconds, error}.
+    """
+    settings = resolve_profile(profile)
+    cache_path = OCR_CACHE_PATH if cache_path is None else cache_path
+    digest = file_digest(pdf_path) if cache_path else None
+
+    results: Dict[int, Dict[str, Any]] = {}
+    misses = []
+    for page_number in pages:
+        file_key = _file_page_key(digest, page_number, settings) if digest else None
+        cached = cache_get(cache_path, file_key) if file_key else None
+        if cached is not None:
+            results[page_number] = {"page": page_number + 1, "text": cached, "cached": True,
+                                    "raster_seconds": 0.0, "ocr_seconds": 0.0, "error": None}
+        else:
+            misses.append((page_number, file_key))
+
+    parallel = OCR_WORKERS > 1 and len(misses) > 1
+    futures = {}
+    if parallel:
+        pool = _get_pool()
+        futures = {page_number: pool.submit(ocr_page_job, pdf_path, page_number, settings, file_key, cache_path)
+                   for page_number, file_key in misses}
+
+    for page_number, file_key in misses:
+        try:
+            if parallel:
+                try:
+                    results[page_number] = futures[page_number].result()
+                    continue
+                except Exception as e:
+                    # A crashed worker only costs this page the pool; retry it here
+                    logger.warning("OCR worker failed on page %d: %s; retrying in-process", page_number + 1, e)
+            results[page_number] = ocr_page_job(pdf_path, page_number, settings, file_key, cache_path)
+        except Exception as e:
+            logger.warning("OCR failed for page %d: %s", page_number + 1, e)
+            results[page_number] = {"page": page_number + 1, "text": "", "cached": False,
+                                    "raster_seconds": 0.0, "ocr_seconds": 0.0, "error": str(e)}
+
+    ordered = [results[p] for p in pages]
+    for r in ordered:
+        logger.info("OCR page %d: raster %.2fs, ocr %.2fs%s", r["page"], r["raster_seconds"],
+                    r["ocr_seconds"], " (cached)" if r["cached"] else "")
+    return ordered
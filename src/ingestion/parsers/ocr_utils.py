@@ -7,19 +7,22 @@ except Exception:
     raise RuntimeError("Pillow is required for OCR image handling. Install pillow.")
 import pytesseract
 
-def ocr_image(image_path: Optional[str] = None, image_bytes: Optional[bytes] = None) -> str:
+def ocr_image(image_path: Optional[str] = None, image_bytes: Optional[bytes] = None,
+              image: Optional["Image.Image"] = None, lang: str = "eng", config: str = "") -> str:
     """
-    Run Tesseract OCR on an image file or image bytes.
+    Run Tesseract OCR on an image file, image bytes or an in-memory PIL image.
     Returns extracted unicode text.
     """
-    if not image_path and not image_bytes:
+    if not image_path and not image_bytes and image is None:
         return ""
 
-    if image_path:
+    if image is not None:
+        img = image
+    elif image_path:
         img = Image.open(image_path)
     else:
         assert image_bytes is not None, "image_bytes must be provided when image_path is not set"
         img = Image.open(io.BytesIO(image_bytes))
 
-    text = pytesseract.image_to_string(img, lang='eng')  # lang can be adjusted
+    text = pytesseract.image_to_string(img, lang=lang, config=config)
     return text or ""
@@ -1,21 +1,34 @@
 # src/ingestion/parsers/pdf_parser.py
 import os
+import time
+import atexit
 import uuid
 import tempfile
-from typing import Dict, List, Any
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from pdfminer.high_level import extract_pages
 from pdfminer.layout import LTTextContainer, LAParams, LTImage
+from pdfminer.pdfpage import PDFPage
 from ..utils import normalize_metadata, detect_language, section_splitter
-from .ocr_utils import ocr_image
-from pdf2image import convert_from_path
+from .ocr_pool import ocr_pdf_pages, resolve_profile
 import logging
 from src.ingestion.utils import split_sentences_with_offsets
+from src.observability import span, traced, set_attributes
+
+logger = logging.getLogger(__name__)
+
+# Streaming mode: page ranges are extracted in worker processes, results consumed in order
+PDF_STREAMING = os.environ.get("DF_PDF_STREAMING", "true").lower() == "true"
+PDF_WORKERS = int(os.environ.get("DF_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.environ.get("DF_PDF_PAGES_PER_TASK", 16))
+PDF_START_METHOD = os.environ.get("DF_PDF_START_METHOD", "spawn")
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
 
-# Configure logging for debugging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
 
 def _extract_images_from_page(page_layout, out_dir: str, page_number: int) -> List[Dict[str, Any]]:
     images_meta: List[Dict[str, Any]] = []
@@ -26,33 +39,29 @@ def _extract_images_from_page(page_layout, out_dir: str, page_number: int) -> Li
                 image_bytes = obj.stream.get_rawdata()
                 if not image_bytes:
                     continue
+                # The document's image directory is only created once an image turns up
+                os.makedirs(out_dir, exist_ok=True)
                 filename = f"img_{uuid.uuid4().hex}_{page_number+1}_{obj_index}.png"
                 path = os.path.join(out_dir, filename)
                 with open(path, "wb") as f:
                     f.write(image_bytes)
                 images_meta.append({"page": page_number + 1, "path": path})
             except Exception as e:
-                logging.warning(f"Failed to extract image on page {page_number+1}: {e}")
+                logger.warning(f"Failed to extract image on page {page_number+1}: {e}")
     return images_meta
 
 
-def parse_pdf(path: str, ocr_if_no_text: bool = True) -> Dict[str, Any]:
+def _extract_page_range(path: str, images_dir: str, first: int = 0,
+                        last: Optional[int] = None) -> List[Tuple[int, str, List[Dict[str, Any]]]]:
     """
-    Parse a PDF using pdfminer.six + optional OCR fallback.
-    Returns dict with {doc_id, sections, metadata, raw_text, images, file_path}.
+    (page number, text, images) for pages first..last-1 (0-based; every page when `last` is None).
+    Only one page layout is alive at a time; runs in a worker process in streaming mode.
     """
-    if not os.path.exists(path):
-        logging.error(f"PDF file not found: {path}")
-        return {}
-
-    doc_id = uuid.uuid4().hex
-    pages_text = []
-    out_images = []
-    empty_pages_idx = []
-
-    # Extract text per page
+    pages = []
     laparams = LAParams()
-    for page_number, page_layout in enumerate(extract_pages(path, laparams=laparams)):
+    page_numbers = range(first, last) if last is not None else None
+    for offset, page_layout in enumerate(extract_pages(path, laparams=laparams, page_numbers=page_numbers)):
+        page_number = first + offset
         page_text = ""
         try:
             for element in page_layout:
@@ -60,45 +69,126 @@ def parse_pdf(path: str, ocr_if_no_text: bool = True) -> Dict[str, Any]:
                     page_text += element.get_text()
             page_text = page_text.strip()
         except Exception as e:
-            logging.warning(f"Text extraction failed on page {page_number+1}: {e}")
+            logger.warning(f"Text extraction failed on page {page_number+1}: {e}")
             page_text = ""
 
-        if not page_text:
-            empty_pages_idx.append(page_number)
-            pages_text.append("")
-        else:
-            pages_text.append(page_text)
-
         # Attempt image extraction
         try:
-            tmpdir = tempfile.mkdtemp(prefix="df_imgs_")
-            imgs = _extract_images_from_page(page_layout, tmpdir, page_number)
-            if imgs:
-                out_images.extend(imgs)
+            imgs = _extract_images_from_page(page_layout, images_dir, page_number)
         except Exception as e:
-            logging.warning(f"Image extraction failed on page {page_number+1}: {e}")
+            logger.warning(f"Image extraction failed on page {page_number+1}: {e}")
+            imgs = []
+        pages.append((page_number, page_text, imgs))
+    return pages
 
-    # OCR fallback for empty pages
-    if ocr_if_no_text and empty_pages_idx:
-        logging.info(f"Running OCR on {len(empty_pages_idx)} empty pages")
+
+def _count_pages(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                _page_pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context(PDF_START_METHOD),
+                )
+    return _page_pool
+
+
+def _shutdown_page_pool() -> None:
+    if _page_pool is not None:
+        _page_pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_shutdown_page_pool)
+
+
+def _iter_pages(path: str, images_dir: str, streaming: bool) -> Iterator[Tuple[int, str, List[Dict[str, Any]]]]:
+    """Pages in order, extracted in parallel page ranges when streaming."""
+    num_pages = _count_pages(path) if streaming else 0
+    if not streaming or PDF_WORKERS <= 1 or num_pages <= PDF_PAGES_PER_TASK:
+        yield from _extract_page_range(path, images_dir)
+        return
+
+    ranges = [(first, min(first + PDF_PAGES_PER_TASK, num_pages))
+              for first in range(0, num_pages, PDF_PAGES_PER_TASK)]
+    pool = _get_page_pool()
+    # At most 2 ranges per worker in flight, so finished ranges are not buffered unboundedly
+    window = 2 * PDF_WORKERS
+    pending = deque()
+
+    def _result(future, first, last):
         try:
-            pdf_images = convert_from_path(path, dpi=300)
+            return future.result()
         except Exception as e:
-            logging.error(f"Failed to convert PDF to images for OCR: {e}")
-            pdf_images = []
+            # A dead worker must not lose the document: redo the range in this process
+            logger.warning(f"Page worker failed on pages {first+1}-{last}: {e}; extracting in-process")
+            return _extract_page_range(path, images_dir, first, last)
 
-        for idx in empty_pages_idx:
-            if idx >= len(pdf_images):
-                continue
-            img = pdf_images[idx]
+    for first, last in ranges:
+        pending.append((pool.submit(_extract_page_range, path, images_dir, first, last), first, last))
+        if len(pending) >= window:
+            yield from _result(*pending.popleft())
+    while pending:
+        yield from _result(*pending.popleft())
+
+
+@traced("parse_pdf")
+def parse_pdf(path: str, ocr_if_no_text: bool = True, streaming: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Parse a PDF using pdfminer.six + optional OCR fallback.
+    Returns dict with {doc_id, sections, metadata, raw_text, images, file_path}.
+
+    With `streaming` (default: DF_PDF_STREAMING) page ranges are extracted in
+    parallel worker processes. Either way only the pages without a text layer
+    are rasterized for OCR, in parallel across the OCR pool (see ocr_pool).
+    """
+    if not os.path.exists(path):
+        logger.error(f"PDF file not found: {path}")
+        return {}
+    if streaming is None:
+        streaming = PDF_STREAMING
+    set_attributes(bytes=os.path.getsize(path), streaming=streaming)
+
+    doc_id = uuid.uuid4().hex
+    pages_text = []
+    out_images = []
+    empty_pages_idx = []
+    images_dir = os.path.join(tempfile.gettempdir(), f"df_imgs_{doc_id}")
+
+    # Extract text per page
+    with span("pdf.extract_pages") as sp:
+        for page_number, page_text, imgs in _iter_pages(path, images_dir, streaming):
+            if not page_text:
+                empty_pages_idx.append(page_number)
+            pages_text.append(page_text)
+            out_images.extend(imgs)
+        sp.set_attributes(pages=len(pages_text), empty_pages=len(empty_pages_idx), images=len(out_images))
+
+    # OCR fallback for empty pages
+    ocr_report = None
+    if ocr_if_no_text and empty_pages_idx:
+        logger.info(f"Running OCR on {len(empty_pages_idx)} empty pages")
+        start = time.perf_counter()
+        with span("pdf.ocr", pages=len(empty_pages_idx)) as sp:
             try:
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_img:
-                    img.save(tmp_img.name, format="PNG")
-                    ocr_text = ocr_image(image_bytes=open(tmp_img.name, "rb").read())
-                    pages_text[idx] = ocr_text
-                    out_images.append({"page": idx + 1, "path": tmp_img.name})
+                ocr_results = ocr_pdf_pages(path, empty_pages_idx)
             except Exception as e:
-                logging.warning(f"OCR failed for page {idx+1}: {e}")
+                logger.error(f"OCR failed for {path}: {e}")
+                ocr_results = []
+            sp.set_attribute("cached_pages", sum(1 for res in ocr_results if res["cached"]))
+        for idx, res in zip(empty_pages_idx, ocr_results):
+            pages_text[idx] = res["text"]
+        ocr_report = {
+            "profile": resolve_profile()["name"],
+            "pages": [{k: v for k, v in res.items() if k != "text"} for res in ocr_results],
+            "cached_pages": sum(1 for res in ocr_results if res["cached"]),
+            "total_seconds": round(time.perf_counter() - start, 4),
+        }
 
     raw_text = "\n\n".join([p for p in pages_text if p])
     user_file_sentences = split_sentences_with_offsets(raw_text)
@@ -106,12 +196,17 @@ def parse_pdf(path: str, ocr_if_no_text: bool = True) -> Dict[str, Any]:
     # Section splitting
     sections = section_splitter(raw_text, pages_text)
 
+    set_attributes(pages=len(pages_text), chars=len(raw_text), sentences=len(user_file_sentences),
+                   sections=len(sections))
+
     # Language detection
     metadata = {
         "file_type": "pdf",
         "num_pages": len(pages_text),
         "language": detect_language(raw_text)
     }
+    if ocr_report is not None:
+        metadata["ocr"] = ocr_report
 
     # Save raw text to a .txt file
     UPLOAD_DIR = os.environ.get("DF_UPLOAD_DIR", "uploads")
@@ -2,12 +2,14 @@
 from typing import Dict, Any, List
 import uuid
 from ..utils import normalize_metadata, detect_language, section_splitter
+from src.observability import traced, set_attributes
 import os
 from datetime import datetime
 
 UPLOAD_DIR = os.environ.get("DF_UPLOAD_DIR", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+@traced("parse_text_string")
 def parse_text_string(text: str) -> Dict[str, Any]:
     """
     Parse a plain text string into normalized JSON and save as a .txt file
@@ -21,6 +23,7 @@ def parse_text_string(text: str) -> Dict[str, Any]:
         f.write(raw_text)
 
     sections = section_splitter(raw_text, [raw_text])
+    set_attributes(chars=len(raw_text), sections=len(sections))
 
     metadata = {
         "file_type": "plain_text",
@@ -38,6 +41,7 @@ def parse_text_string(text: str) -> Dict[str, Any]:
         "file_path": file_path,  # include file path for downstream use
     }
 
+@traced("parse_text_file")
 def parse_text_file(path: str) -> Dict[str, Any]:
     """
     Parse a plain text file into normalized JSON.
@@ -59,6 +63,7 @@ def parse_text_file(path: str) -> Dict[str, Any]:
     }
 
     sections = section_splitter(raw_text, [raw_text])
+    set_attributes(chars=len(raw_text), sections=len(sections))
 
     return {
         "doc_id": doc_id,
@@ -1,6 +1,10 @@
 # src/ingestion/utils.py
 import re
-from typing import List, Dict, Any, Tuple
+import difflib
+import hashlib
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from ahocorasick import Automaton
 from langdetect import detect, DetectorFactory
 DetectorFactory.seed = 0
 import numpy as np
@@ -93,23 +97,64 @@ def top_k_sentence_pairs(
     if emb_a.size == 0 or emb_b.size == 0:
         return []
 
-    # cosine similarity matrix (N x M)
-    sim_matrix = np.dot(emb_a, emb_b.T)
+    # cosine similarity matrix (N x M), flattened once
+    flat = np.dot(emb_a, emb_b.T).ravel()
+    num_cols = emb_b.shape[0]
+    top_k = min(top_k, flat.size)
 
-    # flatten and pick top-k
-    flat_idx = np.argpartition(sim_matrix.flatten(), -top_k)[-top_k:]
-    flat_idx = flat_idx[np.argsort(sim_matrix.flatten()[flat_idx])[::-1]]
+    flat_idx = np.argpartition(flat, -top_k)[-top_k:]
+    flat_idx = flat_idx[np.argsort(flat[flat_idx])[::-1]]
 
-    results = []
-    num_cols = sim_matrix.shape[1]
+    return [(int(idx // num_cols), int(idx % num_cols), float(flat[idx])) for idx in flat_idx]
 
-    for idx in flat_idx:
-        i = idx // num_cols
-        j = idx % num_cols
-        score = sim_matrix[i, j]
-        results.append((i, j, float(score)))
 
-    return results
+def top_k_per_row(
+    emb_a: np.ndarray,
+    emb_b: np.ndarray,
+    top_k: int = 3,
+    row_chunk: int = 1024,
+    col_chunk: int = 8192
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For every row of emb_a, the top-k most similar rows of emb_b (dot product).
+
+    emb_a: (N, D), emb_b: (M, D), both normalized for cosine similarity.
+    Returns (indices, scores), each (N, k) with k = min(top_k, M), sorted by
+    score descending per row. The similarity matrix is computed in
+    row_chunk x col_chunk tiles, so peak memory does not grow with N * M.
+    """
+    n, m = emb_a.shape[0], emb_b.shape[0]
+    k = min(top_k, m)
+    indices = np.zeros((n, k), dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if n == 0 or k <= 0:
+        return indices, scores
+
+    emb_a = np.asarray(emb_a, dtype=np.float32)
+    emb_b = np.asarray(emb_b, dtype=np.float32)
+
+    for r0 in range(0, n, row_chunk):
+        rows = emb_a[r0:r0 + row_chunk]
+        best_idx = np.zeros((len(rows), 0), dtype=np.int64)
+        best_val = np.zeros((len(rows), 0), dtype=np.float32)
+        for c0 in range(0, m, col_chunk):
+            sims = rows @ emb_b[c0:c0 + col_chunk].T
+            kk = min(k, sims.shape[1])
+            # Top-kk of this tile along the source axis, then merged with the running best
+            part = np.argpartition(sims, sims.shape[1] - kk, axis=1)[:, -kk:]
+            cand_idx = np.concatenate([best_idx, part + c0], axis=1)
+            cand_val = np.concatenate([best_val, np.take_along_axis(sims, part, axis=1)], axis=1)
+            if cand_idx.shape[1] > k:
+                keep = np.argpartition(cand_val, cand_val.shape[1] - k, axis=1)[:, -k:]
+                cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+                cand_val = np.take_along_axis(cand_val, keep, axis=1)
+            best_idx, best_val = cand_idx, cand_val
+
+        order = np.argsort(-best_val, axis=1, kind="stable")
+        indices[r0:r0 + len(rows)] = np.take_along_axis(best_idx, order, axis=1)
+        scores[r0:r0 + len(rows)] = np.take_along_axis(best_val, order, axis=1)
+
+    return indices, scores
 
 # --------------------------
 # Sentence Splitter for Module 3
@@ -177,3 +222,153 @@ def normalize_text(text: str) -> str:
     text = text.replace("\xa0", " ")
     text = re.sub(r"\s+", " ", text)      # collapse multiple spaces
     return text.strip()
+
+
+# --------------------------
+# Per-document sentence offset index
+# --------------------------
+
+class SentenceOffsetIndex:
+    """
+    Resolves evidence sentences to offsets in the user document, built once per document.
+
+    - find():       first occurrence in the text (same result as find_sentence_offsets_in_text)
+    - containing(): first user sentence that contains the sentence
+    - fuzzy():      first user sentence whose difflib ratio exceeds a threshold; only
+                    user sentences sharing the most character shingles are verified
+
+    Batch variants resolve all unseen sentences with one Aho-Corasick pass, and
+    every result is memoized, so sentences repeated across sources cost O(1).
+    """
+
+    def __init__(self, text: str = "", sentences: Optional[List[Dict[str, Any]]] = None,
+                 shingle_size: int = 3, max_candidates: int = 20):
+        self.text = text or ""
+        self.sentences = sentences if sentences is not None else split_sentences_with_offsets(self.text)
+        self.shingle_size = max(1, shingle_size)
+        self.max_candidates = max(1, max_candidates)
+        self._found: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        self._containing: Dict[str, Optional[Dict[str, int]]] = {}
+        self._fuzzy: Dict[Tuple[str, float], Dict[str, int]] = {}
+        self._shingle_index: Optional[Dict[str, List[int]]] = None
+        self._fingerprint: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def fingerprint(self) -> str:
+        """Stable key for this document's sentences (used to cache the index in worker processes)."""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for u in self.sentences:
+                digest.update(f"{u.get('start')}:{u.get('end')}:{u['sentence']}\x00".encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def __getstate__(self):
+        # Only the document is needed to rebuild the index (e.g. in a worker process)
+        state = self.__dict__.copy()
+        state["_shingle_index"] = None
+        return state
+
+    @staticmethod
+    def _first_hits(patterns: Iterable[str], texts: List[str]) -> Dict[str, Tuple[int, int]]:
+        """{pattern: (index of first text containing it, start offset in that text)}."""
+        automaton = Automaton()
+        for p in patterns:
+            automaton.add_word(p, p)
+        hits: Dict[str, Tuple[int, int]] = {}
+        if not len(automaton):
+            return hits
+        automaton.make_automaton()
+        for i, text in enumerate(texts):
+            for end, p in automaton.iter(text):
+                if p not in hits:
+                    hits[p] = (i, end - len(p) + 1)
+        return hits
+
+    # Exact occurrence in the full text
+    def find_many(self, sentences: Iterable[str]) -> List[Tuple[Optional[int], Optional[int]]]:
+        sentences = list(sentences)
+        pending = {s for s in sentences if s and s not in self._found}
+        if pending:
+            hits = self._first_hits(pending, [self.text])
+            for s in pending:
+                start = hits[s][1] if s in hits else None
+                self._found[s] = (start, start + len(s)) if start is not None else (None, None)
+        return [self._found[s] if s else (0, 0) for s in sentences]
+
+    def find(self, sentence: str) -> Tuple[Optional[int], Optional[int]]:
+        return self.find_many([sentence])[0]
+
+    # Containment in a user sentence
+    def containing_many(self, sentences: Iterable[str]) -> List[Optional[Dict[str, int]]]:
+        sentences = list(sentences)
+        pending = {s for s in sentences if s and s not in self._containing}
+        if pending:
+            hits = self._first_hits(pending, [u["sentence"] for u in self.sentences])
+            for s in pending:
+                u = self.sentences[hits[s][0]] if s in hits else None
+                self._containing[s] = {"start": u["start"], "end": u["end"]} if u else None
+        results = []
+        for s in sentences:
+            if s:
+                found = self._containing[s]
+                results.append(dict(found) if found else None)
+            elif self.sentences:
+                results.append({"start": self.sentences[0]["start"], "end": self.sentences[0]["end"]})
+            else:
+                results.append(None)
+        return results
+
+    def containing(self, sentence: str) -> Optional[Dict[str, int]]:
+        return self.containing_many([sentence])[0]
+
+    # Fuzzy (difflib) match against user sentences
+    def _shingles(self, text: str) -> set:
+        n = self.shingle_size
+        if len(text) <= n:
+            return {text}
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def _shingles_index(self) -> Dict[str, List[int]]:
+        if self._shingle_index is None:
+            index: Dict[str, List[int]] = {}
+            for i, u in enumerate(self.sentences):
+                for sh in self._shingles(u["sentence"]):
+                    index.setdefault(sh, []).append(i)
+            self._shingle_index = index
+        return self._shingle_index
+
+    def _candidates(self, sentence: str) -> List[int]:
+        if len(sentence) < 2 * self.shingle_size:
+            # Too few shingles to rank on; the length bound in fuzzy() prunes most of these
+            return list(range(len(self.sentences)))
+        index = self._shingles_index()
+        # Shingles found in most sentences carry no signal and dominate the cost
+        max_df = max(50, len(self.sentences) // 4)
+        counts: Counter = Counter()
+        for sh in self._shingles(sentence):
+            postings = index.get(sh)
+            if postings and len(postings) <= max_df:
+                counts.update(postings)
+        return sorted(i for i, _ in counts.most_common(self.max_candidates))
+
+    def fuzzy(self, sentence: str, threshold: float = 0.7) -> Dict[str, int]:
+        key = (sentence, threshold)
+        found = self._fuzzy.get(key)
+        if found is not None:
+            return dict(found)
+        found = {"start": -1, "end": -1}
+        # Candidates are verified in document order, so the earliest close sentence wins
+        for i in self._candidates(sentence):
+            u = self.sentences[i]
+            seq = difflib.SequenceMatcher(None, sentence, u["sentence"])
+            if seq.real_quick_ratio() > threshold and seq.quick_ratio() > threshold and seq.ratio() > threshold:
+                found = {"start": u["start"], "end": u["end"]}
+                break
+        self._fuzzy[key] = found
+        return dict(found)
+
+    def fuzzy_many(self, sentences: Iterable[str], threshold: float = 0.7) -> List[Dict[str, int]]:
+        return [self.fuzzy(s, threshold) for s in sentences]
@@ -31,6 +31,9 @@ class Module3Item(BaseModel):
     plagiarism_score: Optional[float] = Field(None, ge=0.0, le=1.0)
     semantic_similarity: Optional[float] = Field(None, ge=0.0, le=1.0)
     source_url: Optional[str] = None
+    # corpus matches point at a prior submission instead of a URL
+    source_doc_id: Optional[str] = None
+    source_section: Optional[str] = None
 
     # REQUIRED — so the raw module3 output remains valid
     # highlights: Optional[List[Highlight]] = None
@@ -59,6 +62,8 @@ class Module3Input(BaseModel):
 class CleanedSource(BaseModel):
     source_text: Optional[str] = None
     source_url: Optional[str] = None
+    source_doc_id: Optional[str] = None
+    source_section: Optional[str] = None
     plagiarism_score: Optional[float] = Field(None, ge=0.0, le=1.0)
     semantic_similarity: Optional[float] = Field(None, ge=0.0, le=1.0)
     score: float
@@ -0,0 +1,11 @@
+# src/observability/__init__.py
+from .tracing import (
+    span, traced, current_span, set_attributes, set_exporters, flush,
+    Span, Trace, JsonExporter, OTLPExporter, to_otlp,
+)
+from .log_config import configure_logging
+
+__all__ = [
+    "span", "traced", "current_span", "set_attributes", "set_exporters", "flush",
+    "Span", "Trace", "JsonExporter", "OTLPExporter", "to_otlp", "configure_logging",
+]
@@ -0,0 +1,21 @@
+# src/observability/log_config.py
+"""
+Logging setup for entry points (API app, CLIs). Library modules only create
+their `logging.getLogger(__name__)` and never configure handlers at import.
+
+    DF_LOG_LEVEL   root log level (default INFO)
+"""
+import logging
+import os
+from typing import Optional, Union
+
+LOG_LEVEL = os.environ.get("DF_LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+
+def configure_logging(level: Optional[Union[int, str]] = None) -> None:
+    """Install a root handler once; a no-op if the host (e.g. uvicorn, pytest) already did."""
+    level = level or LOG_LEVEL
+    if isinstance(level, str):
+        level = level.upper()
+    logging.basicConfig(level=level, format=LOG_FORMAT)
@@ -0,0 +1,328 @@
+# src/observability/metrics.py
+"""
+Prometheus metrics without a client dependency.
+
+Counter / Gauge / Histogram with labels, rendered in the Prometheus text
+exposition format (0.0.4) by `REGISTRY.render()`. Values that already live
+elsewhere (cache stats, executor queues) are read at scrape time through
+`REGISTRY.register_collector()` instead of being mirrored into gauges.
+
+Metrics are per process: run one scrape target per uvicorn worker.
+"""
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+# (name, type, help, [(labels, value)]) as produced by collectors
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROVIDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def labels(self, **labels: str):
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels(...)")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_dict(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        family = self.name + ("_total" if self.kind == "counter" else "")
+        lines = [f"# HELP {family} {self.documentation}", f"# TYPE {family} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(self._label_dict(key), child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    # Declared without the _total suffix; the exposition adds it
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def _render_child(self, labels, child) -> List[str]:
+        return [f"{self.name}_total{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def _render_child(self, labels, child) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            for i, bound in enumerate(self.upper_bounds):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets)) + (math.inf,)
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, labels, child) -> List[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds, counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le=_format_value(bound)))} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """`collector()` is called on every scrape and returns (name, type, help, samples) families."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", getattr(collector, "__name__", collector), e)
+                continue
+            for name, kind, documentation, samples in families:
+                family = name + ("_total" if kind == "counter" else "")
+                lines.append(f"# HELP {family} {documentation}")
+                lines.append(f"# TYPE {family} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{family}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ============================================================
+# Shared metrics
+# ============================================================
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "df_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "df_http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+
+PROVIDER_REQUEST_SECONDS = REGISTRY.histogram(
+    "df_provider_request_duration_seconds", "Latency of external search API calls, per attempt.",
+    ("provider",), buckets=PROVIDER_BUCKETS)
+PROVIDER_REQUESTS = REGISTRY.counter(
+    "df_provider_requests", "External search API calls by outcome (HTTP status, or error kind).",
+    ("provider", "outcome"))
+PROVIDER_ERRORS = REGISTRY.counter(
+    "df_provider_errors", "External search API calls that failed (non-200 or transport error).",
+    ("provider",))
+
+EMBEDDING_BATCH_SIZE = REGISTRY.histogram(
+    "df_embedding_batch_texts", "Texts sent to the embedding model per encode call.",
+    ("model",), buckets=BATCH_SIZE_BUCKETS)
+EMBEDDING_BATCH_SECONDS = REGISTRY.histogram(
+    "df_embedding_batch_duration_seconds", "Embedding model encode time per call.", ("model",))
+EMBEDDING_TEXTS = REGISTRY.counter(
+    "df_embedding_texts_encoded", "Texts encoded by the embedding model (cache misses).", ("model",))
+
+
+def observe_provider_call(provider: str, seconds: float, outcome) -> None:
+    """Record one external API attempt; `outcome` is an HTTP status or an error kind ("timeout", ...)."""
+    outcome = str(outcome)
+    PROVIDER_REQUEST_SECONDS.labels(provider=provider).observe(seconds)
+    PROVIDER_REQUESTS.labels(provider=provider, outcome=outcome).inc()
+    if outcome != "200":
+        PROVIDER_ERRORS.labels(provider=provider).inc()
+
+
+class _ProviderCall:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = None
+
+
+@contextmanager
+def provider_call(provider: str) -> Iterator[_ProviderCall]:
+    """
+    Time one external API attempt. Set `call.status` to the HTTP status inside
+    the block; exceptions are recorded as "timeout" or "error" and re-raised.
+    """
+    call = _ProviderCall()
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        timeout = isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+        observe_provider_call(provider, time.perf_counter() - start, "timeout" if timeout else "error")
+        raise
+    observe_provider_call(provider, time.perf_counter() - start,
+                          call.status if call.status is not None else "error")
+
+
+def observe_embedding_batch(model: str, texts: int, seconds: float) -> None:
+    EMBEDDING_BATCH_SIZE.labels(model=model).observe(texts)
+    EMBEDDING_BATCH_SECONDS.labels(model=model).observe(seconds)
+    EMBEDDING_TEXTS.labels(model=model).inc(texts)
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
+
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
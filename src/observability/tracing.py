@@ -0,0 +1,369 @@
+# src/observability/tracing.py
+"""
+Lightweight stage tracing for Modules 1-3.
+
+    with span("module3.fetch", urls=len(urls)) as sp:
+        ...
+        sp.set_attribute("fetched", n)
+
+    @traced("call_perplexity")
+    async def call_perplexity_async(...): ...
+
+Spans nest through a context variable, so they follow asyncio tasks and
+threads started with a copied context (asyncio.to_thread, ApiExecutor).
+Every span records wall time, the CPU time of its thread while it was open
+(on the event loop that includes other coroutines interleaved with it) and
+free-form attributes (url, block_id, bytes, sentence counts, ...).
+
+When the outermost span of a trace ends, the trace is handed to the
+configured exporters on a background thread:
+
+    DF_TRACE_ENABLED        "false" turns every span into a no-op (default true)
+    DF_TRACE_EXPORTERS      comma list of "json", "otlp" (default none)
+    DF_TRACE_JSON_PATH      JSON-lines file for the json exporter (.cache/traces.jsonl)
+    DF_TRACE_OTLP_ENDPOINT  OTLP/HTTP JSON endpoint (http://localhost:4318/v1/traces)
+    DF_TRACE_SERVICE_NAME   service.name resource attribute (df-project)
+    DF_TRACE_MAX_SPANS      spans kept per trace; the rest are only counted (10000)
+
+`Trace.summary()` aggregates a trace per span name for embedding in API
+responses.
+"""
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENABLED = os.environ.get("DF_TRACE_ENABLED", "true").lower() == "true"
+TRACE_EXPORTERS = os.environ.get("DF_TRACE_EXPORTERS", "")
+TRACE_JSON_PATH = os.environ.get("DF_TRACE_JSON_PATH", os.path.join(".cache", "traces.jsonl"))
+TRACE_OTLP_ENDPOINT = os.environ.get("DF_TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.environ.get("DF_TRACE_SERVICE_NAME", "df-project")
+TRACE_MAX_SPANS = int(os.environ.get("DF_TRACE_MAX_SPANS", 10000))
+
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("df_current_span", default=None)
+
+
+# ============================================================
+# Spans and traces
+# ============================================================
+class Trace:
+    """Finished spans of one trace, collected until its root span ends."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _add(self, span: "Span") -> None:
+        with self._lock:
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-name totals: {trace_id, spans, dropped, total_seconds, stages: {name: {...}}}."""
+        with self._lock:
+            spans = list(self.spans)
+        stages: Dict[str, Dict[str, Any]] = {}
+        for s in spans:
+            agg = stages.setdefault(s.name, {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                                             "max_seconds": 0.0, "errors": 0})
+            agg["count"] += 1
+            agg["wall_seconds"] += s.wall_seconds
+            agg["cpu_seconds"] += s.cpu_seconds
+            agg["max_seconds"] = max(agg["max_seconds"], s.wall_seconds)
+            agg["errors"] += s.status == "error"
+        for agg in stages.values():
+            for key in ("wall_seconds", "cpu_seconds", "max_seconds"):
+                agg[key] = round(agg[key], 6)
+        roots = [s for s in spans if s.parent_id is None]
+        return {
+            "trace_id": self.trace_id,
+            "spans": len(spans),
+            "dropped": self.dropped,
+            "total_seconds": round(sum(s.wall_seconds for s in roots), 6),
+            "stages": dict(sorted(stages.items(), key=lambda kv: -kv[1]["wall_seconds"])),
+        }
+
+
+class Span:
+    __slots__ = ("name", "trace", "span_id", "parent_id", "attributes", "start_ns", "end_ns",
+                 "wall_seconds", "cpu_seconds", "status", "error", "_wall_start", "_cpu_start")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace = parent.trace if parent is not None else Trace(f"{random.getrandbits(128):032x}")
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_id is None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = max(0.0, time.thread_time() - self._cpu_start)
+        self.end_ns = self.start_ns + int(self.wall_seconds * 1e9)
+        self.trace._add(self)
+        if self.is_root:
+            _export(self.trace)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or nothing is being traced."""
+    name = trace_id = span_id = parent_id = error = None
+    trace = None
+    attributes: Dict[str, Any] = {}
+    status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Open a child of the current span (or a new trace) for the body of the block."""
+    if not TRACE_ENABLED:
+        yield NOOP_SPAN
+        return
+    s = Span(name, _current.get(), attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """Decorator: run every call of a sync or async function inside span(name)."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Annotate the current span, if any."""
+    s = _current.get()
+    if s is not None:
+        s.attributes.update(attributes)
+
+
+# ============================================================
+# Exporters
+# ============================================================
+class JsonExporter:
+    """Appends one JSON line per finished trace: {trace_id, summary, spans}."""
+
+    def __init__(self, path: str = TRACE_JSON_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        record = {"trace_id": trace.trace_id, "summary": trace.summary(),
+                  "spans": [s.to_dict() for s in trace.spans]}
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = TRACE_SERVICE_NAME) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for `spans` (as accepted by an OTel collector)."""
+    out = []
+    for s in spans:
+        attributes = dict(s.attributes, **{"cpu.seconds": round(s.cpu_seconds, 6)})
+        item = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None],
+            "status": {"code": 2, "message": s.error} if s.status == "error" else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        out.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": out}],
+    }]}
+
+
+class OTLPExporter:
+    """POSTs each trace to an OpenTelemetry collector over OTLP/HTTP (JSON encoding)."""
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, service_name: str = TRACE_SERVICE_NAME,
+                 timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, trace: Trace) -> None:
+        import requests
+        resp = requests.post(self.endpoint, json=to_otlp(trace.spans, self.service_name), timeout=self.timeout)
+        if resp.status_code >= 300:
+            logger.warning("OTLP export to %s returned %s: %s", self.endpoint, resp.status_code, resp.text[:200])
+
+
+_EXPORTER_TYPES = {"json": JsonExporter, "otlp": OTLPExporter}
+_exporters: Optional[List[Any]] = None
+_queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=1000)
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def _configured_exporters() -> List[Any]:
+    exporters = []
+    for name in filter(None, (n.strip().lower() for n in TRACE_EXPORTERS.split(","))):
+        if name in _EXPORTER_TYPES:
+            exporters.append(_EXPORTER_TYPES[name]())
+        else:
+            logger.warning("Unknown trace exporter %r; expected one of %s", name, sorted(_EXPORTER_TYPES))
+    return exporters
+
+
+def set_exporters(exporters: List[Any]) -> None:
+    """Replace the exporters (default: built from DF_TRACE_EXPORTERS on first use)."""
+    global _exporters
+    _exporters = list(exporters)
+
+
+def _export_loop() -> None:
+    while True:
+        trace = _queue.get()
+        try:
+            if trace is None:
+                return
+            for exporter in _exporters or ():
+                try:
+                    exporter.export(trace)
+                except Exception as e:
+                    logger.warning("Trace export via %s failed: %s", type(exporter).__name__, e)
+        finally:
+            _queue.task_done()
+
+
+def _export(trace: Trace) -> None:
+    global _exporters, _thread
+    if _exporters is None:
+        _exporters = _configured_exporters()
+    if not _exporters:
+        return
+    if _thread is None or not _thread.is_alive():
+        with _thread_lock:
+            if _thread is None or not _thread.is_alive():
+                _thread = threading.Thread(target=_export_loop, name="trace-export", daemon=True)
+                _thread.start()
+    try:
+        _queue.put_nowait(trace)
+    except queue.Full:
+        logger.warning("Trace export queue full; dropping trace %s", trace.trace_id)
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until queued traces are exported; False if `timeout` passed first."""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if time.monotonic() >= deadline or _thread is None or not _thread.is_alive():
+            return False
+        time.sleep(0.01)
+    return True
+
+
+atexit.register(flush)
@@ -45,6 +45,8 @@ def clean_module3_output(items: List[Module3Item]) -> List[Dict[str, Any]]:
             scored_sources.append({
                 "source_text": ev.source_text,
                 "source_url": ev.source_url,
+                "source_doc_id": ev.source_doc_id,
+                "source_section": ev.source_section,
                 # "plagiarism_score": ev.plagiarism_score,
                 # "semantic_similarity": ev.semantic_similarity,
                 "score": round(score, 4),
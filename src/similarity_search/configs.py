@@ -12,12 +12,22 @@ PERPLEXITY_MODEL = os.getenv("PERPLEXITY_MODEL", "sonar")   # sonar / sonar-pro
 PERPLEXITY_TOP_K = int(os.getenv("PERPLEXITY_TOP_K", 10))
 
 
+# Async Module 2: per-provider in-flight cap and request rate (0 = unlimited rate)
+PERPLEXITY_MAX_CONCURRENCY = int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", 4))
+PERPLEXITY_RATE_PER_SEC = float(os.getenv("PERPLEXITY_RATE_PER_SEC", 2.0))
+PERPLEXITY_RATE_BURST = int(os.getenv("PERPLEXITY_RATE_BURST", 2))
+
+
 # ============================================================
 # 🔎 Google Search API (Fallback)
 # ============================================================
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")  # e.g. "44a2f0902c54847e4"
+GOOGLE_CSE_URL = os.getenv("GOOGLE_CSE_URL", "https://www.googleapis.com/customsearch/v1")  # override for local stubs
 GOOGLE_NUM_RESULTS = int(os.getenv("GOOGLE_NUM_RESULTS", 2))
+GOOGLE_MAX_CONCURRENCY = int(os.getenv("GOOGLE_MAX_CONCURRENCY", 2))
+GOOGLE_RATE_PER_SEC = float(os.getenv("GOOGLE_RATE_PER_SEC", 1.0))
+GOOGLE_RATE_BURST = int(os.getenv("GOOGLE_RATE_BURST", 1))
 
 
 # ============================================================
@@ -47,11 +57,42 @@ MAX_WORDS_PER_BLOCK = int(os.getenv("MAX_WORDS_PER_BLOCK", 400))
 # 🧠 Similarity Settings
 # ============================================================
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 50000))  # cached vectors (LRU)
+SEMANTIC_BATCH_PAIRS = int(os.getenv("SEMANTIC_BATCH_PAIRS", 2048))   # pairs per scoring job
 TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", 10))
+SPACY_MODEL_NAME = os.getenv("SPACY_MODEL_NAME", "en_core_web_sm")
+MEANINGFUL_CACHE_SIZE = int(os.getenv("MEANINGFUL_CACHE_SIZE", 100000))  # spaCy meaningfulness verdicts (LRU)
+
+# ============================================================
+# ⚙️ Module 3 execution backends ("thread" / "process")
+# ============================================================
+EXECUTOR_BACKEND = os.getenv("EXECUTOR_BACKEND", "thread").lower()   # default for every stage
+NLP_EXECUTOR_BACKEND = os.getenv("NLP_EXECUTOR_BACKEND", EXECUTOR_BACKEND).lower()          # spaCy
+EMBED_EXECUTOR_BACKEND = os.getenv("EMBED_EXECUTOR_BACKEND", EXECUTOR_BACKEND).lower()      # embeddings
+EXTRACT_EXECUTOR_BACKEND = os.getenv("EXTRACT_EXECUTOR_BACKEND", EXECUTOR_BACKEND).lower()  # trafilatura / pdf
+FUZZY_EXECUTOR_BACKEND = os.getenv("FUZZY_EXECUTOR_BACKEND", EXECUTOR_BACKEND).lower()      # difflib
+EXECUTOR_THREAD_WORKERS = int(os.getenv("EXECUTOR_THREAD_WORKERS", 8))
+EXECUTOR_PROCESS_WORKERS = int(os.getenv("EXECUTOR_PROCESS_WORKERS", os.cpu_count() or 1))  # per process stage
+EXECUTOR_START_METHOD = os.getenv("EXECUTOR_START_METHOD", "spawn")  # avoid forking loaded models/threads
 
 # N-gram settings
 NGRAM_N = int(os.getenv("NGRAM_N", 3))
 
+# Winnowing fingerprints (document-level source matching)
+FINGERPRINT_K = int(os.getenv("FINGERPRINT_K", 25))            # characters per k-gram
+FINGERPRINT_WINDOW = int(os.getenv("FINGERPRINT_WINDOW", 4))   # hashes per winnowing window
+FINGERPRINT_MIN_MATCHES = int(os.getenv("FINGERPRINT_MIN_MATCHES", 3))  # shared fingerprints to report a source
+
+# Local corpus index of prior submissions (IVF over sentence embeddings)
+CORPUS_INDEX_ENABLED = os.getenv("CORPUS_INDEX_ENABLED", "false").lower() == "true"
+CORPUS_INDEX_AUTO_ADD = os.getenv("CORPUS_INDEX_AUTO_ADD", "false").lower() == "true"  # index submissions after Module 1
+CORPUS_INDEX_PATH = os.getenv("CORPUS_INDEX_PATH", os.path.join(".cache", "corpus_index"))
+CORPUS_INDEX_N_PROBE = int(os.getenv("CORPUS_INDEX_N_PROBE", 8))     # IVF lists scanned per query
+CORPUS_DELTA_MAX_SENTENCES = int(os.getenv("CORPUS_DELTA_MAX_SENTENCES", 20000))  # appended sentences before a rebuild
+CORPUS_TOP_K = int(os.getenv("CORPUS_TOP_K", 3))                     # neighbours per sentence
+CORPUS_MATCH_THRESHOLD = float(os.getenv("CORPUS_MATCH_THRESHOLD", 0.85))  # cosine to report a match
+
 # Weight for combining embedding + ngram
 EMBEDDING_SIM_WEIGHT = float(os.getenv("EMBEDDING_SIM_WEIGHT", 0.85))
 
@@ -73,6 +114,28 @@ RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", 1.0))
 USER_AGENT = os.getenv("USER_AGENT", "DF-Project-SimilarityBot/1.0")
 HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0 (DF-Project/1.0)")
 MAX_FETCHED_TEXT_CHARS = int(os.getenv("MAX_FETCHED_TEXT_CHARS", 20000))
+# Raw body cap for streamed downloads; markup is far larger than the extracted text
+MAX_FETCHED_BYTES = int(os.getenv("MAX_FETCHED_BYTES", MAX_FETCHED_TEXT_CHARS * 100))
+FETCH_LIMIT_PER_HOST = int(os.getenv("FETCH_LIMIT_PER_HOST", 4))
+FETCH_KEEPALIVE_SECONDS = float(os.getenv("FETCH_KEEPALIVE_SECONDS", 30))
+
+# ============================================================
+# 🗄️ Fetched source cache (hot in-memory tier + SQLite on disk)
+# ============================================================
+FETCH_CACHE_PATH = os.getenv("FETCH_CACHE_PATH", os.path.join(".cache", "fetch_cache.sqlite3"))  # "" = memory only
+FETCH_CACHE_MAX_BYTES = int(os.getenv("FETCH_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # compressed size on disk
+FETCH_CACHE_TTL_SECONDS = int(os.getenv("FETCH_CACHE_TTL_SECONDS", 7 * 24 * 3600))  # then revalidate (ETag)
+FETCH_CACHE_MAX_AGE_SECONDS = int(os.getenv("FETCH_CACHE_MAX_AGE_SECONDS", 30 * 24 * 3600))  # then purge
+FETCH_CACHE_HOT_ENTRIES = int(os.getenv("FETCH_CACHE_HOT_ENTRIES", 256))
+FETCH_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("FETCH_CACHE_NEGATIVE_TTL_SECONDS", 600))  # failed fetches
+
+# ============================================================
+# 🗃️ Search result cache (Perplexity / Google CSE)
+# ============================================================
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join(".cache", "search_cache.sqlite3"))  # "" = memory only
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 100000))
+SEARCH_CACHE_MODE = os.getenv("SEARCH_CACHE_MODE", "readwrite").lower()  # readwrite / cache_only / off
 
 # Max number of chunks per section to send to Google Advanced Search
 MAX_GOOGLE_CHUNKS = 1  # adjust as needed
@@ -0,0 +1,542 @@
+# src/similarity_search/corpus_index.py
+"""
+Local sentence-embedding index over previously ingested documents.
+
+Catches copying between submissions (and from anything already run
+through Module 1) without going back to web search. Sentences of every
+added document are embedded once and stored in an inverted-file (IVF)
+index built on NumPy:
+
+- spherical k-means centroids partition the normalized vectors into lists
+- vectors are stored contiguously per list, so a list is one slice
+- a query scores only the `n_probe` lists whose centroids are closest
+
+On disk every save() writes a new generation directory (base-NNNNNN/:
+.npy arrays plus a JSON sidecar with the sentence records) and then
+atomically replaces the CURRENT manifest that names it. Readers resolve
+CURRENT once and open everything from that one directory, so they never
+pair vectors of one save with records of another. Arrays are
+memory-mapped on load, so opening a large corpus is instant and pages
+are shared between worker processes. Documents added after the last
+build go to a small brute-force buffer until the next save().
+
+Processed submissions are appended with add_to_corpus_index() when
+CORPUS_INDEX_AUTO_ADD is set. Each one is embedded on its own and written
+as a small delta-NNNNNN/ segment listed in CURRENT; segments are searched
+by brute force next to the IVF lists and folded into a new base once they
+hold more than CORPUS_DELTA_MAX_SENTENCES sentences. get_corpus_index()
+notices a new CURRENT and, while the base is unchanged, only reads the
+new segments, so running workers see new documents cheaply.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+from src.ingestion.utils import split_sentences
+
+from . import configs
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "CURRENT"
+_LOAD_ATTEMPTS = 3
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10,
+                     sample_size: int = 65536, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids of `vectors` (cosine k-means), trained on a sample."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        vectors = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    n_lists = max(1, min(n_lists, len(vectors)))
+    centroids = np.array(vectors[rng.choice(len(vectors), n_lists, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assign = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty lists with random points instead of letting them die
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        # Layout written before generations: the arrays sit directly in `path`
+        if os.path.exists(os.path.join(path, "records.json")):
+            return {"generation": 0, "base": ".", "deltas": [], "delta_sentences": 0}
+        return None
+    manifest.setdefault("deltas", [])
+    manifest.setdefault("delta_sentences", 0)
+    return manifest
+
+
+def _publish(path: str, manifest: Dict[str, Any]) -> None:
+    """Point CURRENT at `manifest` and drop generations nobody can still be opening."""
+    previous = _read_manifest(path)
+    tmp = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+    # Keep the previous generation for readers that resolved CURRENT just before the swap
+    keep = {manifest["base"], *manifest["deltas"]}
+    if previous:
+        keep |= {previous["base"], *previous["deltas"]}
+    for name in os.listdir(path):
+        if name.startswith(("base-", "delta-")) and name not in keep:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def _new_segment(path: str, kind: str, generation: int) -> str:
+    name = f"{kind}-{generation:06d}"
+    # Left over from a write that died before publishing
+    shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    os.makedirs(os.path.join(path, name))
+    return name
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Nearest centroid (max dot product) per vector."""
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        out[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return out
+
+
+class CorpusIndex:
+    """
+    IVF sentence index. Records are {"doc_id", "section", "sentence"}; row i of
+    the vector arrays belongs to record i.
+    """
+
+    def __init__(self, path: Optional[str] = None, n_probe: int = 8, n_lists: Optional[int] = None):
+        self.path = path or None
+        self.n_probe = n_probe
+        self.n_lists = n_lists
+        self.centroids: Optional[np.ndarray] = None
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.records: List[Dict[str, Any]] = []
+        # Added since the last build: searched by brute force
+        self._pending_vectors: List[np.ndarray] = []
+        self._pending_records: List[Dict[str, Any]] = []
+        self._doc_ids = set()
+        self._lock = threading.Lock()
+        # CURRENT as resolved when this index was loaded or saved
+        self.manifest: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------
+    @classmethod
+    def load(cls, path: str, n_probe: int = 8, mmap: bool = True) -> "CorpusIndex":
+        """Open the index at `path`; an empty index if nothing was saved there yet."""
+        for attempt in range(_LOAD_ATTEMPTS):
+            manifest = _read_manifest(path)
+            if manifest is None:
+                return cls(path, n_probe=n_probe)
+            try:
+                index = cls._load_generation(path, manifest, n_probe, mmap)
+            except FileNotFoundError:
+                # Two saves since we read CURRENT removed that generation; resolve it again
+                if attempt == _LOAD_ATTEMPTS - 1:
+                    raise
+                continue
+            logger.info("Loaded corpus index %s (generation %d): %d sentences, %d lists",
+                        path, manifest["generation"], len(index), index.n_lists or 0)
+            return index
+
+    @classmethod
+    def _load_generation(cls, path: str, manifest: Dict[str, Any], n_probe: int, mmap: bool) -> "CorpusIndex":
+        index = cls(path, n_probe=n_probe)
+        if manifest["base"] is not None:
+            base = os.path.join(path, manifest["base"])
+            mode = "r" if mmap else None
+            index.centroids = np.load(os.path.join(base, "centroids.npy"), mmap_mode=mode)
+            index.list_offsets = np.load(os.path.join(base, "list_offsets.npy"))
+            index.vectors = np.load(os.path.join(base, "vectors.npy"), mmap_mode=mode)
+            with open(os.path.join(base, "records.json"), "r", encoding="utf-8") as f:
+                index.records = json.load(f)
+            index.n_lists = len(index.centroids)
+            index._doc_ids = {r["doc_id"] for r in index.records}
+        index._load_deltas(manifest["deltas"])
+        index.manifest = manifest
+        return index
+
+    def _load_deltas(self, names: Sequence[str]) -> None:
+        """Read delta segments into the pending buffer (kept as one array for search)."""
+        if not names:
+            return
+        vectors, records = list(self._pending_vectors), list(self._pending_records)
+        for name in names:
+            segment = os.path.join(self.path, name)
+            vectors.append(np.load(os.path.join(segment, "vectors.npy")))
+            with open(os.path.join(segment, "records.json"), "r", encoding="utf-8") as f:
+                records.extend(json.load(f))
+        self._pending_vectors = [np.concatenate(vectors)]
+        self._pending_records = records
+        self._doc_ids.update(r["doc_id"] for r in records)
+
+    def refreshed(self, manifest: Dict[str, Any]) -> "CorpusIndex":
+        """
+        This index at a newer `manifest`. While the base is the same only the
+        new delta segments are read, into a copy that shares the base arrays.
+        """
+        loaded = self.manifest
+        if (loaded is None or loaded["base"] != manifest["base"]
+                or manifest["deltas"][:len(loaded["deltas"])] != loaded["deltas"]):
+            return CorpusIndex.load(self.path, n_probe=self.n_probe)
+        index = CorpusIndex(self.path, n_probe=self.n_probe, n_lists=self.n_lists)
+        index.centroids, index.list_offsets = self.centroids, self.list_offsets
+        index.vectors, index.records = self.vectors, self.records
+        index._pending_vectors = list(self._pending_vectors)
+        index._pending_records = list(self._pending_records)
+        index._doc_ids = set(self._doc_ids)
+        try:
+            index._load_deltas(manifest["deltas"][len(loaded["deltas"]):])
+        except FileNotFoundError:
+            return CorpusIndex.load(self.path, n_probe=self.n_probe)
+        index.manifest = manifest
+        return index
+
+    def save_delta(self, path: Optional[str] = None) -> int:
+        """
+        Append the pending documents to the index at `path` as a delta segment,
+        leaving its base untouched; returns the number of sentences written.
+        Callers serialize writers (see _write_lock()).
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("CorpusIndex.save_delta() needs a path")
+        with self._lock:
+            vectors, records = list(self._pending_vectors), list(self._pending_records)
+        if not records:
+            return 0
+        os.makedirs(path, exist_ok=True)
+        current = _read_manifest(path) or {"generation": 0, "base": None, "deltas": [], "delta_sentences": 0}
+        generation = current["generation"] + 1
+        name = _new_segment(path, "delta", generation)
+        with open(os.path.join(path, name, "vectors.npy"), "wb") as f:
+            np.save(f, np.concatenate(vectors))
+        with open(os.path.join(path, name, "records.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        _publish(path, {
+            "generation": generation,
+            "base": current["base"],
+            "deltas": current["deltas"] + [name],
+            "delta_sentences": current["delta_sentences"] + len(records),
+        })
+        return len(records)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Fold pending documents into the IVF layout and write it to disk as a
+        new generation. Callers serialize writers (see _write_lock()).
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("CorpusIndex.save() needs a path")
+        self.build()
+        if self.centroids is None:
+            return
+        os.makedirs(path, exist_ok=True)
+        current = _read_manifest(path)
+        generation = (current["generation"] if current else 0) + 1
+        name = _new_segment(path, "base", generation)
+        base = os.path.join(path, name)
+        arrays = {
+            "centroids.npy": self.centroids,
+            "list_offsets.npy": self.list_offsets,
+            "vectors.npy": self.vectors,
+        }
+        for fname, array in arrays.items():
+            with open(os.path.join(base, fname), "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+        with open(os.path.join(base, "records.json"), "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False)
+        # Nothing reads the new directory until CURRENT names it
+        self.manifest = {"generation": generation, "base": name, "deltas": [], "delta_sentences": 0}
+        _publish(path, self.manifest)
+        self.path = path
+
+    # ------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.records) + len(self._pending_records)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_ids
+
+    def add(self, doc_id: str, sentences: Sequence[str], embeddings: np.ndarray,
+            section: Optional[str] = None) -> int:
+        """Queue `sentences` of `doc_id` with their embeddings; returns the number added."""
+        if len(sentences) != len(embeddings):
+            raise ValueError("sentences and embeddings must have the same length")
+        if not len(sentences):
+            return 0
+        with self._lock:
+            self._pending_vectors.append(_normalize(embeddings))
+            self._pending_records.extend(
+                {"doc_id": doc_id, "section": section, "sentence": s} for s in sentences
+            )
+            self._doc_ids.add(doc_id)
+        return len(sentences)
+
+    def add_document(self, module1_json: Dict[str, Any], embedder=None) -> int:
+        """
+        Index a Module 1 document ({doc_id, sections, raw_text}) sentence by
+        sentence. Sections are used when present, raw_text otherwise.
+        Documents already in the index are skipped.
+        """
+        doc_id = module1_json.get("doc_id")
+        if not doc_id or doc_id in self:
+            return 0
+        if embedder is None:
+            from .embedding_service import get_embedding_service
+
+            embedder = get_embedding_service()
+
+        parts = [(s.get("name"), s.get("text", "")) for s in module1_json.get("sections") or []]
+        if not any(text for _, text in parts):
+            parts = [(None, module1_json.get("raw_text", ""))]
+
+        added = 0
+        for section, text in parts:
+            sentences = [s for s in split_sentences(text) if len(s.split()) >= 3]
+            if sentences:
+                added += self.add(doc_id, sentences, embedder.encode_many(sentences, normalize=True), section)
+        return added
+
+    def build(self) -> None:
+        """(Re)build the IVF layout over indexed and pending sentences."""
+        with self._lock:
+            if not self._pending_records and self.centroids is not None:
+                return
+            parts = [np.asarray(self.vectors)] if len(self.records) else []
+            vectors = np.concatenate(parts + self._pending_vectors) if (parts or self._pending_vectors) else None
+            records = self.records + self._pending_records
+            if vectors is None:
+                return
+
+            # Keep trained centroids while the corpus has not grown much; retrain otherwise
+            target_lists = self.n_lists or int(np.clip(np.sqrt(len(vectors)), 1, 4096))
+            if self.centroids is None or len(vectors) > 4 * max(1, len(self.records)):
+                centroids = spherical_kmeans(vectors, target_lists)
+            else:
+                centroids = np.asarray(self.centroids)
+
+            assign = assign_lists(vectors, centroids)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=len(centroids))
+
+            self.centroids = centroids
+            self.n_lists = len(centroids)
+            self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            self.vectors = vectors[order]
+            self.records = [records[i] for i in order.tolist()]
+            self._pending_vectors = []
+            self._pending_records = []
+
+    # ------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------
+    def search(self, queries: np.ndarray, top_k: int = 5, n_probe: Optional[int] = None,
+               exclude_doc_id: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Approximate top-k neighbours of every query vector:
+        per query, [{doc_id, section, sentence, score}] sorted by score.
+        Sentences of `exclude_doc_id` (typically the document being checked) are skipped.
+        """
+        queries = _normalize(queries)
+        nq = len(queries)
+        # Over-fetch a little so excluded sentences do not empty the result
+        k = top_k + (8 if exclude_doc_id else 0)
+        cand_scores: List[List[np.ndarray]] = [[] for _ in range(nq)]
+        cand_rows: List[List[np.ndarray]] = [[] for _ in range(nq)]
+
+        if self.centroids is not None and len(self.records):
+            n_probe = max(1, min(n_probe or self.n_probe, self.n_lists))
+            centroid_sims = queries @ np.asarray(self.centroids).T
+            probes = np.argpartition(-centroid_sims, n_probe - 1, axis=1)[:, :n_probe]
+            # One matmul per probed list, over every query that probes it
+            for lst in np.unique(probes):
+                start, end = int(self.list_offsets[lst]), int(self.list_offsets[lst + 1])
+                if start == end:
+                    continue
+                q_ids = np.flatnonzero((probes == lst).any(axis=1))
+                sims = queries[q_ids] @ self.vectors[start:end].T
+                kk = min(k, end - start)
+                top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+                for row, q in enumerate(q_ids.tolist()):
+                    cand_scores[q].append(sims[row, top[row]])
+                    cand_rows[q].append(top[row] + start)
+
+        pending_records = self._pending_records
+        if self._pending_vectors:
+            pending = self._pending_vectors[0] if len(self._pending_vectors) == 1 else np.concatenate(self._pending_vectors)
+            sims = queries @ pending.T
+            kk = min(k, len(pending))
+            top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+            for q in range(nq):
+                cand_scores[q].append(sims[q, top[q]])
+                cand_rows[q].append(top[q] + len(self.records))
+
+        results = []
+        for q in range(nq):
+            hits = []
+            if cand_scores[q]:
+                scores = np.concatenate(cand_scores[q])
+                rows = np.concatenate(cand_rows[q])
+                for i in np.argsort(-scores, kind="stable").tolist():
+                    row = int(rows[i])
+                    record = self.records[row] if row < len(self.records) else pending_records[row - len(self.records)]
+                    if exclude_doc_id is not None and record["doc_id"] == exclude_doc_id:
+                        continue
+                    hits.append({**record, "score": float(scores[i])})
+                    if len(hits) == top_k:
+                        break
+            results.append(hits)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "documents": len(self._doc_ids),
+            "sentences": len(self),
+            "pending_sentences": len(self._pending_records),
+            "lists": self.n_lists or 0,
+            "n_probe": self.n_probe,
+        }
+
+
+_INDEX: Optional[CorpusIndex] = None
+_INDEX_VERSION = None
+_INDEX_LOCK = threading.Lock()
+_WRITE_LOCK = threading.Lock()
+
+
+def _index_version(path: str):
+    # CURRENT is replaced once per completed save; older layouts only have records.json
+    for name in (MANIFEST, "records.json"):
+        try:
+            st = os.stat(os.path.join(path, name))
+        except OSError:
+            continue
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    return None
+
+
+def get_corpus_index() -> CorpusIndex:
+    """
+    Process-wide CorpusIndex opened (memory-mapped) from configs.CORPUS_INDEX_PATH,
+    reopened whenever the index on disk has been saved since it was loaded.
+    """
+    global _INDEX, _INDEX_VERSION
+    path = configs.CORPUS_INDEX_PATH
+    version = _index_version(path)
+    if _INDEX is None or version != _INDEX_VERSION or _INDEX.path != path:
+        with _INDEX_LOCK:
+            if _INDEX is None or version != _INDEX_VERSION or _INDEX.path != path:
+                manifest = _read_manifest(path)
+                if _INDEX is not None and _INDEX.path == path and manifest is not None:
+                    _INDEX = _INDEX.refreshed(manifest)
+                else:
+                    _INDEX = CorpusIndex.load(path, n_probe=configs.CORPUS_INDEX_N_PROBE)
+                _INDEX_VERSION = version
+    return _INDEX
+
+
+@contextmanager
+def _write_lock(path: str):
+    """Serialize load-add-save cycles on `path` across threads and worker processes."""
+    os.makedirs(path, exist_ok=True)
+    with _WRITE_LOCK, open(os.path.join(path, ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def add_to_corpus_index(module1_json: Dict[str, Any], embedder=None, index_path: Optional[str] = None) -> int:
+    """
+    Append a processed Module 1 document to the on-disk index as a delta
+    segment; returns the number of sentences added (0 if it was already
+    indexed). Only the new document is embedded and written; the segments
+    are compacted into a new base once they exceed CORPUS_DELTA_MAX_SENTENCES.
+    """
+    index_path = index_path or configs.CORPUS_INDEX_PATH
+    with _write_lock(index_path):
+        if index_path == configs.CORPUS_INDEX_PATH:
+            current = get_corpus_index()
+        else:
+            current = CorpusIndex.load(index_path, n_probe=configs.CORPUS_INDEX_N_PROBE)
+        if module1_json.get("doc_id") in current:
+            return 0
+        delta = CorpusIndex(index_path)
+        added = delta.add_document(module1_json, embedder=embedder)
+        if added:
+            delta.save_delta(index_path)
+            manifest = _read_manifest(index_path)
+            if manifest["delta_sentences"] > configs.CORPUS_DELTA_MAX_SENTENCES:
+                logger.info("Compacting corpus index %s: %d delta sentences", index_path, manifest["delta_sentences"])
+                CorpusIndex.load(index_path, n_probe=configs.CORPUS_INDEX_N_PROBE, mmap=False).save(index_path)
+    logger.info("Added %s to corpus index: %d sentences", module1_json.get("doc_id"), added)
+    return added
+
+
+def corpus_search_batch(sentences: List[str], exclude_doc_id: Optional[str] = None,
+                        top_k: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    """Embed `sentences` and look them up in the process-wide corpus index (executor job)."""
+    index = get_corpus_index()
+    if not sentences or not len(index):
+        return [[] for _ in sentences]
+    from .embedding_service import get_embedding_service
+
+    queries = get_embedding_service().encode_many(sentences, normalize=True)
+    return index.search(queries, top_k=top_k or configs.CORPUS_TOP_K, exclude_doc_id=exclude_doc_id)
+
+
+def index_documents(paths: Iterable[str], index_path: str) -> CorpusIndex:
+    """Add Module 1 JSON files to the index at `index_path` and save it."""
+    with _write_lock(index_path):
+        index = CorpusIndex.load(index_path, n_probe=configs.CORPUS_INDEX_N_PROBE, mmap=False)
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                added = index.add_document(json.load(f))
+            logger.info("Indexed %s: %d sentences", path, added)
+        index.save(index_path)
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.observability import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Add Module 1 JSON outputs to the local corpus index")
+    parser.add_argument("files", nargs="+", help="Module 1 JSON files ({doc_id, sections, raw_text})")
+    parser.add_argument("--index", default=configs.CORPUS_INDEX_PATH, help="Index directory")
+    args = parser.parse_args()
+    print(json.dumps(index_documents(args.files, args.index).stats(), indent=2))
@@ -0,0 +1,213 @@
+# src/similarity_search/embedding_service.py
+"""
+Process-wide sentence embedding service.
+
+Every module that needs sentence embeddings goes through
+`get_embedding_service()` so a worker holds exactly one copy of each
+SentenceTransformer model. Texts are encoded in batches and cached by
+content hash, so sentences repeated across blocks and sources are only
+encoded once.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import configs
+from src.observability.metrics import observe_embedding_batch
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingService:
+    """
+    Lazily loads a SentenceTransformer model and serves batched, cached encodings.
+    Cached vectors are stored un-normalized; `normalize=True` is applied on the way out.
+    """
+
+    def __init__(self, model_name: str, cache_size: int = 50000, batch_size: int = 64):
+        self.model_name = model_name
+        self.cache_size = max(0, cache_size)
+        self.batch_size = max(1, batch_size)
+        self._model = None
+        self._model_bytes = 0
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "texts_requested": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "texts_encoded": 0,
+            "batches": 0,
+            "encode_seconds": 0.0,
+            "model_load_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------
+    # Model
+    # ------------------------------------------------------------
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    start = time.perf_counter()
+                    model = SentenceTransformer(self.model_name)
+                    elapsed = time.perf_counter() - start
+                    try:
+                        self._model_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+                    except Exception:
+                        self._model_bytes = 0
+                    with self._lock:
+                        self._stats["model_load_seconds"] += elapsed
+                    logger.info("Loaded embedding model %s in %.2fs", self.model_name, elapsed)
+                    self._model = model
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def warmup(self) -> None:
+        """Load the model eagerly (e.g. at worker start-up)."""
+        _ = self.model
+
+    # ------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def encode_many(self, texts: Sequence[str], normalize: bool = False) -> np.ndarray:
+        """
+        Encode `texts` into an (N, D) float32 matrix, in input order.
+        Only texts missing from the cache are sent to the model, de-duplicated
+        and in batches of `batch_size`.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        keys = [self._key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["texts_requested"] += len(texts)
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                vec = self._cache.get(key)
+                if vec is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = vec
+                else:
+                    missing[key] = text
+            self._stats["cache_hits"] += len(found)
+            self._stats["cache_misses"] += len(missing)
+
+        if missing:
+            missing_keys = list(missing.keys())
+            missing_texts = [missing[k] for k in missing_keys]
+            start = time.perf_counter()
+            encoded = self.model.encode(
+                missing_texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            elapsed = time.perf_counter() - start
+            encoded = np.asarray(encoded, dtype=np.float32)
+            observe_embedding_batch(self.model_name, len(missing_texts), elapsed)
+
+            with self._lock:
+                self._stats["texts_encoded"] += len(missing_texts)
+                self._stats["batches"] += (len(missing_texts) + self.batch_size - 1) // self.batch_size
+                self._stats["encode_seconds"] += elapsed
+                for key, vec in zip(missing_keys, encoded):
+                    found[key] = vec
+                    self._store(key, vec)
+
+        out = np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+        if normalize:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out = out / np.maximum(norms, 1e-12)
+        return out
+
+    def encode(self, text: str, normalize: bool = False) -> np.ndarray:
+        return self.encode_many([text], normalize=normalize)[0]
+
+    def _store(self, key: str, vec: np.ndarray) -> None:
+        # Caller holds self._lock
+        if self.cache_size == 0:
+            return
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return
+        self._cache[key] = vec
+        self._cache_bytes += vec.nbytes
+        while len(self._cache) > self.cache_size:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
+
+    # ------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_entries"] = len(self._cache)
+            stats["cache_bytes"] = self._cache_bytes
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        stats["model_name"] = self.model_name
+        stats["model_loaded"] = self._model is not None
+        stats["model_bytes"] = self._model_bytes
+        stats["cache_hit_rate"] = stats["cache_hits"] / lookups if lookups else 0.0
+        stats["avg_seconds_per_text"] = (
+            stats["encode_seconds"] / stats["texts_encoded"] if stats["texts_encoded"] else 0.0
+        )
+        return stats
+
+
+_SERVICES: Dict[str, EmbeddingService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingService:
+    """
+    Return the process-wide EmbeddingService for `model_name`
+    (defaults to configs.EMBEDDING_MODEL_NAME).
+    """
+    name = model_name or configs.EMBEDDING_MODEL_NAME
+    service = _SERVICES.get(name)
+    if service is None:
+        with _SERVICES_LOCK:
+            service = _SERVICES.get(name)
+            if service is None:
+                service = EmbeddingService(
+                    name,
+                    cache_size=configs.EMBEDDING_CACHE_SIZE,
+                    batch_size=configs.EMBEDDING_BATCH_SIZE,
+                )
+                _SERVICES[name] = service
+    return service
+
+
+def embedding_stats() -> List[Dict[str, Any]]:
+    return [svc.stats() for svc in list(_SERVICES.values())]
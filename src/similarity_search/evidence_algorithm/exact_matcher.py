@@ -1,43 +1,135 @@
 # src/similarity_search/evidence_algorithms/exact_matcher.py
 import re
-from typing import List, Dict, Any
-from ..utils import generate_ngrams, char_index_spans, min_token_length
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from ..winnowing import rolling_hashes
+
+_TOKEN_SPLIT_RE = re.compile(r"(\w+|\S)")
+
+
+def tokenize_with_offsets(text: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Word / punctuation tokens of `text` with their start and end character offsets."""
+    # re.split with a capturing group alternates [gap, token, gap, token, ..., gap];
+    # offsets follow from the cumulative part lengths without per-match objects
+    parts = _TOKEN_SPLIT_RE.split(text)
+    tokens = parts[1::2]
+    lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+    ends_all = np.cumsum(lengths)
+    ends = ends_all[1::2]
+    starts = ends - lengths[1::2]
+    return tokens, starts, ends
+
+
+Encoded = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def encode_tokens(text: str) -> Encoded:
+    """
+    (token ids, starts, ends) for `text`. Ids are the tokens' 64-bit string
+    hashes, consistent within a process. Callers matching one source against
+    many originals encode it once and pass it to find_exact_matches(); nothing
+    is cached here, so document texts don't outlive the request.
+    """
+    tokens, starts, ends = tokenize_with_offsets(text)
+    ids = np.fromiter(map(hash, tokens), dtype=np.int64, count=len(tokens))
+    return ids, starts, ends
+
 
 class ExactMatcher:
     """
     Identifies exact n-gram matches (word-level) and strong lexical overlaps.
+
+    Both texts are tokenized once, tokens are hashed to integer ids, and
+    every n-gram gets a rolling hash. Hashes are joined
+    through a sorted array, verified on the id arrays, and hits on the same
+    diagonal are merged into maximal spans.
     """
 
-    def __init__(self, nlp=None, min_ngram=5):
+    def __init__(self, nlp=None, min_ngram=5, max_occurrences=32):
         self.nlp = nlp
         self.min_ngram = min_ngram
+        # Cap on source positions per original n-gram, so highly repetitive text stays linear
+        self.max_occurrences = max_occurrences
+
+    def _ngram_pairs(self, o_ids: np.ndarray, s_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(original index, source index) of every shared n-gram."""
+        n = self.min_ngram
+        o_hash = rolling_hashes(o_ids, n)
+        s_hash = rolling_hashes(s_ids, n)
+        if len(o_hash) == 0 or len(s_hash) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        order = np.argsort(s_hash, kind="stable")
+        s_sorted = s_hash[order]
+        lo = np.searchsorted(s_sorted, o_hash, side="left")
+        hi = np.minimum(np.searchsorted(s_sorted, o_hash, side="right"), lo + self.max_occurrences)
+        counts = hi - lo
+        if not counts.any():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        o_idx = np.repeat(np.arange(len(o_hash)), counts)
+        # Position of each pair inside its [lo, hi) run of the sorted source hashes
+        run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        s_idx = order[np.repeat(lo, counts) + run_offsets]
+
+        # Rolling hashes can collide; keep pairs whose token ids really agree
+        same = np.ones(len(o_idx), dtype=bool)
+        for j in range(n):
+            same &= o_ids[o_idx + j] == s_ids[s_idx + j]
+        return o_idx[same], s_idx[same]
+
+    def _maximal_spans(self, o_idx: np.ndarray, s_idx: np.ndarray, n_original: int) -> List[Tuple[int, int, int]]:
+        """Merge consecutive hits on one diagonal; returns [(orig token start, src token start, length)]."""
+        if len(o_idx) == 0:
+            return []
+        diag = s_idx - o_idx
+        order = np.lexsort((o_idx, diag))
+        o_sorted, d_sorted = o_idx[order], diag[order]
+        breaks = np.ones(len(order), dtype=bool)
+        breaks[1:] = (d_sorted[1:] != d_sorted[:-1]) | (o_sorted[1:] != o_sorted[:-1] + 1)
+        run_starts = np.flatnonzero(breaks)
+        run_ends = np.append(run_starts[1:], len(order)) - 1
+
+        starts = o_sorted[run_starts]
+        lengths = o_sorted[run_ends] - starts + self.min_ngram
+        src_starts = starts + d_sorted[run_starts]
+
+        # Longest spans first; drop spans whose original tokens are already fully covered
+        covered = np.zeros(n_original, dtype=bool)
+        spans = []
+        for i in np.lexsort((src_starts, starts, -lengths)):
+            a, length = int(starts[i]), int(lengths[i])
+            if covered[a:a + length].all():
+                continue
+            covered[a:a + length] = True
+            spans.append((a, int(src_starts[i]), length))
+        spans.sort()
+        return spans
 
-    def find_exact_matches(self, original: str, source: str) -> List[Dict[str, Any]]:
-        o_tokens = re.findall(r"\w+|\S", original)
-        s_tokens = re.findall(r"\w+|\S", source)
+    def find_exact_matches(self, original: str, source: str,
+                           original_tokens: Optional[Encoded] = None,
+                           source_tokens: Optional[Encoded] = None) -> List[Dict[str, Any]]:
+        """`original_tokens` / `source_tokens`: encode_tokens() results to reuse across calls."""
+        o_ids, o_starts, o_ends = original_tokens if original_tokens is not None else encode_tokens(original)
+        s_ids, s_starts, s_ends = source_tokens if source_tokens is not None else encode_tokens(source)
+        if len(o_ids) < self.min_ngram or len(s_ids) < self.min_ngram:
+            return []
 
+        o_idx, s_idx = self._ngram_pairs(o_ids, s_ids)
         matches = []
+        for o_start, s_start, length in self._maximal_spans(o_idx, s_idx, len(o_ids)):
+            o_char_span = (int(o_starts[o_start]), int(o_ends[o_start + length - 1]))
+            s_char_span = (int(s_starts[s_start]), int(s_ends[s_start + length - 1]))
+            matches.append({
+                "type": "exact_match",
+                "original_text": original[o_char_span[0]:o_char_span[1]],
+                "source_text": source[s_char_span[0]:s_char_span[1]],
+                "match_length": length,
+                "original_span": o_char_span,
+                "source_span": s_char_span,
+                "confidence": min(0.99, 0.95 + 0.01 * (length - self.min_ngram))  # slightly higher for longer spans
+            })
 
-        # n-gram search for n in descending order (5 -> 1)
-        for n in range(5, self.min_ngram - 1, -1):
-            o_ngrams = generate_ngrams(o_tokens, n)
-            s_ngrams = generate_ngrams(s_tokens, n)
-
-            s_index = {ngram: idx for idx, (ngram, idx) in enumerate(s_ngrams)}
-            for o_ngram, o_idx in o_ngrams:
-                if o_ngram in s_index:
-                    s_idx = s_index[o_ngram]
-                    o_char_span = char_index_spans(original, o_tokens, o_idx, n)
-                    s_char_span = char_index_spans(source, s_tokens, s_idx, n)
-                    matches.append({
-                        "type": "exact_match",
-                        "original_text": original[o_char_span[0]:o_char_span[1]],
-                        "source_text": source[s_char_span[0]:s_char_span[1]],
-                        "match_length": n,
-                        "original_span": o_char_span,
-                        "source_span": s_char_span,
-                        "confidence": 0.95 + 0.01 * (n - self.min_ngram)  # slightly higher for longer n
-                    })
-
-        # merge / dedupe by span (caller will consolidate)
         return matches
@@ -1,18 +1,43 @@
 # src/similarity_search/evidence_algorithms/paraphrase_matcher.py
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Mapping, Sequence
 import numpy as np
-from ...ingestion.utils import split_sentences, top_k_sentence_pairs, cosine_sim
+from src.ingestion.utils import split_sentences, top_k_per_row
 
 class ParaphraseMatcher:
     """
     Uses embedding similarity + POS pattern heuristics to detect paraphrase pairs.
     Requires an embedder that can encode sentences.
+
+    `find_document_matches` embeds the user sentences once and the sentences
+    of every candidate source once, stacks the sources into one normalized
+    float32 matrix and keeps the top-k source sentences per user sentence.
     """
 
-    def __init__(self, nlp=None, embedder=None, sim_threshold=0.75):
+    def __init__(self, nlp=None, embedder=None, sim_threshold=0.75, top_k=3,
+                 batch_size=256, row_chunk=1024, col_chunk=8192):
         self.nlp = nlp
         self.embedder = embedder
         self.sim_threshold = sim_threshold
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.row_chunk = row_chunk
+        self.col_chunk = col_chunk
+
+    def _embed(self, sentences: Sequence[str]) -> np.ndarray:
+        """Row-normalized float32 embeddings, encoded `batch_size` sentences at a time."""
+        encode = getattr(self.embedder, "encode_many", None) or self.embedder.encode
+        out = None
+        for start in range(0, len(sentences), self.batch_size):
+            batch = np.asarray(encode(list(sentences[start:start + self.batch_size]), normalize=True),
+                               dtype=np.float32)
+            if out is None:
+                out = np.empty((len(sentences), batch.shape[1]), dtype=np.float32)
+            out[start:start + len(batch)] = batch
+        if out is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Normalize again so embedders that ignore `normalize` still give cosine scores
+        out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out
 
     def find_paraphrase_matches(self, original: str, source: str) -> List[Dict[str, Any]]:
         orig_sents = split_sentences(original)
@@ -21,20 +46,53 @@ class ParaphraseMatcher:
             # fallback to token-based heuristic if embedder missing
             return self._heuristic_paraphrase(orig_sents, src_sents)
 
-        o_emb = self.embedder.encode(orig_sents, normalize=True)
-        s_emb = self.embedder.encode(src_sents, normalize=True)
+        results = self._match(orig_sents, self._embed(orig_sents), [(None, src_sents)])
+        for r in results:
+            del r["source"]
+        return results
+
+    def find_document_matches(self, original: str, sources: Mapping[Any, str]) -> List[Dict[str, Any]]:
+        """
+        Paraphrase matches of every user sentence against all `sources`
+        ({source id: text}) at once: up to `top_k` per user sentence, each
+        tagged with its "source" id.
+        """
+        orig_sents = split_sentences(original)
+        per_source = [(source_id, split_sentences(text)) for source_id, text in sources.items()]
+        if not self.embedder:
+            results = []
+            for source_id, src_sents in per_source:
+                for r in self._heuristic_paraphrase(orig_sents, src_sents):
+                    r["source"] = source_id
+                    results.append(r)
+            return results
+        return self._match(orig_sents, self._embed(orig_sents), per_source)
+
+    def _match(self, orig_sents: List[str], o_emb: np.ndarray,
+               per_source: List[tuple]) -> List[Dict[str, Any]]:
+        all_sents = [sent for _, sents in per_source for sent in sents]
+        if not orig_sents or not all_sents:
+            return []
+        # Row r of the stacked matrix is sentence local[r] of source owner[r]
+        lengths = np.array([len(sents) for _, sents in per_source], dtype=np.int64)
+        owner = np.repeat(np.arange(len(per_source)), lengths)
+        local = np.arange(len(all_sents)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        s_emb = self._embed(all_sents)
 
-        pairs = top_k_sentence_pairs(o_emb, s_emb, top_k=3)
+        indices, scores = top_k_per_row(o_emb, s_emb, self.top_k, self.row_chunk, self.col_chunk)
         results = []
-        for i, j, score in pairs:
-            if score >= self.sim_threshold:
+        for i, (row_idx, row_scores) in enumerate(zip(indices.tolist(), scores.tolist())):
+            for j, score in zip(row_idx, row_scores):
+                if score < self.sim_threshold:
+                    break
                 results.append({
                     "type": "paraphrased_match",
                     "original_sentence": orig_sents[i],
-                    "source_sentence": src_sents[j],
+                    "source_sentence": all_sents[j],
                     "semantic_similarity": float(score),
                     "original_index": i,
-                    "source_index": j
+                    "source_index": int(local[j]),
+                    "source": per_source[owner[j]][0],
                 })
         return results
 
@@ -0,0 +1,227 @@
+# src/similarity_search/executors.py
+"""
+Execution backends for the CPU-bound stages of Module 3.
+
+Each stage runs on either the shared thread pool or a dedicated process
+pool, selected with configs.<STAGE>_EXECUTOR_BACKEND ("thread" / "process"):
+
+- "nlp"     : spaCy meaningfulness classification
+- "embed"   : sentence-embedding similarity scoring
+- "extract" : HTML / PDF text extraction of fetched sources
+- "fuzzy"   : difflib matching of evidence sentences to the user file
+
+spaCy, difflib and trafilatura hold the GIL, so only the process backend
+uses more than one core per request. Process workers load their models
+once, in the pool initializer, and every job carries a whole batch of
+sentences or sources rather than a single pair. Job functions live at
+module level so they can be pickled.
+
+The fuzzy stage's SentenceOffsetIndex is not shipped with every job:
+process workers keep the indexes of recent documents keyed by a
+fingerprint, and the document is sent only to a worker that lacks it
+(see fuzzy_offsets_by_key).
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.ingestion.utils import SentenceOffsetIndex
+
+from . import configs
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("nlp", "embed", "extract", "fuzzy")
+BACKENDS = ("thread", "process")
+
+# Only POS tags and dependencies are read; skip the components that do not feed them
+MEANINGFUL_DISABLED_PIPES = ("ner", "lemmatizer")
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pools: Dict[str, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+# Per-worker SentenceOffsetIndex cache for fuzzy_offsets_by_key: fingerprint -> index
+OFFSET_INDEX_CACHE_SIZE = 8
+_offset_indexes: "OrderedDict[str, SentenceOffsetIndex]" = OrderedDict()
+_offset_indexes_lock = threading.Lock()
+
+
+# ============================================================
+# Models (one copy per process)
+# ============================================================
+def get_nlp():
+    """spaCy pipeline for this process, loaded on first use."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+
+                _nlp = spacy.load(configs.SPACY_MODEL_NAME)
+    return _nlp
+
+
+def _init_worker(stage: str) -> None:
+    """Process pool initializer: preload the models this stage needs."""
+    try:
+        if stage == "nlp":
+            get_nlp()
+        elif stage == "embed":
+            from .embedding_service import get_embedding_service
+
+            get_embedding_service().warmup()
+    except Exception as e:
+        # The job will retry the load and surface the error to the caller
+        logger.warning("Worker preload for stage %s failed: %s", stage, e)
+
+
+# ============================================================
+# Batch jobs
+# ============================================================
+def meaningful_batch(sentences: List[str]) -> List[bool]:
+    """Meaningfulness flag per sentence: >= 3 words, a verb and a nominal subject."""
+    nlp = get_nlp()
+    disable = [name for name in MEANINGFUL_DISABLED_PIPES if name in nlp.pipe_names]
+    results = []
+    for sent, doc in zip(sentences, nlp.pipe(sentences, batch_size=32, disable=disable)):
+        has_verb = any(tok.pos_ == "VERB" for tok in doc)
+        has_nsubj = any(tok.dep_ in {"nsubj", "nsubjpass"} for tok in doc)
+        results.append((len(sent.split()) >= 3) and has_verb and has_nsubj)
+    return results
+
+
+def semantic_batch(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    from .similarity_engine import batch_semantic_similarity
+
+    return batch_semantic_similarity(pairs)
+
+
+def fuzzy_offsets_batch(sentences: List[str],
+                        user_file: Union[SentenceOffsetIndex, List[Dict[str, Any]]],
+                        threshold: float = 0.7) -> List[Dict[str, int]]:
+    """
+    User-file offsets of the first user sentence whose difflib ratio with
+    each sentence exceeds `threshold` ({-1, -1} when none does).
+    `user_file` is a SentenceOffsetIndex or a split_sentences_with_offsets() list.
+    """
+    index = user_file if isinstance(user_file, SentenceOffsetIndex) else SentenceOffsetIndex(sentences=user_file)
+    return index.fuzzy_many(sentences, threshold)
+
+
+def fuzzy_offsets_by_key(key: str, sentences: List[str],
+                         user_file: Optional[List[Dict[str, Any]]] = None,
+                         threshold: float = 0.7) -> Optional[List[Dict[str, int]]]:
+    """
+    fuzzy_offsets_batch() against this worker's cached index for document `key`
+    (SentenceOffsetIndex.fingerprint()). Returns None when the worker has no index
+    for `key` and `user_file` was not sent; the caller then resends with the
+    document, which builds the index (shingles and memos) once per worker.
+    """
+    with _offset_indexes_lock:
+        index = _offset_indexes.get(key)
+        if index is not None:
+            _offset_indexes.move_to_end(key)
+        elif user_file is None:
+            return None
+        else:
+            index = _offset_indexes[key] = SentenceOffsetIndex(sentences=user_file)
+            while len(_offset_indexes) > OFFSET_INDEX_CACHE_SIZE:
+                _offset_indexes.popitem(last=False)
+    return index.fuzzy_many(sentences, threshold)
+
+
+# ============================================================
+# Pools
+# ============================================================
+def stage_backend(stage: str) -> str:
+    if stage not in STAGES:
+        raise ValueError(f"Unknown executor stage {stage!r}; expected one of {STAGES}")
+    backend = getattr(configs, f"{stage.upper()}_EXECUTOR_BACKEND", configs.EXECUTOR_BACKEND)
+    if backend not in BACKENDS:
+        logger.warning("Unknown executor backend %r for stage %s; using threads", backend, stage)
+        return "thread"
+    return backend
+
+
+def get_thread_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by every stage on the thread backend."""
+    global _thread_pool
+    if _thread_pool is None:
+        with _pools_lock:
+            if _thread_pool is None:
+                _thread_pool = ThreadPoolExecutor(
+                    max_workers=configs.EXECUTOR_THREAD_WORKERS,
+                    thread_name_prefix="module3",
+                )
+    return _thread_pool
+
+
+def make_process_executor(stage: str, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """New process pool whose workers preload the models `stage` needs."""
+    return ProcessPoolExecutor(
+        max_workers=max_workers or configs.EXECUTOR_PROCESS_WORKERS,
+        mp_context=multiprocessing.get_context(configs.EXECUTOR_START_METHOD),
+        initializer=_init_worker,
+        initargs=(stage,),
+    )
+
+
+def get_process_executor(stage: str) -> ProcessPoolExecutor:
+    """Dedicated process pool for `stage`, created on first use."""
+    pool = _process_pools.get(stage)
+    if pool is None:
+        with _pools_lock:
+            pool = _process_pools.get(stage)
+            if pool is None:
+                pool = make_process_executor(stage)
+                _process_pools[stage] = pool
+                logger.info("Started process pool for stage %s (%d workers)",
+                            stage, pool._max_workers)
+    return pool
+
+
+def get_executor(stage: str) -> Executor:
+    """Executor configured for `stage`."""
+    if stage_backend(stage) == "process":
+        return get_process_executor(stage)
+    return get_thread_executor()
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    global _thread_pool
+    with _pools_lock:
+        pools = list(_process_pools.values())
+        _process_pools.clear()
+        thread_pool, _thread_pool = _thread_pool, None
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
+    if thread_pool is not None:
+        thread_pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_executors, wait=False)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Workers and queued jobs per live pool: {"thread": {...}, "<stage>": {...}}."""
+    with _pools_lock:
+        pools: Dict[str, Executor] = dict(_process_pools)
+        if _thread_pool is not None:
+            pools["thread"] = _thread_pool
+    stats = {}
+    for name, pool in pools.items():
+        if isinstance(pool, ThreadPoolExecutor):
+            queued = pool._work_queue.qsize()
+        else:
+            # Submitted but not yet finished (the call queue is bounded, the rest waits here)
+            queued = len(getattr(pool, "_pending_work_items", ()))
+        stats[name] = {"workers": pool._max_workers, "queued": queued}
+    return stats
@@ -0,0 +1,295 @@
+# src/similarity_search/fetch_cache.py
+"""
+Two-tier cache for fetched source documents (output of fetch_full_text).
+
+- Hot tier: small in-process LRU dict, checked first.
+- Disk tier: SQLite database holding zlib-compressed text plus the
+  ETag / Last-Modified validators. SQLite in WAL mode is safe to share
+  between uvicorn workers and pool processes on the same host.
+
+Entries younger than `ttl_seconds` are served as-is. Older entries are
+returned as stale so the caller can revalidate them with a conditional
+request; entries older than `max_age_seconds` are purged. The disk tier is
+kept under `max_bytes` by evicting least recently accessed rows.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from . import configs
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetch_cache (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fetch_cache_accessed ON fetch_cache (accessed_at);
+"""
+
+
+class FetchCache:
+    def __init__(
+        self,
+        path: Optional[str],
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_age_seconds: float = 30 * 24 * 3600,
+        hot_size: int = 256,
+        negative_ttl_seconds: float = 600,
+    ):
+        self.path = path or None
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max(max_age_seconds, ttl_seconds)
+        self.hot_size = max(0, hot_size)
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        self._hot: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "hot_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # SQLite plumbing
+    # ------------------------------------------------------------
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        # Connections must not cross a fork; reconnect in child processes
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    # ------------------------------------------------------------
+    # Hot tier
+    # ------------------------------------------------------------
+    def _hot_get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._hot.get(url)
+            if entry is not None:
+                self._hot.move_to_end(url)
+            return entry
+
+    def _hot_put(self, url: str, entry: Dict[str, Any]) -> None:
+        if self.hot_size == 0:
+            return
+        with self._lock:
+            self._hot[url] = entry
+            self._hot.move_to_end(url)
+            while len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        ttl = self.ttl_seconds if entry["text"] is not None else self.negative_ttl_seconds
+        return now - entry["fetched_at"] < ttl
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Return {text, etag, last_modified, fetched_at, fresh} or None on a miss.
+        Stale entries (fresh=False) carry validators for a conditional request.
+        """
+        now = time.time()
+        entry = self._hot_get(url)
+        if entry is not None and self._is_fresh(entry, now):
+            self._bump("hot_hits")
+            return dict(entry, fresh=True)
+
+        row = None
+        conn = self._conn()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT body, etag, last_modified, fetched_at FROM fetch_cache WHERE url = ?",
+                    (url,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE fetch_cache SET accessed_at = ? WHERE url = ?", (now, url))
+            except sqlite3.Error as e:
+                logger.warning("Fetch cache read failed for %s: %s", url, e)
+                self._bump("errors")
+                row = None
+
+        if row is None:
+            self._bump("misses")
+            return None
+
+        body, etag, last_modified, fetched_at = row
+        entry = {
+            "text": zlib.decompress(body).decode("utf-8"),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+        if now - fetched_at > self.max_age_seconds:
+            self._bump("misses")
+            return None
+
+        fresh = self._is_fresh(entry, now)
+        if fresh:
+            self._hot_put(url, entry)
+            self._bump("disk_hits")
+        else:
+            self._bump("stale_hits")
+        return dict(entry, fresh=fresh)
+
+    def put(self, url: str, text: Optional[str],
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Store a fetch result. Failed fetches (text=None) are only remembered in
+        the hot tier, for negative_ttl_seconds.
+        """
+        now = time.time()
+        entry = {"text": text, "etag": etag, "last_modified": last_modified, "fetched_at": now}
+        self._hot_put(url, entry)
+        if text is None:
+            return
+
+        conn = self._conn()
+        if conn is None:
+            return
+        body = zlib.compress(text.encode("utf-8"))
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO fetch_cache "
+                "(url, body, size, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, len(body), etag, last_modified, now, now),
+            )
+            self._bump("stores")
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning("Fetch cache write failed for %s: %s", url, e)
+            self._bump("errors")
+
+    def touch(self, url: str, entry: Dict[str, Any]) -> None:
+        """Mark a stale entry fresh again after a 304 Not Modified response."""
+        now = time.time()
+        refreshed = {k: entry[k] for k in ("text", "etag", "last_modified")}
+        refreshed["fetched_at"] = now
+        self._hot_put(url, refreshed)
+        self._bump("revalidated")
+
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "UPDATE fetch_cache SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+        except sqlite3.Error as e:
+            logger.warning("Fetch cache touch failed for %s: %s", url, e)
+            self._bump("errors")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute(
+            "DELETE FROM fetch_cache WHERE fetched_at < ?", (now - self.max_age_seconds,)
+        ).rowcount
+        evicted = max(expired, 0)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM fetch_cache").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT url, size FROM fetch_cache ORDER BY accessed_at LIMIT 32"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for url, size in rows:
+                victims.append((url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            conn.executemany("DELETE FROM fetch_cache WHERE url = ?", victims)
+            evicted += len(victims)
+
+        if evicted:
+            self._bump("evictions", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hot.clear()
+        conn = self._conn()
+        if conn is not None:
+            conn.execute("DELETE FROM fetch_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hot_entries"] = len(self._hot)
+        # A stale entry answered by 304 Not Modified counts as a hit: no body was downloaded
+        hits = stats["hot_hits"] + stats["disk_hits"] + stats["revalidated"]
+        lookups = stats["hot_hits"] + stats["disk_hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = hits / lookups if lookups > 0 else 0.0
+
+        conn = self._conn()
+        if conn is not None:
+            try:
+                count, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fetch_cache"
+                ).fetchone()
+                stats["disk_entries"] = count
+                stats["disk_bytes"] = size
+            except sqlite3.Error:
+                pass
+        return stats
+
+
+_CACHE: Optional[FetchCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_fetch_cache() -> FetchCache:
+    """Process-wide FetchCache configured from configs.FETCH_CACHE_*."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = FetchCache(
+                    configs.FETCH_CACHE_PATH,
+                    max_bytes=configs.FETCH_CACHE_MAX_BYTES,
+                    ttl_seconds=configs.FETCH_CACHE_TTL_SECONDS,
+                    max_age_seconds=configs.FETCH_CACHE_MAX_AGE_SECONDS,
+                    hot_size=configs.FETCH_CACHE_HOT_ENTRIES,
+                    negative_ttl_seconds=configs.FETCH_CACHE_NEGATIVE_TTL_SECONDS,
+                )
+    return _CACHE
@@ -1,11 +1,54 @@
 # src/similarity_search/google_client.py
+import asyncio
 import requests
+import aiohttp
 import logging
 from typing import List, Dict, Optional
 from . import configs
+from .rate_limiter import get_provider_gate
+from .search_cache import get_search_cache
+from src.observability import traced, set_attributes
+from src.observability.metrics import provider_call
 
 logger = logging.getLogger(__name__)
 
+
+def _parse_google_items(data: Dict, top_k: int) -> List[Dict]:
+    items = data.get("items", [])[:top_k]
+    return [{
+        "title": it.get("title"),
+        "url": it.get("link"),
+        "snippet": it.get("snippet"),
+        "score": None
+    } for it in items]
+
+
+def build_advanced_query(
+    all_words: Optional[str] = None,
+    important_words: Optional[str] = None,
+    exact_phrase: Optional[str] = None,
+    any_words: Optional[str] = None,
+    exclude_words: Optional[str] = None,
+    number_range: Optional[str] = None,
+) -> str:
+    """Build a CSE query string with operators that mimic Google Advanced Search."""
+    query_parts = []
+
+    if all_words:
+        query_parts.append(all_words)
+    if important_words:
+        query_parts.append(important_words)
+    if exact_phrase:
+        query_parts.append(f'"{exact_phrase}"')  # wrap in quotes
+    if any_words:
+        query_parts.append("(" + " OR ".join(any_words.split()) + ")")
+    if exclude_words:
+        query_parts.append(" ".join([f"-{w}" if not w.startswith('-') else w for w in exclude_words.split()]))
+    if number_range:
+        query_parts.append(number_range)
+
+    return " ".join(query_parts)
+
 def search_google(query: str, top_k: int = 5) -> List[Dict]:
     """
     Uses Google Custom Search JSON API (requires CSE ID + API key).
@@ -23,25 +66,18 @@ def search_google(query: str, top_k: int = 5) -> List[Dict]:
         "num": min(10, top_k)
     }
     try:
-        resp = requests.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=configs.REQUEST_TIMEOUT)
+        with provider_call("google") as call:
+            resp = requests.get(configs.GOOGLE_CSE_URL, params=params, timeout=configs.REQUEST_TIMEOUT)
+            call.status = resp.status_code
         if resp.status_code != 200:
             logger.warning("Google CSE returned %s: %s", resp.status_code, resp.text)
             return []
-        data = resp.json()
-        items = data.get("items", [])[:top_k]
-        cleaned = []
-        for it in items:
-            cleaned.append({
-                "title": it.get("title"),
-                "url": it.get("link"),
-                "snippet": it.get("snippet"),
-                "score": None
-            })
-        return cleaned
+        return _parse_google_items(resp.json(), top_k)
     except Exception as e:
         logger.warning("Google CSE failed: %s", e)
         return []
 
+@traced("search_google_advanced")
 def search_google_advanced(
     all_words: Optional[str] = None,
     important_words: Optional[str] = None,
@@ -53,29 +89,22 @@ def search_google_advanced(
 ) -> List[Dict]:
     """
     Advanced Google search using CSE API with operators to mimic Google Advanced Search.
+    Results are served from / stored in the search cache.
     """
+    query = build_advanced_query(all_words, important_words, exact_phrase,
+                                 any_words, exclude_words, number_range)
+    cache = get_search_cache()
+    cached = cache.get("google", query, top_k=top_k)
+    set_attributes(query_chars=len(query), cached=cached is not None)
+    if cached is not None:
+        return cached
+    if cache.cache_only:
+        return []
+
     if not getattr(configs, "GOOGLE_API_KEY", None) or not getattr(configs, "GOOGLE_CSE_ID", None):
         logger.debug("Google CSE not configured")
         return []
 
-    # Build query string
-    query_parts = []
-
-    if all_words:
-        query_parts.append(all_words)
-    if important_words:
-        query_parts.append(important_words)
-    if exact_phrase:
-        query_parts.append(f'"{exact_phrase}"')  # wrap in quotes
-    if any_words:
-        query_parts.append("(" + " OR ".join(any_words.split()) + ")")
-    if exclude_words:
-        query_parts.append(" ".join([f"-{w}" if not w.startswith('-') else w for w in exclude_words.split()]))
-    if number_range:
-        query_parts.append(number_range)
-
-    query = " ".join(query_parts)
-
     params = {
         "key": configs.GOOGLE_API_KEY,
         "cx": configs.GOOGLE_CSE_ID,
@@ -84,18 +113,69 @@ def search_google_advanced(
     }
 
     try:
-        resp = requests.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=configs.REQUEST_TIMEOUT)
+        with provider_call("google") as call:
+            resp = requests.get(configs.GOOGLE_CSE_URL, params=params, timeout=configs.REQUEST_TIMEOUT)
+            call.status = resp.status_code
         if resp.status_code != 200:
             logger.warning("Google CSE returned %s: %s", resp.status_code, resp.text)
             return []
-        data = resp.json()
-        items = data.get("items", [])[:top_k]
-        return [{
-            "title": it.get("title"),
-            "url": it.get("link"),
-            "snippet": it.get("snippet"),
-            "score": None
-        } for it in items]
+        results = _parse_google_items(resp.json(), top_k)
+        cache.put("google", query, results, top_k=top_k)
+        return results
+
+    except Exception as e:
+        logger.warning("Google CSE failed: %s", e)
+        return []
+
+
+@traced("search_google_advanced")
+async def search_google_advanced_async(
+    session: aiohttp.ClientSession,
+    all_words: Optional[str] = None,
+    important_words: Optional[str] = None,
+    exact_phrase: Optional[str] = None,
+    any_words: Optional[str] = None,
+    exclude_words: Optional[str] = None,
+    number_range: Optional[str] = None,
+    top_k: int = 5
+) -> List[Dict]:
+    """
+    Async variant of search_google_advanced() on a shared aiohttp session,
+    throttled by the "google" provider gate.
+    """
+    query = build_advanced_query(all_words, important_words, exact_phrase,
+                                 any_words, exclude_words, number_range)
+    cache = get_search_cache()
+    cached = cache.get("google", query, top_k=top_k)
+    set_attributes(query_chars=len(query), cached=cached is not None)
+    if cached is not None:
+        return cached
+    if cache.cache_only:
+        return []
+
+    if not getattr(configs, "GOOGLE_API_KEY", None) or not getattr(configs, "GOOGLE_CSE_ID", None):
+        logger.debug("Google CSE not configured")
+        return []
+
+    params = {
+        "key": configs.GOOGLE_API_KEY,
+        "cx": configs.GOOGLE_CSE_ID,
+        "q": query,
+        "num": min(10, top_k)
+    }
+    timeout = aiohttp.ClientTimeout(total=configs.REQUEST_TIMEOUT)
+
+    try:
+        async with get_provider_gate("google"):
+            with provider_call("google") as call:
+                async with session.get(configs.GOOGLE_CSE_URL, params=params, timeout=timeout) as resp:
+                    call.status = resp.status
+                    if resp.status != 200:
+                        logger.warning("Google CSE returned %s: %s", resp.status, await resp.text())
+                        return []
+                    results = _parse_google_items(await resp.json(content_type=None), top_k)
+        cache.put("google", query, results, top_k=top_k)
+        return results
 
     except Exception as e:
         logger.warning("Google CSE failed: %s", e)
@@ -111,7 +191,9 @@ def search_bing(query: str, top_k: int = 5) -> List[Dict]:
     try:
         headers = {"Ocp-Apim-Subscription-Key": configs.BING_API_KEY}
         params = {"q": query, "count": top_k}
-        resp = requests.get("https://api.bing.microsoft.com/v7.0/search", headers=headers, params=params, timeout=configs.REQUEST_TIMEOUT)
+        with provider_call("bing") as call:
+            resp = requests.get(configs.BING_ENDPOINT, headers=headers, params=params, timeout=configs.REQUEST_TIMEOUT)
+            call.status = resp.status_code
         if resp.status_code != 200:
             logger.warning("Bing returned %s", resp.status_code)
             return []
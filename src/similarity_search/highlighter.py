@@ -1,7 +1,7 @@
 # highlighter.py
 import logging
 from typing import Dict, Any, List, Optional
-from src.ingestion.utils import split_sentences_with_offsets
+from src.ingestion.utils import SentenceOffsetIndex
 
 logger = logging.getLogger(__name__)
 
@@ -38,12 +38,16 @@ def enrich_module3_with_user_offsets(module3_json: Dict[str, Any], user_file_tex
     if not module3_json or not user_file_text:
         return module3_json
 
-    user_sentences = split_sentences_with_offsets(user_file_text)
+    offset_index = SentenceOffsetIndex(user_file_text)
+    # One Aho-Corasick pass over the user sentences resolves every evidence sentence
+    offset_index.containing_many(
+        ev.get("sentence", "") for result in module3_json.get("results", []) for ev in result.get("evidence", [])
+    )
 
     for result in module3_json.get("results", []):
         for evidence in result.get("evidence", []):
             sentence = evidence.get("sentence", "")
-            offsets = get_user_file_offsets(sentence, user_sentences)
+            offsets = offset_index.containing(sentence)
             if offsets:
                 evidence["user_file_offsets"] = offsets
             else:
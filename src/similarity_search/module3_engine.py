@@ -1,34 +1,47 @@
 import re
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Iterable, Tuple
 from ahocorasick import Automaton
 from src.ingestion.utils import split_sentences, normalize_text, get_ngrams, split_sentences_with_offsets
-from src.similarity_search.web_fetcher import fetch_full_text
+from src.similarity_search.web_fetcher import fetch_full_text_async
 from src.similarity_search import configs
-from src.similarity_search.similarity_engine import semantic_similarity
+from src.similarity_search.similarity_engine import semantic_similarity, batch_semantic_similarity
+from src.similarity_search.embedding_service import get_embedding_service
+from src.similarity_search.winnowing import FingerprintIndex
+from src.similarity_search.corpus_index import corpus_search_batch
+from src.similarity_search.executors import (
+    get_executor, get_nlp, get_thread_executor, stage_backend,
+    fuzzy_offsets_batch, fuzzy_offsets_by_key, meaningful_batch, semantic_batch,
+)
+from src.observability import span, traced, set_attributes
 import spacy
 from spacy.tokens import Doc
 import asyncio
 import aiohttp
 from aiohttp import ClientTimeout
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 import mimetypes
 import difflib
-from src.ingestion.utils import find_sentence_offsets_in_text
+from src.ingestion.utils import SentenceOffsetIndex
 
 logger = logging.getLogger(__name__)
 
 # ============================================================
 # Global executor + concurrency controls
 # ============================================================
-GLOBAL_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+# Thread backend shared by all stages; see executors.py for the per-stage process pools
+GLOBAL_EXECUTOR = get_thread_executor()
 DEFAULT_FETCH_SEMAPHORE = asyncio.Semaphore(20)
 
 # ============================================================
 # Load spaCy once
 # ============================================================
-nlp = spacy.load("en_core_web_sm")
+nlp = get_nlp()
 
 # ============================================================
 # Async executor helpers
@@ -37,6 +50,10 @@ nlp = spacy.load("en_core_web_sm")
 
 def add_offsets_to_module3_json(module3_json: Dict[str, Any], raw_text: str) -> Dict[str, Any]:
     updated = module3_json.copy()
+    offset_index = SentenceOffsetIndex(raw_text)
+    offset_index.find_many(
+        ev.get("sentence") for result in updated.get("results", []) for ev in result.get("evidence", [])
+    )
 
     for result in updated.get("results", []):
         for evidence in result.get("evidence", []):
@@ -44,7 +61,7 @@ def add_offsets_to_module3_json(module3_json: Dict[str, Any], raw_text: str) ->
             if not sentence:
                 continue
 
-            start, end = find_sentence_offsets_in_text(sentence, raw_text)
+            start, end = offset_index.find(sentence)
             # fallback to -1 if not found or None
             start = start if isinstance(start, int) else -1
             end = end if isinstance(end, int) else -1
@@ -57,14 +74,37 @@ def add_offsets_to_module3_json(module3_json: Dict[str, Any], raw_text: str) ->
 async def run_in_executor(func, *args, **kwargs):
     loop = asyncio.get_running_loop()
     fn = partial(func, *args, **kwargs)
-    return await loop.run_in_executor(GLOBAL_EXECUTOR, fn)
+    # Copy the context so spans opened in the worker nest under the caller's
+    return await loop.run_in_executor(GLOBAL_EXECUTOR, contextvars.copy_context().run, fn)
 
+async def run_stage(stage: str, func, *args):
+    """Run a batch job on the executor configured for `stage` (thread or process pool)."""
+    loop = asyncio.get_running_loop()
+    executor = get_executor(stage)
+    with span(f"stage.{stage}", func=getattr(func, "__name__", str(func))):
+        if isinstance(executor, ThreadPoolExecutor):
+            return await loop.run_in_executor(executor, contextvars.copy_context().run, func, *args)
+        return await loop.run_in_executor(executor, func, *args)
+
+async def fuzzy_offsets(sentences: List[str], offset_index: SentenceOffsetIndex) -> List[Dict[str, int]]:
+    """Fuzzy user-file offsets on the "fuzzy" stage, without re-pickling the index on every call."""
+    if stage_backend("fuzzy") != "process":
+        return await run_stage("fuzzy", fuzzy_offsets_batch, sentences, offset_index)
+    # Workers cache the index per document; the sentences travel only to a worker that lacks it
+    key = offset_index.fingerprint()
+    offsets = await run_stage("fuzzy", fuzzy_offsets_by_key, key, sentences)
+    if offsets is None:
+        offsets = await run_stage("fuzzy", fuzzy_offsets_by_key, key, sentences, offset_index.sentences)
+    return offsets
+
+@traced("spacy.pipe")
 async def batch_spacy_process(texts: Iterable[str], batch_size: int = 64) -> List[Doc]:
     def _pipe(texts_slice):
         return list(nlp.pipe(texts_slice, batch_size=32))
 
     results = []
     texts = list(texts)
+    set_attributes(texts=len(texts))
     for i in range(0, len(texts), batch_size):
         slice_texts = texts[i:i + batch_size]
         docs = await run_in_executor(_pipe, slice_texts)
@@ -74,20 +114,86 @@ async def batch_spacy_process(texts: Iterable[str], batch_size: int = 64) -> Lis
 async def async_semantic_similarity(a: str, b: str) -> float:
     return await run_in_executor(semantic_similarity, a, b)
 
+async def async_batch_semantic_similarity(pairs: List[Tuple[str, str]],
+                                          chunk_size: Optional[int] = None) -> List[float]:
+    """
+    Score many (sentence, snippet) pairs with batched encodes instead of one
+    executor job per pair. Large inputs are split into chunks of `chunk_size` pairs.
+    """
+    chunk_size = chunk_size or configs.SEMANTIC_BATCH_PAIRS
+    scores: List[float] = []
+    for i in range(0, len(pairs), chunk_size):
+        scores.extend(await run_stage("embed", semantic_batch, pairs[i:i + chunk_size]))
+    return scores
+
+async def score_evidence_semantics(evidence: List[Dict[str, Any]]) -> None:
+    """
+    Fill in `semantic_similarity` for every evidence item that is still pending (None),
+    using a single batched scoring pass.
+    """
+    pending = [ev for ev in evidence if ev.get("semantic_similarity") is None]
+    if not pending:
+        return
+
+    pairs = [(ev.get("sentence") or "", ev.get("source_text") or "") for ev in pending]
+    with span("module3.semantic_scoring", pairs=len(pairs)):
+        try:
+            scores = await async_batch_semantic_similarity(pairs)
+        except Exception as e:
+            logger.warning("batched semantic_similarity failed for %d pairs: %s", len(pairs), e)
+            scores = [0.0] * len(pending)
+
+    for ev, score in zip(pending, scores):
+        ev["semantic_similarity"] = round(float(score), 2)
+
 # ============================================================
 # Sentence meaningfulness
 # ============================================================
+_MEANINGFUL_CACHE: "OrderedDict[str, bool]" = OrderedDict()
+_MEANINGFUL_LOCK = threading.Lock()
+
+
+def _sentence_key(sentence: str) -> str:
+    return hashlib.sha1(sentence.encode("utf-8")).hexdigest()
+
+
 async def are_meaningful_sentences(sentences: List[str], batch_size: int = 64) -> List[bool]:
-    results = [False] * len(sentences)
+    """
+    Meaningfulness flag per sentence (>= 3 words, a verb and a nominal subject).
+    Verdicts are cached by sentence hash, so only unseen sentences reach spaCy,
+    de-duplicated and in batches of `batch_size`.
+    """
     if not sentences:
-        return results
-
-    docs = await batch_spacy_process(sentences, batch_size=batch_size)
-    for i, doc in enumerate(docs):
-        has_verb = any(tok.pos_ == "VERB" for tok in doc)
-        has_nsubj = any(tok.dep_ in {"nsubj", "nsubjpass"} for tok in doc)
-        results[i] = (len(sentences[i].split()) >= 3) and has_verb and has_nsubj
-    return results
+        return []
+
+    keys = [_sentence_key(s) for s in sentences]
+    known: Dict[str, bool] = {}
+    missing: Dict[str, str] = {}
+    with _MEANINGFUL_LOCK:
+        for key, sent in zip(keys, sentences):
+            if key in known or key in missing:
+                continue
+            flag = _MEANINGFUL_CACHE.get(key)
+            if flag is None:
+                missing[key] = sent
+            else:
+                _MEANINGFUL_CACHE.move_to_end(key)
+                known[key] = flag
+
+    if missing:
+        missing_keys = list(missing)
+        with span("spacy.meaningful", sentences=len(sentences), uncached=len(missing_keys)):
+            for i in range(0, len(missing_keys), batch_size):
+                slice_keys = missing_keys[i:i + batch_size]
+                flags = await run_stage("nlp", meaningful_batch, [missing[k] for k in slice_keys])
+                known.update(zip(slice_keys, flags))
+        with _MEANINGFUL_LOCK:
+            for key in missing_keys:
+                _MEANINGFUL_CACHE[key] = known[key]
+            while len(_MEANINGFUL_CACHE) > configs.MEANINGFUL_CACHE_SIZE:
+                _MEANINGFUL_CACHE.popitem(last=False)
+
+    return [known[k] for k in keys]
 
 # ============================================================
 # PDF detection
@@ -121,24 +227,214 @@ def compute_sentence_level_highlight(sentence: str, source_text: str):
         return None
     return {"start": match.a, "end": match.a + match.size}
 
-def extract_best_snippet(sentence: str, source_text: str) -> str:
+def build_token_index(tokens: List[str]) -> Dict[str, List[int]]:
+    """Inverted index: token -> ascending positions in `tokens`."""
+    index: Dict[str, List[int]] = {}
+    for pos, tok in enumerate(tokens):
+        index.setdefault(tok, []).append(pos)
+    return index
+
+
+def best_window(words: set, n_tokens: int, token_index: Dict[str, List[int]]) -> Tuple[int, int]:
+    """
+    Earliest window of len(words) tokens covering the most distinct `words`.
+    Returns (start, overlap); overlap is 0 when no window matches.
+
+    The overlap only goes up when a matching token enters the window, so the
+    earliest best window starts at 0 or at p - w + 1 for some occurrence p.
+    Only those starts are evaluated, sliding over the merged occurrence list
+    with per-word counts: O(k log k) in the k occurrences of the sentence's
+    words, instead of rebuilding a set at every source position.
+    """
+    window_size = max(1, len(words))
+    if n_tokens < window_size:
+        return 0, 0
+    occurrences = sorted(
+        (pos, tok) for tok in words for pos in token_index.get(tok, ())
+    )
+    if not occurrences:
+        return 0, 0
+
+    starts = sorted({0} | {max(0, pos - window_size + 1) for pos, _ in occurrences})
+    counts: Dict[str, int] = {}
+    lo = hi = 0
+    best_start, max_overlap = 0, 0
+    for start in starts:
+        end = start + window_size
+        while hi < len(occurrences) and occurrences[hi][0] < end:
+            tok = occurrences[hi][1]
+            counts[tok] = counts.get(tok, 0) + 1
+            hi += 1
+        while lo < hi and occurrences[lo][0] < start:
+            tok = occurrences[lo][1]
+            counts[tok] -= 1
+            if not counts[tok]:
+                del counts[tok]
+            lo += 1
+        if len(counts) > max_overlap:
+            max_overlap = len(counts)
+            best_start = start
+    return best_start, max_overlap
+
+
+def extract_best_snippet(sentence: str, source_text: str,
+                         token_index: Optional[Dict[str, List[int]]] = None) -> str:
     words = set(sentence.split())
     src_words = source_text.split()
-    max_overlap, best_start, best_end = 0, 0, 0
-    window_size = max(1, len(words))
-    for i in range(0, max(0, len(src_words) - window_size + 1)):
-        window_words = set(src_words[i:i + window_size])
-        overlap = len(words & window_words)
-        if overlap > max_overlap:
-            max_overlap = overlap
-            best_start, best_end = i, i + window_size
+    if token_index is None:
+        token_index = build_token_index(src_words)
+    best_start, max_overlap = best_window(words, len(src_words), token_index)
+    best_end = best_start + max(1, len(words))
     return " ".join(src_words[best_start:best_end]) if max_overlap > 0 else source_text[:min(200, len(source_text))]
 
-async def idea_similarity_evidence(sentence: str) -> Dict[str, Any]:     # Check if the sentence is meaningful
-    meaningful_list: List[bool] = await are_meaningful_sentences([sentence])
-    
+# ============================================================
+# Multi-pattern exact matching
+# ============================================================
+class SentenceAutomaton:
+    """
+    Aho-Corasick automaton over the normalized user sentences of a document.
+    One linear pass over a source yields the first hit offset of every
+    sentence, instead of one substring search per sentence per source.
+    Scan results are memoized per text, so a source shared by several
+    blocks is only scanned once.
+    """
+
+    def __init__(self, sentences: Iterable[str]):
+        self._automaton = Automaton()
+        for sent in sentences:
+            norm = normalize_text(sent)
+            if norm and norm not in self._automaton:
+                self._automaton.add_word(norm, norm)
+        if len(self._automaton):
+            self._automaton.make_automaton()
+        self._scans: Dict[str, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._automaton)
+
+    def first_hits(self, text_norm: str) -> Dict[str, int]:
+        """{normalized sentence: start offset of its first occurrence in text_norm}."""
+        hits = self._scans.get(text_norm)
+        if hits is not None:
+            return hits
+        hits = {}
+        if len(self._automaton) and text_norm:
+            # Hits are reported in order of end offset, so the first one seen per pattern is the leftmost
+            for end, pattern in self._automaton.iter(text_norm):
+                if pattern not in hits:
+                    hits[pattern] = end - len(pattern) + 1
+        self._scans[text_norm] = hits
+        return hits
+
+    def first_containing(self, texts_norm: List[str]) -> Dict[str, int]:
+        """{normalized sentence: index of the first text in texts_norm containing it}."""
+        found: Dict[str, int] = {}
+        if not len(self._automaton):
+            return found
+        for i, text in enumerate(texts_norm):
+            for _, pattern in self._automaton.iter(text):
+                if pattern not in found:
+                    found[pattern] = i
+        return found
+
+
+class PreparedSource:
+    """
+    A source text preprocessed once per submission and shared by every block
+    that cites it. Sentence splits and embeddings are computed on first use.
+    """
+
+    def __init__(self, text: str, url: Optional[str] = None):
+        self.url = url
+        self.text = text
+        self.norm = normalize_text(text)
+        self.tokens = self.norm.split()
+        self.token_set = set(self.tokens)
+        self._sentences: Optional[List[str]] = None
+        self._sentence_norms: Optional[List[str]] = None
+        self._sentence_hits: Dict[SentenceAutomaton, Dict[str, int]] = {}
+        self._token_index: Optional[Dict[str, List[int]]] = None
+        self._embeddings = None
+
+    @property
+    def token_index(self) -> Dict[str, List[int]]:
+        """Inverted index over self.tokens (token -> positions)."""
+        if self._token_index is None:
+            self._token_index = build_token_index(self.tokens)
+        return self._token_index
+
+    def overlap_ratio(self, words: set) -> float:
+        """Share of `words` that occur anywhere in the source."""
+        return len(words & self.token_set) / max(len(words), 1)
+
+    def best_snippet(self, sentence: str) -> str:
+        """extract_best_snippet(sentence, self.norm) using the prebuilt token index."""
+        return extract_best_snippet(sentence, self.norm, token_index=self.token_index)
+
+    @property
+    def sentences(self) -> List[str]:
+        if self._sentences is None:
+            self._sentences = split_sentences(self.text)
+        return self._sentences
+
+    @property
+    def sentence_norms(self) -> List[str]:
+        if self._sentence_norms is None:
+            self._sentence_norms = [normalize_text(s) for s in self.sentences]
+        return self._sentence_norms
+
+    def sentence_hits(self, automaton: SentenceAutomaton) -> Dict[str, int]:
+        """First source sentence containing each automaton pattern (memoized per automaton)."""
+        hits = self._sentence_hits.get(automaton)
+        if hits is None:
+            hits = automaton.first_containing(self.sentence_norms)
+            self._sentence_hits[automaton] = hits
+        return hits
+
+    @property
+    def sentence_embeddings(self):
+        """(n_sentences, D) normalized embeddings of the source sentences."""
+        if self._embeddings is None:
+            self._embeddings = get_embedding_service().encode_many(self.sentences, normalize=True)
+        return self._embeddings
+
+
+class BlockContext:
+    """
+    Per-block invariants, computed once and shared by every candidate source:
+    key sentences, meaningful flags, normalized forms, token sets and the
+    user-file offset index.
+    """
+
+    def __init__(self, sentences: List[str], meaningful_flags: List[bool],
+                 offset_index: Optional[SentenceOffsetIndex] = None, user_file_text: str = ""):
+        self.sentences = sentences
+        self.meaningful_flags = meaningful_flags
+        self.norms = [normalize_text(s) for s in sentences]
+        self.token_sets = [set(s.split()) for s in sentences]
+        self.offset_index = offset_index if offset_index is not None else SentenceOffsetIndex(user_file_text)
+
+    def unmatched(self, matched: set) -> List[int]:
+        """Indices of the sentences not in `matched`."""
+        return [i for i, s in enumerate(self.sentences) if s not in matched]
+
+    def select(self, ids: List[int]) -> Tuple[List[str], List[bool], List[str], List[set]]:
+        """(sentences, meaningful_flags, norms, token_sets) for a subset of the sentences."""
+        return (
+            [self.sentences[i] for i in ids],
+            [self.meaningful_flags[i] for i in ids],
+            [self.norms[i] for i in ids],
+            [self.token_sets[i] for i in ids],
+        )
+
+
+async def idea_similarity_evidence(sentence: str, meaningful: Optional[bool] = None) -> Dict[str, Any]:
+    # Check if the sentence is meaningful (callers that already classified it pass the flag)
+    if meaningful is None:
+        meaningful = (await are_meaningful_sentences([sentence]))[0]
+
     # If the sentence is not meaningful, return an empty dict or some default
-    if not meaningful_list[0]:
+    if not meaningful:
         return {}  # or you could return None if you prefer
     
     # Otherwise, construct the evidence dict
@@ -160,65 +456,73 @@ async def exact_match_evidence(
     source_text: str,
     source_url: str,
     user_file_sentences: Optional[List[Dict[str, Any]]] = None,
-    meaningful_flags: Optional[List[bool]] = None
+    meaningful_flags: Optional[List[bool]] = None,
+    score_semantics: bool = True,
+    automaton: Optional[SentenceAutomaton] = None,
+    source: Optional[PreparedSource] = None,
+    offset_index: Optional[SentenceOffsetIndex] = None,
+    norms: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """
     Generate exact match evidence for sentences found inside source_text.
-    Adds user_file_offsets if user_file_sentences is provided.
+    Adds user_file_offsets if user_file_sentences (or its prebuilt
+    offset_index) is provided.
+    With score_semantics=False, semantic_similarity is left as None so the
+    caller can score a larger batch via score_evidence_semantics().
+    `automaton` may cover more sentences than `sentences` (e.g. the whole
+    document); one is built for `sentences` when it is not given.
+    `source` is the PreparedSource for source_text and `norms` the
+    normalized sentences, when the caller has precomputed them.
     """
     evidence = []
-    source_sentences = split_sentences(source_text)
-    source_text_norm = normalize_text(source_text)
+    if source is None:
+        source = PreparedSource(source_text, source_url)
+    if norms is None:
+        norms = [normalize_text(s) for s in sentences]
 
     if meaningful_flags is None:
         meaningful_flags = await are_meaningful_sentences(sentences)
+    if automaton is None:
+        automaton = SentenceAutomaton(sentences)
+
+    hits = automaton.first_hits(source.norm)
 
     tasks = []
-    for idx, sent in enumerate(sentences):
-        sent_norm = normalize_text(sent)
-        if sent_norm in source_text_norm and meaningful_flags[idx]:
-            start_idx = source_text_norm.find(sent_norm)
+    for idx, (sent, sent_norm) in enumerate(zip(sentences, norms)):
+        start_idx = hits.get(sent_norm)
+        if start_idx is not None and meaningful_flags[idx]:
             snippet = source_text[start_idx:start_idx + len(sent_norm)]
             tasks.append((sent, snippet, source_url))
-        else:
-            # fallback to sentence-level matching
-            for i, src_sent in enumerate(source_sentences):
-                if sent_norm in normalize_text(src_sent):
-                    snippet = " ".join(source_sentences[max(0, i - 1): min(len(source_sentences), i + 2)])
-                    tasks.append((sent, snippet, source_url))
-                    break
-
-    sem_tasks = [async_semantic_similarity(t[0], t[1]) for t in tasks]
-    sem_scores = await asyncio.gather(*sem_tasks, return_exceptions=True)
-
-    for (sent, snippet, src_url), sem_score in zip(tasks, sem_scores):
-        if isinstance(sem_score, BaseException):
-            logger.warning("semantic_similarity failed for %s: %s", src_url, sem_score)
-            sem_score = 0.0
-        else:
-            sem_score = float(sem_score)
-
-        # compute user file offsets if available
-        user_offsets = None
-        if user_file_sentences:
-            for u_sent in user_file_sentences:
-                if sent in u_sent["sentence"]:
-                    user_offsets = {"start": u_sent["start"], "end": u_sent["end"]}
-                    break
-            if not user_offsets:
-                user_offsets = {"start": -1, "end": -1}
+            continue
+
+        # fallback to sentence-level matching, computed once per source on first need
+        i = source.sentence_hits(automaton).get(sent_norm)
+        if i is not None:
+            source_sentences = source.sentences
+            snippet = " ".join(source_sentences[max(0, i - 1): min(len(source_sentences), i + 2)])
+            tasks.append((sent, snippet, source_url))
+
+    # compute user file offsets if available
+    if offset_index is None and user_file_sentences:
+        offset_index = SentenceOffsetIndex(sentences=user_file_sentences)
+    offsets: List[Optional[Dict[str, int]]] = [None] * len(tasks)
+    if offset_index is not None and len(offset_index):
+        offsets = [o or {"start": -1, "end": -1} for o in offset_index.containing_many(t[0] for t in tasks)]
 
+    for (sent, snippet, src_url), user_offsets in zip(tasks, offsets):
         evidence.append({
             "sentence": sent,
             "type": "exact_match",
             "source_text": snippet,
             "plagiarism_score": 0.99,
-            "semantic_similarity": round(sem_score, 2),
+            "semantic_similarity": None,
             "source_url": src_url,
             # "highlights": [{"start": 0, "end": len(snippet), "type": "exact"}],
             "user_file_offsets": user_offsets
         })
 
+    if score_semantics:
+        await score_evidence_semantics(evidence)
     return evidence
 
 
@@ -228,11 +532,18 @@ async def paraphrase_match_evidence(
     source_url: str,
     skip_sents: set,
     meaningful_flags: Optional[List[bool]] = None,
-    user_file_sentences: Optional[List[Dict[str, Any]]] = None
+    user_file_sentences: Optional[List[Dict[str, Any]]] = None,
+    score_semantics: bool = True,
+    source: Optional[PreparedSource] = None,
+    offset_index: Optional[SentenceOffsetIndex] = None,
+    token_sets: Optional[List[set]] = None
 ) -> List[Dict[str, Any]]:
 
     evidence = []
-    source_text_norm = normalize_text(source_text)
+    if source is None:
+        source = PreparedSource(source_text, source_url)
+    if token_sets is None:
+        token_sets = [set(s.split()) for s in sentences]
 
     if meaningful_flags is None:
         meaningful_flags = await are_meaningful_sentences(sentences)
@@ -242,24 +553,22 @@ async def paraphrase_match_evidence(
         if sent in skip_sents or not meaningful_flags[idx]:
             continue
 
-        sent_words = set(sent.split())
-        src_words = source_text_norm.split()
-        overlap = len(sent_words & set(src_words)) / max(len(sent_words), 1)
+        overlap = source.overlap_ratio(token_sets[idx])
 
         if 0.4 <= overlap < 0.99:
-            snippet = extract_best_snippet(sent, source_text_norm)
+            snippet = source.best_snippet(sent)
             tasks.append((sent, snippet, source_url))
 
-    sem_tasks = [async_semantic_similarity(t[0], t[1]) for t in tasks]
-    sem_scores = await asyncio.gather(*sem_tasks, return_exceptions=True)
-
-    for (orig_sentence, source_sentence, src_url), sem_score in zip(tasks, sem_scores):
-        if isinstance(sem_score, BaseException):
-            logger.warning("semantic_similarity failed for paraphrase: %s", sem_score)
-            sem_score = 0.0
-        else:
-            sem_score = float(sem_score)
+    # ----------------------------
+    # Compute user_file_offsets (difflib against shingle-index candidates, one batch job)
+    # ----------------------------
+    if offset_index is None and user_file_sentences:
+        offset_index = SentenceOffsetIndex(sentences=user_file_sentences)
+    offsets: List[Optional[Dict[str, int]]] = [None] * len(tasks)
+    if offset_index is not None and len(offset_index) and tasks:
+        offsets = await fuzzy_offsets([t[0] for t in tasks], offset_index)
 
+    for (orig_sentence, source_sentence, src_url), user_offsets in zip(tasks, offsets):
         plagiarism_overlap = round(
             len(set(orig_sentence.split()) & set(normalize_text(source_sentence).split())) / max(len(orig_sentence.split()), 1), 2
         )
@@ -267,30 +576,18 @@ async def paraphrase_match_evidence(
         # sentence_level_highlight = compute_sentence_level_highlight(orig_sentence, source_sentence)
         # char_spans = compute_character_highlight_spans(orig_sentence, source_sentence)
 
-        # ----------------------------
-        # Compute user_file_offsets
-        # ----------------------------
-        user_offsets = None
-        if user_file_sentences:
-            for u_sent in user_file_sentences:
-                # fuzzy match using difflib
-                seq = difflib.SequenceMatcher(None, orig_sentence, u_sent["sentence"])
-                if seq.ratio() > 0.7:
-                    user_offsets = {"start": u_sent["start"], "end": u_sent["end"]}
-                    break
-            if not user_offsets:
-                user_offsets = {"start": -1, "end": -1}
-
         evidence.append({
             "sentence": orig_sentence,
             "type": "paraphrased_match",
             "source_text": source_sentence,
             "plagiarism_score": plagiarism_overlap,
-            "semantic_similarity": round(sem_score, 2),
+            "semantic_similarity": None,
             "source_url": src_url,
             "user_file_offsets": user_offsets
         })
 
+    if score_semantics:
+        await score_evidence_semantics(evidence)
     return evidence
 
 # ============================================================
@@ -302,20 +599,30 @@ async def fetch_url_text(session: aiohttp.ClientSession, url: str, fetch_semapho
         return url, None, True
     async with fetch_semaphore:
         try:
-            text = await run_in_executor(fetch_full_text, url)
+            text = await fetch_full_text_async(session, url, executor=get_executor("extract"))
             return url, text, False
         except Exception as e:
             logger.warning("Failed to fetch text from %s: %s", url, e)
             return url, None, False
 
 class Fetcher:
-    def __init__(self, concurrency: int = 20, timeout_seconds: int = 30):
-        self._connector = aiohttp.TCPConnector(limit=concurrency)
+    def __init__(self, concurrency: int = 20, timeout_seconds: int = 30,
+                 limit_per_host: Optional[int] = None):
+        self._concurrency = concurrency
+        self._limit_per_host = limit_per_host or configs.FETCH_LIMIT_PER_HOST
         self._timeout = ClientTimeout(total=timeout_seconds)
+        self._connector: Optional[aiohttp.TCPConnector] = None
         self._session: Optional[aiohttp.ClientSession] = None
         self._semaphore = asyncio.Semaphore(concurrency)
 
     async def __aenter__(self):
+        # Connector is created inside the running loop; keep-alive connections are reused across URLs
+        self._connector = aiohttp.TCPConnector(
+            limit=self._concurrency,
+            limit_per_host=self._limit_per_host,
+            keepalive_timeout=configs.FETCH_KEEPALIVE_SECONDS,
+            ttl_dns_cache=300,
+        )
         self._session = aiohttp.ClientSession(connector=self._connector, timeout=self._timeout)
         return self
 
@@ -323,7 +630,9 @@ class Fetcher:
         if self._session:
             await self._session.close()
             self._session = None
-        await self._connector.close()
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
 
     @property
     def semaphore(self):
@@ -345,95 +654,250 @@ async def fetch_urls_in_batches_async(urls: List[str], batch_size: int = 20, con
             results.extend(await fetcher.fetch_batch(batch))
     return results
 
+
+class SourceRegistry:
+    """
+    Document-scoped registry of candidate sources. Every URL cited by any
+    block is fetched once, and every distinct source text is preprocessed
+    once into a PreparedSource that all blocks share.
+    """
+
+    def __init__(self):
+        self._texts: Dict[str, Optional[str]] = {}
+        self._skipped_pdfs: set = set()
+        self._prepared: Dict[str, PreparedSource] = {}
+
+    async def fetch_all(self, urls: Iterable[str], concurrency: int = 20) -> None:
+        """Fetch every URL not fetched yet, all through one pooled session."""
+        pending = list(dict.fromkeys(u for u in urls if u and u not in self._texts))
+        if not pending:
+            return
+        with span("module3.fetch", urls=len(pending)) as sp:
+            async with Fetcher(concurrency=concurrency) as fetcher:
+                fetched = await fetcher.fetch_batch(pending)
+            sp.set_attribute("fetched", sum(1 for _, text, _ in fetched if text))
+        for url, text, skipped_pdf in fetched:
+            self._texts[url] = text
+            if skipped_pdf:
+                self._skipped_pdfs.add(url)
+        logger.debug("Source registry fetched %d unique URLs", len(pending))
+
+    def text(self, url: Optional[str]) -> Optional[str]:
+        return self._texts.get(url) if url else None
+
+    def is_skipped_pdf(self, url: Optional[str]) -> bool:
+        return url in self._skipped_pdfs
+
+    def fetched(self) -> Iterable[Tuple[str, str]]:
+        """(url, text) for every URL fetched successfully."""
+        return ((url, text) for url, text in self._texts.items() if text)
+
+    def prepare(self, text: str, url: Optional[str] = None) -> PreparedSource:
+        """PreparedSource for `text`; search snippets used as fallbacks are keyed the same way."""
+        source = self._prepared.get(text)
+        if source is None:
+            source = PreparedSource(text, url)
+            self._prepared[text] = source
+        return source
+
+    def __len__(self) -> int:
+        return len(self._prepared)
+
 # ============================================================
 # Main evidence generator
 # ============================================================
+@traced("module3.block")
 async def generate_sentence_level_evidence_async(block: Dict[str, Any],
                                                  batch_size: int = 20,
                                                  concurrency: int = 20,
-                                                 nlp_batch_size: int = 64):
+                                                 nlp_batch_size: int = 64,
+                                                 score_semantics: bool = True,
+                                                 automaton: Optional[SentenceAutomaton] = None,
+                                                 registry: Optional[SourceRegistry] = None):
 
     sentences = split_sentences(block.get("key_sentences", ""))
+    set_attributes(block_id=block.get("block_id"), sentences=len(sentences),
+                   candidates=len(block.get("candidates", [])))
     if not sentences:
         return {"evidence": [], "skipped_pdf_urls": []}
+    if automaton is None:
+        automaton = SentenceAutomaton(sentences)
 
     candidate_urls = [c.get("url") for c in block.get("candidates", []) if c.get("url")]
-    url_results = {url: None for url in candidate_urls}
-    skipped_pdfs = []
-
-    fetched = await fetch_urls_in_batches_async(candidate_urls, batch_size=batch_size, concurrency=concurrency)
-    for url, text, skipped_pdf in fetched:
-        if skipped_pdf:
-            skipped_pdfs.append(url)
-        url_results[url] = text
+    if registry is None:
+        registry = SourceRegistry()
+    # No-op for URLs the document-level registry already fetched
+    await registry.fetch_all(candidate_urls, concurrency=concurrency)
+    skipped_pdfs = [url for url in candidate_urls if registry.is_skipped_pdf(url)]
 
     meaningful_flags = await are_meaningful_sentences(sentences, batch_size=nlp_batch_size)
 
+    # Per-block invariants, computed once and shared by every candidate
+    ctx = BlockContext(sentences, meaningful_flags, user_file_text=block.get("user_file_text", ""))
+
     evidence_list: List[Dict[str, Any]] = []
     exact_matched = set()
     paraphrased_matched = set()
 
-    # -------------------------------
-    # Candidate loop
-    # -------------------------------
+    # Resolve every candidate to its shared PreparedSource up front
+    candidate_sources = []
     for candidate in block.get("candidates", []):
         url = candidate.get("url")
-        snippet = candidate.get("snippet", "")
-        source_text = url_results.get(url) or snippet
-        if not source_text:
-            continue
-        
-        user_file_sentences = split_sentences_with_offsets(block.get("user_file_text", ""))
-        ex = await exact_match_evidence(sentences, source_text, url, meaningful_flags=meaningful_flags,user_file_sentences=user_file_sentences)
-        evidence_list.extend(ex)
-        exact_matched.update(ev["sentence"] for ev in ex)
+        source_text = registry.text(url) or candidate.get("snippet", "")
+        if source_text:
+            candidate_sources.append((url, registry.prepare(source_text, url)))
 
-        remaining = [s for s in sentences if s not in exact_matched]
-        if remaining:
-            idx_map = {s: i for i, s in enumerate(sentences)}
-            remaining_flags = [meaningful_flags[idx_map[s]] for s in remaining]
-
-            pr = await paraphrase_match_evidence(remaining, source_text, url, skip_sents=set(), meaningful_flags=remaining_flags, user_file_sentences=user_file_sentences)
-            evidence_list.extend(pr)
-            paraphrased_matched.update(ev["sentence"] for ev in pr)
+    # -------------------------------
+    # Candidate loop
+    # -------------------------------
+    for url, source in candidate_sources:
+        with span("module3.candidate", url=url):
+            ex = await exact_match_evidence(sentences, source.text, url, meaningful_flags=meaningful_flags,
+                                            offset_index=ctx.offset_index, score_semantics=False,
+                                            automaton=automaton, source=source, norms=ctx.norms)
+            evidence_list.extend(ex)
+            exact_matched.update(ev["sentence"] for ev in ex)
+
+            remaining = ctx.unmatched(exact_matched)
+            if remaining:
+                rem_sentences, rem_flags, _, rem_token_sets = ctx.select(remaining)
+                pr = await paraphrase_match_evidence(rem_sentences, source.text, url, skip_sents=set(),
+                                                     meaningful_flags=rem_flags, offset_index=ctx.offset_index,
+                                                     score_semantics=False, source=source, token_sets=rem_token_sets)
+                evidence_list.extend(pr)
+                paraphrased_matched.update(ev["sentence"] for ev in pr)
 
     # Idea match fallback
-    for s in sentences:
+    for s, meaningful in zip(sentences, meaningful_flags):
         if s not in exact_matched and s not in paraphrased_matched:
-            ev = await idea_similarity_evidence(s)
+            ev = await idea_similarity_evidence(s, meaningful=meaningful)
             if ev:
                 evidence_list.append(ev)
 
+    if score_semantics:
+        await score_evidence_semantics(evidence_list)
+
+    set_attributes(evidence=len(evidence_list))
     return {"evidence": evidence_list, "skipped_pdf_urls": skipped_pdfs}
 
 # ============================================================
 # Module 3 processor
 # ============================================================
+def fingerprint_matches(raw_text: str, sources: Iterable[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Winnowing fingerprints shared between the user document and every
+    (url, text) source, found with one document-scoped index lookup pass.
+    """
+    index = FingerprintIndex(k=configs.FINGERPRINT_K, window=configs.FINGERPRINT_WINDOW)
+    for url, text in sources:
+        index.add(url, text)
+    if not len(index) or not raw_text:
+        return []
+    matches = index.match(raw_text, min_fingerprints=configs.FINGERPRINT_MIN_MATCHES)
+    return [{"source_url": m.pop("source"), **m} for m in matches]
+
+
+@traced("module3.corpus")
+async def corpus_match_evidence(sentences: List[str], doc_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Nearest sentences from the local corpus index (prior submissions) for every
+    meaningful sentence, keyed by sentence. Sentences of `doc_id` itself are skipped.
+    """
+    unique = list(dict.fromkeys(sentences))
+    flags = await are_meaningful_sentences(unique)
+    queries = [s for s, meaningful in zip(unique, flags) if meaningful]
+    if not queries:
+        return {}
+    try:
+        hits = await run_stage("embed", corpus_search_batch, queries, doc_id)
+    except Exception as e:
+        logger.warning("Corpus index lookup failed for %d sentences: %s", len(queries), e)
+        return {}
+
+    evidence: Dict[str, List[Dict[str, Any]]] = {}
+    for sent, neighbours in zip(queries, hits):
+        for hit in neighbours:
+            if hit["score"] < configs.CORPUS_MATCH_THRESHOLD:
+                continue
+            evidence.setdefault(sent, []).append({
+                "sentence": sent,
+                "type": "corpus_match",
+                "source_text": hit["sentence"],
+                "plagiarism_score": round(hit["score"], 2),
+                "semantic_similarity": round(hit["score"], 2),
+                "source_url": None,
+                "source_doc_id": hit["doc_id"],
+                "source_section": hit["section"],
+            })
+    return evidence
+
+
+@traced("module3.process")
 async def process_module3(module2_json: dict, raw_text: str,
                           batch_size: int = 20,
                           concurrency: int = 20,
-                          nlp_batch_size: int = 64) -> dict:
+                          nlp_batch_size: int = 64,
+                          include_fingerprints: bool = False,
+                          include_corpus: Optional[bool] = None) -> dict:
     results = []
     doc_id = module2_json.get("doc_id", "unknown")
     blocks = module2_json.get("blocks", [])
 
     block_semaphore = asyncio.Semaphore(concurrency)
 
+    document_sentences = [s for block in blocks for s in split_sentences(block.get("key_sentences", ""))]
+    set_attributes(doc_id=doc_id, blocks=len(blocks), sentences=len(document_sentences), chars=len(raw_text))
+
+    # One automaton over every key sentence in the document, shared by all blocks
+    automaton = SentenceAutomaton(document_sentences)
+
+    # Classify every sentence once up front; blocks then read the cached verdicts
+    await are_meaningful_sentences(document_sentences, batch_size=nlp_batch_size)
+
+    # Prior submissions from the local corpus index, looked up alongside the web candidates
+    if include_corpus is None:
+        include_corpus = configs.CORPUS_INDEX_ENABLED
+    corpus_task = asyncio.create_task(corpus_match_evidence(document_sentences, doc_id)) if include_corpus else None
+
+    # Fetch every cited URL once for the whole document; blocks share the prepared sources
+    registry = SourceRegistry()
+    await registry.fetch_all(
+        (c.get("url") for block in blocks for c in block.get("candidates", [])),
+        concurrency=concurrency,
+    )
+
     async def _process_block(block):
         async with block_semaphore:
             return await generate_sentence_level_evidence_async(block,
                                                                  batch_size=batch_size,
                                                                  concurrency=concurrency,
-                                                                 nlp_batch_size=nlp_batch_size)
+                                                                 nlp_batch_size=nlp_batch_size,
+                                                                 score_semantics=False,
+                                                                 automaton=automaton,
+                                                                 registry=registry)
 
     tasks = [asyncio.create_task(_process_block(block)) for block in blocks]
     gathered = await asyncio.gather(*tasks)
 
+    # One document-wide semantic scoring pass for all blocks
+    await score_evidence_semantics([ev for res in gathered for ev in res["evidence"]])
+
+    if corpus_task is not None:
+        corpus_evidence = await corpus_task
+        for block, res in zip(blocks, gathered):
+            for sent in dict.fromkeys(split_sentences(block.get("key_sentences", ""))):
+                res["evidence"].extend(dict(ev) for ev in corpus_evidence.get(sent, ()))
+
+    # Resolve every evidence sentence against the user document in one pass
+    with span("module3.offsets"):
+        offset_index = SentenceOffsetIndex(raw_text)
+        offset_index.find_many(ev.get("sentence") for res in gathered for ev in res["evidence"])
+
     for block, res in zip(blocks, gathered):
         for ev in res["evidence"]:
             sentence = ev.get("sentence")
             if sentence:
-                start, end = find_sentence_offsets_in_text(sentence, raw_text)
+                start, end = offset_index.find(sentence)
 
                 # Ensure start and end are integers
                 start = start if isinstance(start, int) and start is not None else -1
@@ -449,4 +913,7 @@ async def process_module3(module2_json: dict, raw_text: str,
             "skipped_pdf_urls": res["skipped_pdf_urls"]
         })
 
-    return {"doc_id": doc_id, "results": results}
+    output = {"doc_id": doc_id, "results": results}
+    if include_fingerprints:
+        output["fingerprint_matches"] = await run_stage("fuzzy", fingerprint_matches, raw_text, list(registry.fetched()))
+    return output
@@ -1,7 +1,13 @@
 # src/similarity_search/perplexity_client.py
+import asyncio
 import requests
+import aiohttp
 from typing import List, Dict
 from . import configs
+from .rate_limiter import get_provider_gate
+from .search_cache import get_search_cache
+from src.observability import traced, set_attributes
+from src.observability.metrics import provider_call
 import time
 import logging
 
@@ -12,51 +18,74 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+
+def _build_payload(query: str, top_k: int) -> Dict:
+    return {
+        "model": "sonar",
+        "query": query,
+        "top_k": top_k
+    }
+
+
+def _parse_results(data: Dict) -> List[Dict]:
+    results = data.get("results", [])
+    cleaned = []
+    for r in results:
+        # Ensure score is always a float between 0–1
+        raw_score = r.get("score")
+        if raw_score is None:
+            raw_score = 1.0  # default high confidence if missing
+        else:
+            try:
+                raw_score = float(raw_score)
+            except Exception:
+                raw_score = 1.0
+
+        cleaned.append({
+            "title": r.get("title", "Untitled"),
+            "url": r.get("url"),
+            "snippet": r.get("snippet", ""),
+            "score": raw_score
+        })
+    return cleaned
+
+
+@traced("call_perplexity")
 def call_perplexity(query: str, top_k: int = 5) -> List[Dict]:
     """
     Calls Perplexity LLM and returns a list of candidates with:
     title, url, snippet, score (confidence 0.0–1.0)
+    Results are served from / stored in the search cache.
     """
+    cache = get_search_cache()
+    cached = cache.get("perplexity", query, top_k=top_k)
+    set_attributes(query_chars=len(query), cached=cached is not None)
+    if cached is not None:
+        return cached
+    if cache.cache_only:
+        return []
+
     if not configs.PERPLEXITY_API_KEY:
         raise RuntimeError("PERPLEXITY_API_KEY missing in .env")
 
-    payload = {
-        "model": "sonar",
-        "query": query,
-        "top_k": top_k
-    }
+    payload = _build_payload(query, top_k)
 
     attempt = 0
     while attempt < getattr(configs, "MAX_RETRIES", 3):
         try:
-            resp = requests.post(
-                getattr(configs, "PERPLEXITY_API_URL"),
-                headers=HEADERS,
-                json=payload,
-                timeout=getattr(configs, "REQUEST_TIMEOUT", 10)
-            )
+            with provider_call("perplexity") as call:
+                resp = requests.post(
+                    getattr(configs, "PERPLEXITY_API_URL"),
+                    headers=HEADERS,
+                    json=payload,
+                    timeout=getattr(configs, "REQUEST_TIMEOUT", 10)
+                )
+                call.status = resp.status_code
 
             if resp.status_code == 200:
-                data = resp.json()
-                results = data.get("results", [])
-                cleaned = []
-                for r in results:
-                    # Ensure score is always a float between 0–1
-                    raw_score = r.get("score")
-                    if raw_score is None:
-                        raw_score = 1.0  # default high confidence if missing
-                    else:
-                        try:
-                            raw_score = float(raw_score)
-                        except Exception:
-                            raw_score = 1.0
-
-                    cleaned.append({
-                        "title": r.get("title", "Untitled"),
-                        "url": r.get("url"),
-                        "snippet": r.get("snippet", ""),
-                        "score": raw_score
-                    })
+                cleaned = _parse_results(resp.json())
+                set_attributes(attempts=attempt + 1, results=len(cleaned))
+                cache.put("perplexity", query, cleaned, top_k=top_k)
                 return cleaned
 
             else:
@@ -71,3 +100,55 @@ def call_perplexity(query: str, top_k: int = 5) -> List[Dict]:
 
     logger.error("Perplexity API failed after %d attempts", attempt)
     return []
+
+
+@traced("call_perplexity")
+async def call_perplexity_async(session: aiohttp.ClientSession, query: str, top_k: int = 5) -> List[Dict]:
+    """
+    Async variant of call_perplexity() on a shared aiohttp session.
+    Each attempt waits for the "perplexity" provider gate (concurrency + rate limit);
+    retries back off with asyncio.sleep instead of blocking the loop.
+    """
+    cache = get_search_cache()
+    cached = cache.get("perplexity", query, top_k=top_k)
+    set_attributes(query_chars=len(query), cached=cached is not None)
+    if cached is not None:
+        return cached
+    if cache.cache_only:
+        return []
+
+    if not configs.PERPLEXITY_API_KEY:
+        raise RuntimeError("PERPLEXITY_API_KEY missing in .env")
+
+    payload = _build_payload(query, top_k)
+    timeout = aiohttp.ClientTimeout(total=getattr(configs, "REQUEST_TIMEOUT", 10))
+    gate = get_provider_gate("perplexity")
+
+    attempt = 0
+    while attempt < getattr(configs, "MAX_RETRIES", 3):
+        try:
+            async with gate:
+                with provider_call("perplexity") as call:
+                    async with session.post(
+                        getattr(configs, "PERPLEXITY_API_URL"),
+                        headers=HEADERS,
+                        json=payload,
+                        timeout=timeout
+                    ) as resp:
+                        call.status = resp.status
+                        if resp.status == 200:
+                            cleaned = _parse_results(await resp.json(content_type=None))
+                            set_attributes(attempts=attempt + 1, results=len(cleaned))
+                            cache.put("perplexity", query, cleaned, top_k=top_k)
+                            return cleaned
+                        body = await resp.text()
+            logger.warning(f"Perplexity returned {resp.status}: {body}")
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Perplexity request failed: {e}")
+
+        attempt += 1
+        await asyncio.sleep(1 + attempt)
+
+    logger.error("Perplexity API failed after %d attempts", attempt)
+    return []
@@ -1,18 +1,21 @@
+import asyncio
 import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
+import aiohttp
 from .section_merger import merge_chunks_to_blocks, auto_chunk_section
 from .query_generator import generate_query_for_block
-from .perplexity_client import call_perplexity
-from .google_client import search_google, search_bing, search_google_advanced
+from .perplexity_client import call_perplexity, call_perplexity_async
+from .google_client import search_google, search_bing, search_google_advanced, search_google_advanced_async
 from .web_fetcher import fetch_full_text
+from .search_cache import get_search_cache
 from .similarity_engine import score_text_pair
 from . import configs
+from src.observability import span, traced, set_attributes, configure_logging
 from dotenv import load_dotenv
 
 load_dotenv()
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 def _choose_fallback(perplexity_results: List[Dict], threshold: float) -> bool:
     if not perplexity_results:
@@ -29,10 +32,11 @@ def _label_from_score(score: float) -> str:
         return "medium"
     return "low"
 
-def process_document(doc: Dict) -> Dict:
-    doc_id = doc.get("doc_id", "unknown")
-    out = {"doc_id": doc_id, "blocks": []}
-
+def _iter_document_blocks(doc: Dict):
+    """
+    Yield (section_name, index_in_section, block) for every query block of a Module 1 document,
+    auto-chunking sections that come without chunks.
+    """
     for section in doc.get("sections", []):
         sec_name = section.get("name", "section")
         chunks = section.get("chunks")
@@ -49,11 +53,66 @@ def process_document(doc: Dict) -> Dict:
             min_words=configs.MIN_WORDS_PER_BLOCK,
             max_words=configs.MAX_WORDS_PER_BLOCK
         )
-
-        # Limit Google usage
-        max_google_chunks = getattr(configs, "MAX_GOOGLE_CHUNKS", 2)
-
         for idx, block in enumerate(blocks):
+            yield sec_name, idx, block
+
+
+def _use_google(idx: int, key_sentences: str) -> bool:
+    # Limit Google usage
+    max_google_chunks = getattr(configs, "MAX_GOOGLE_CHUNKS", 2)
+    return idx < max_google_chunks and bool(key_sentences.strip())
+
+
+def _build_block_output(block: Dict, sec_name: str, query: str, key_sentences: str,
+                        google_results: List[Dict], perplex_results: List[Dict]) -> Dict:
+    for r in google_results:
+        r["source"] = "google_advanced"
+
+    # Track URLs to avoid duplicates
+    seen_urls = {r.get("url") for r in google_results if r.get("url")}
+
+    # Remove duplicates from Perplexity results
+    filtered_perplex = []
+    for r in perplex_results:
+        if r.get("url") not in seen_urls:
+            r["source"] = "perplexity"
+            filtered_perplex.append(r)
+            seen_urls.add(r.get("url"))
+
+    # -------------------------
+    # Combine: final candidates for this block
+    # -------------------------
+    candidate_urls = google_results + filtered_perplex
+
+    # Keep only essential metadata
+    cleaned_candidates = []
+    for c in candidate_urls:
+        cleaned_candidates.append({
+            "url": c.get("url"),
+            "title": c.get("title"),
+            "snippet": c.get("snippet"),
+            "source": c.get("source")
+        })
+
+    return {
+        "block_id": block["block_id"],
+        "section": sec_name,
+        "source_chunk_ids": block.get("source_chunk_ids", []),
+        "word_count": block.get("word_count", 0),
+        "query": query,
+        "key_sentences": key_sentences,
+        "candidates": cleaned_candidates
+    }
+
+
+@traced("module2.process_document")
+def process_document(doc: Dict) -> Dict:
+    doc_id = doc.get("doc_id", "unknown")
+    out = {"doc_id": doc_id, "blocks": []}
+    set_attributes(doc_id=doc_id)
+
+    for sec_name, idx, block in _iter_document_blocks(doc):
+        with span("module2.block", block_id=block.get("block_id")):
             # -------------------------
             # Generate query and key sentences first
             # -------------------------
@@ -65,7 +124,7 @@ def process_document(doc: Dict) -> Dict:
             # 1. GOOGLE ADVANCED SEARCH (limited)
             # -------------------------
             google_results = []
-            if idx < max_google_chunks and key_sentences.strip():
+            if _use_google(idx, key_sentences):
                 try:
                     # Use key sentences for all_words or important_words
                     google_results = search_google_advanced(
@@ -73,14 +132,9 @@ def process_document(doc: Dict) -> Dict:
                         important_words=key_sentences, # optional: emphasize these words
                         top_k=configs.TOP_K_RESULTS
                     )
-                    for r in google_results:
-                        r["source"] = "google_advanced"
                 except Exception as e:
                     logger.warning("Google Advanced search failed: %s", e)
 
-            # Track URLs to avoid duplicates
-            seen_urls = {r.get("url") for r in google_results if r.get("url")}
-
             # -------------------------
             # 2. PERPLEXITY (normal logic — unchanged)
             # -------------------------
@@ -90,50 +144,96 @@ def process_document(doc: Dict) -> Dict:
                 logger.warning("Perplexity call failed: %s", e)
                 perplex_results = []
 
-            # Remove duplicates from Perplexity results
-            filtered_perplex = []
-            for r in perplex_results:
-                if r.get("url") not in seen_urls:
-                    r["source"] = "perplexity"
-                    filtered_perplex.append(r)
-                    seen_urls.add(r.get("url"))
-
             # -------------------------
-            # 3. Combine: final candidates for this block
+            # 3. Save block output
             # -------------------------
-            candidate_urls = google_results + filtered_perplex
-
-            # Keep only essential metadata
-            cleaned_candidates = []
-            for c in candidate_urls:
-                cleaned_candidates.append({
-                    "url": c.get("url"),
-                    "title": c.get("title"),
-                    "snippet": c.get("snippet"),
-                    "source": c.get("source")
-                })
+            out["blocks"].append(
+                _build_block_output(block, sec_name, query, key_sentences, google_results, perplex_results)
+            )
 
-            # -------------------------
-            # 4. Save block output
-            # -------------------------
-            out["blocks"].append({
-                "block_id": block["block_id"],
-                "section": sec_name,
-                "source_chunk_ids": block.get("source_chunk_ids", []),
-                "word_count": block.get("word_count", 0),
-                "query": query,
-                "key_sentences": key_sentences,
-                "candidates": cleaned_candidates
-            })
+    set_attributes(blocks=len(out["blocks"]))
+    return out
+
+
+@traced("module2.block")
+async def _search_block_async(session: aiohttp.ClientSession, idx: int, query: str, key_sentences: str,
+                              block_id: Optional[str] = None):
+    set_attributes(block_id=block_id)
+
+    async def _google():
+        if not _use_google(idx, key_sentences):
+            return []
+        try:
+            return await search_google_advanced_async(
+                session,
+                all_words=key_sentences,
+                important_words=key_sentences,
+                top_k=configs.TOP_K_RESULTS
+            )
+        except Exception as e:
+            logger.warning("Google Advanced search failed: %s", e)
+            return []
+
+    async def _perplexity():
+        try:
+            return await call_perplexity_async(session, query, top_k=configs.TOP_K_RESULTS)
+        except Exception as e:
+            logger.warning("Perplexity call failed: %s", e)
+            return []
+
+    return await asyncio.gather(_google(), _perplexity())
+
+
+@traced("module2.process_document")
+async def process_document_async(doc: Dict, session: Optional[aiohttp.ClientSession] = None) -> Dict:
+    """
+    Async Module 2: same output as process_document(), but the search calls for all
+    blocks are fanned out concurrently over one pooled HTTP session. Per-provider
+    concurrency and request rate are bounded by the provider gates (see rate_limiter).
+    """
+    doc_id = doc.get("doc_id", "unknown")
+    out = {"doc_id": doc_id, "blocks": []}
+
+    entries = list(_iter_document_blocks(doc))
+    set_attributes(doc_id=doc_id, blocks=len(entries))
+    if not entries:
+        return out
+
+    # Query generation is CPU-bound (embeddings); keep it off the event loop
+    with span("module2.generate_queries", blocks=len(entries)):
+        queries = await asyncio.to_thread(
+            lambda: [generate_query_for_block(block) for _, _, block in entries]
+        )
 
+    own_session = session is None
+    if own_session:
+        connector = aiohttp.TCPConnector(
+            limit=configs.PERPLEXITY_MAX_CONCURRENCY + configs.GOOGLE_MAX_CONCURRENCY,
+            keepalive_timeout=configs.FETCH_KEEPALIVE_SECONDS,
+        )
+        session = aiohttp.ClientSession(connector=connector)
+    try:
+        searches = await asyncio.gather(*[
+            _search_block_async(session, idx, qres["query"], qres["key_sentences"], block.get("block_id"))
+            for (_, idx, block), qres in zip(entries, queries)
+        ])
+    finally:
+        if own_session:
+            await session.close()
+
+    for (sec_name, _, block), qres, (google_results, perplex_results) in zip(entries, queries, searches):
+        out["blocks"].append(
+            _build_block_output(block, sec_name, qres["query"], qres["key_sentences"],
+                                google_results, perplex_results)
+        )
 
     return out
 
 
-def run_from_file(input_path: str, output_path: str):
+def run_from_file(input_path: str, output_path: str, use_async: bool = False):
     with open(input_path, "r", encoding="utf-8") as f:
         doc = json.load(f)
-    res = process_document(doc)
+    res = asyncio.run(process_document_async(doc)) if use_async else process_document(doc)
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(res, f, indent=2, ensure_ascii=False)
     return res
@@ -143,6 +243,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run enhanced similarity search pipeline on Module 1 JSON")
     parser.add_argument("--input", "-i", required=True, help="Input JSON file path from Module 1")
     parser.add_argument("--output", "-o", default="module2_output.json", help="Output JSON file path for Module 2 results")
+    parser.add_argument("--async-search", action="store_true", help="Run search calls for all blocks concurrently")
+    parser.add_argument("--cache-only", action="store_true", help="Replay search results from the search cache without calling any API")
     args = parser.parse_args()
-    res = run_from_file(args.input, args.output)
+    configure_logging()
+    if args.cache_only:
+        get_search_cache().mode = "cache_only"
+    res = run_from_file(args.input, args.output, use_async=args.async_search)
     logger.info("Processing completed. Results saved to %s", args.output)
@@ -1,9 +1,8 @@
 import re
 from typing import Dict
-from sentence_transformers import SentenceTransformer
 import numpy as np
-
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+from .embedding_service import get_embedding_service
+from src.observability import traced, set_attributes
 
 def clean_text(text: str) -> str:
     text = re.sub(r"\[[^\]]+\]", "", text)
@@ -12,12 +11,15 @@ def clean_text(text: str) -> str:
     text = re.sub(r"\s+", " ", text).strip()
     return text
 
+@traced("select_key_sentences")
 def select_key_sentences(text: str, max_sentences: int = 3, max_chars: int = 200) -> str:
     sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    set_attributes(sentences=len(sentences), chars=len(text))
     if not sentences:
         return ""
-    sentence_embeddings = _model.encode(sentences)
-    block_embedding = _model.encode([text])[0]
+    # One batch for the sentences and the block itself
+    embeddings = get_embedding_service().encode_many(sentences + [text])
+    sentence_embeddings, block_embedding = embeddings[:-1], embeddings[-1]
     scores = np.dot(sentence_embeddings, block_embedding) / (
         np.linalg.norm(sentence_embeddings, axis=1) * np.linalg.norm(block_embedding)
     )
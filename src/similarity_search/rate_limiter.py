@@ -0,0 +1,84 @@
+# src/similarity_search/rate_limiter.py
+"""
+Per-provider concurrency + rate limiting for the async search clients.
+
+Each provider (perplexity, google, bing) gets a ProviderGate that bounds
+in-flight requests with a semaphore and spaces them out with a token
+bucket. Gates are kept per event loop, so concurrent documents handled by
+the same loop share one budget per provider.
+"""
+import asyncio
+import time
+import weakref
+from typing import Dict, Optional
+
+from . import configs
+
+
+class AsyncRateLimiter:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ProviderGate:
+    """`async with gate:` waits for a concurrency slot and a rate-limit token."""
+
+    def __init__(self, name: str, max_concurrency: int, rate_per_sec: float, burst: int = 1):
+        self.name = name
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._limiter = AsyncRateLimiter(rate_per_sec, burst)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            await self._limiter.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+
+def _provider_settings(provider: str):
+    prefix = provider.upper()
+    return (
+        getattr(configs, f"{prefix}_MAX_CONCURRENCY", 4),
+        getattr(configs, f"{prefix}_RATE_PER_SEC", 0.0),
+        getattr(configs, f"{prefix}_RATE_BURST", 1),
+    )
+
+
+_GATES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, ProviderGate]]" = weakref.WeakKeyDictionary()
+
+
+def get_provider_gate(provider: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> ProviderGate:
+    """Return the gate for `provider` on the current (or given) event loop."""
+    loop = loop or asyncio.get_running_loop()
+    gates = _GATES.setdefault(loop, {})
+    gate = gates.get(provider)
+    if gate is None:
+        concurrency, rate, burst = _provider_settings(provider)
+        gate = ProviderGate(provider, concurrency, rate, burst)
+        gates[provider] = gate
+    return gate
@@ -0,0 +1,216 @@
+# src/similarity_search/search_cache.py
+"""
+Persistent cache for search-provider results (Perplexity, Google CSE).
+
+Results are keyed by a fingerprint of (provider, normalized query, request
+params), so resubmissions and repeated boilerplate blocks do not hit the
+paid APIs again. Modes (configs.SEARCH_CACHE_MODE):
+
+- "readwrite"  : serve hits, call the API on a miss and store the result (default)
+- "cache_only" : serve hits, never call the API (offline replay of Module 2)
+- "off"        : bypass the cache entirely
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from . import configs
+
+logger = logging.getLogger(__name__)
+
+MODES = ("readwrite", "cache_only", "off")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    query TEXT NOT NULL,
+    results TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache (accessed_at);
+"""
+
+
+_OPERATORS = {"OR", "AND", "(", ")", '"', '-"', "-("}
+# Tokens kept whole (case-folded): site:/filetype: style filters and number ranges
+_OPERATOR_TOKEN = re.compile(r"^(?:[a-z]+:\S+|\d+\.\.\d+)$")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case-fold, drop punctuation and collapse whitespace so trivial variants share a key.
+    Search operators survive, so `foo -bar` or `"foo bar" (a OR b)` keep their own keys:
+    quotes, parentheses, OR / AND, a leading "-" and site:-style / a..b tokens.
+    """
+    text = unicodedata.normalize("NFKC", query or "")
+    text = re.sub(r'(-?[()"])', r" \1 ", text)
+    out = []
+    for token in text.split():
+        if token in _OPERATORS:
+            out.append(token)
+            continue
+        token = token.casefold()
+        if _OPERATOR_TOKEN.match(token.lstrip("-")):
+            out.append(token)
+            continue
+        words = re.sub(r"[^\w\s]", " ", token).split()
+        if words and token.startswith("-"):
+            words[0] = "-" + words[0]
+        out.extend(words)
+    return " ".join(out)
+
+
+def query_fingerprint(provider: str, query: str, **params: Any) -> str:
+    material = json.dumps([provider, normalize_query(query), params], sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    def __init__(self, path: Optional[str], ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 100000, mode: str = "readwrite"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown search cache mode {mode!r}; expected one of {MODES}")
+        self.path = path or None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.mode = mode
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "stores": 0, "cache_only_misses": 0}
+        )
+        # Without a path the cache still works, just per process
+        self._memory: Dict[str, Any] = {}
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def cache_only(self) -> bool:
+        return self.mode == "cache_only"
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _bump(self, provider: str, key: str) -> None:
+        with self._lock:
+            self._stats[provider][key] += 1
+
+    def get(self, provider: str, query: str, **params: Any) -> Optional[List[Dict]]:
+        """Cached results for this provider/query, or None on a miss (or when disabled)."""
+        if not self.enabled:
+            return None
+        key = query_fingerprint(provider, query, **params)
+        now = time.time()
+        row = None
+
+        conn = self._conn()
+        if conn is None:
+            row = self._memory.get(key)
+        else:
+            try:
+                row = conn.execute(
+                    "SELECT results, created_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logger.warning("Search cache read failed: %s", e)
+                row = None
+
+        if row is not None and (self.cache_only or now - row[1] < self.ttl_seconds):
+            self._bump(provider, "hits")
+            return json.loads(row[0])
+
+        self._bump(provider, "misses")
+        if self.cache_only:
+            self._bump(provider, "cache_only_misses")
+            logger.info("Search cache miss in cache-only mode (%s): %s", provider, query[:80])
+        return None
+
+    def put(self, provider: str, query: str, results: List[Dict], **params: Any) -> None:
+        # Empty results are usually transient failures; do not pin them
+        if not self.enabled or self.cache_only or not results:
+            return
+        key = query_fingerprint(provider, query, **params)
+        now = time.time()
+        payload = json.dumps(results, ensure_ascii=False)
+        self._bump(provider, "stores")
+
+        conn = self._conn()
+        if conn is None:
+            self._memory[key] = (payload, now)
+            while len(self._memory) > self.max_entries:
+                self._memory.pop(next(iter(self._memory)))
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, provider, query, results, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, normalize_query(query), payload, now, now),
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning("Search cache write failed: %s", e)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM search_cache WHERE key IN "
+                "(SELECT key FROM search_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {provider: dict(s) for provider, s in self._stats.items()}
+        for s in out.values():
+            lookups = s["hits"] + s["misses"]
+            s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return out
+
+
+_CACHE: Optional[SearchCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide SearchCache configured from configs.SEARCH_CACHE_*."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = SearchCache(
+                    configs.SEARCH_CACHE_PATH,
+                    ttl_seconds=configs.SEARCH_CACHE_TTL_SECONDS,
+                    max_entries=configs.SEARCH_CACHE_MAX_ENTRIES,
+                    mode=configs.SEARCH_CACHE_MODE,
+                )
+    return _CACHE
@@ -1,13 +1,13 @@
-from typing import Tuple
+from typing import List, Sequence, Tuple
 import numpy as np
-import hashlib
 from sklearn.feature_extraction.text import CountVectorizer
 import spacy
-from sentence_transformers import SentenceTransformer, util
+from .embedding_service import get_embedding_service
+from .winnowing import word_fingerprints
+from src.observability import traced, set_attributes
 
-# Load NLP and embedding models once
+# Load NLP model once; embeddings come from the shared embedding service
 _nlp = spacy.load("en_core_web_sm")
-_sem_model = SentenceTransformer("all-MiniLM-L6-v2")
 
 def lexical_similarity(text1: str, text2: str, n=3) -> float:
     vec = CountVectorizer(analyzer='word', ngram_range=(n, n))
@@ -21,23 +21,47 @@ def grammar_similarity(text1: str, text2: str) -> float:
     pos2 = " ".join([token.pos_ for token in _nlp(text2)])
     return lexical_similarity(pos1, pos2, n=3)
 
+@traced("semantic_similarity")
 def semantic_similarity(text1: str, text2: str) -> float:
-    if not text1.strip() or not text2.strip():
-        return 0.0
+    return batch_semantic_similarity([(text1, text2)])[0]
+
+@traced("batch_semantic_similarity")
+def batch_semantic_similarity(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """
+    Semantic similarity for many (text1, text2) pairs at once.
+    Every unique text is embedded once and the cosines are computed row-wise,
+    so scoring N pairs costs one batched encode instead of 2N model calls.
+    Scores are mapped from [-1, 1] to [0, 1]; pairs with an empty side score 0.0.
+    """
+    scores = [0.0] * len(pairs)
+    text_rows = {}
+    valid = []
+    for i, (a, b) in enumerate(pairs):
+        if not a or not b or not a.strip() or not b.strip():
+            continue
+        text_rows.setdefault(a, len(text_rows))
+        text_rows.setdefault(b, len(text_rows))
+        valid.append(i)
+
+    set_attributes(pairs=len(pairs), texts=len(text_rows))
+    if not valid:
+        return scores
 
-    emb1 = _sem_model.encode(text1, convert_to_tensor=True)
-    emb2 = _sem_model.encode(text2, convert_to_tensor=True)
+    emb = get_embedding_service().encode_many(list(text_rows), normalize=True)
+    rows_a = np.array([text_rows[pairs[i][0]] for i in valid])
+    rows_b = np.array([text_rows[pairs[i][1]] for i in valid])
 
-    cosine = util.cos_sim(emb1, emb2).item()
+    cosine = np.einsum("ij,ij->i", emb[rows_a], emb[rows_b])
     normalized = (cosine + 1) / 2  # convert [-1,1] → [0,1]
-    return normalized
+    for i, score in zip(valid, normalized):
+        scores[i] = float(score)
+    return scores
 
 
-def fingerprint(text: str, k: int = 5) -> set:
-    words = text.split()
-    hashes = [hashlib.md5(" ".join(words[i:i+k]).encode()).hexdigest()
-              for i in range(len(words)-k+1)]
-    return set(hashes)
+def fingerprint(text: str, k: int = 5, window: int = 4) -> set:
+    """Winnowed Rabin-Karp hashes of the word k-grams of `text`."""
+    hashes, _ = word_fingerprints(text, k, window)
+    return set(hashes.tolist())
 
 def fingerprint_similarity(text1: str, text2: str, k: int = 5) -> float:
     f1 = fingerprint(text1, k)
@@ -1,9 +1,17 @@
+import asyncio
+import io
 import logging
 import requests
 import re
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import aiohttp
 from . import configs
+from .fetch_cache import get_fetch_cache
 from src.ingestion.utils import split_sentences
+from src.observability import traced, set_attributes
 
 logger = logging.getLogger(__name__)
 
@@ -27,47 +35,78 @@ except ImportError:
     _HAS_PDFPLUMBER = False
 
 
-# Cache to avoid refetching the same URL
-_FETCH_CACHE = {}
+def _request_headers(cached: Optional[Dict]) -> Dict[str, str]:
+    headers = {"User-Agent": getattr(configs, "HTTP_USER_AGENT", "Mozilla/5.0")}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
 
 
-def fetch_full_text(url: str, timeout: Optional[int] = None) -> Optional[str]:
+def _lookup_cache(url: str) -> Tuple[bool, Optional[str], Optional[Dict]]:
     """
-    Fetch text from a URL using multiple scraping strategies.
-    Respects ALLOW_PDF_SCRAPING flag from configs.
+    Shared cache / PDF-policy preamble for the sync and async fetch paths.
+    Returns (done, text, cached_entry); when done is True, text is the answer.
     """
-    timeout = timeout or getattr(configs, "REQUEST_TIMEOUT", 10)
-    if not url:
-        return None
-
-    # Cache hit
-    if url in _FETCH_CACHE:
-        return _FETCH_CACHE[url]
-
-    # Detect PDF
-    is_pdf = url.lower().endswith(".pdf")
+    cache = get_fetch_cache()
+    cached = cache.get(url)
+    if cached is not None and cached["fresh"]:
+        return True, cached["text"], cached
 
     # ============================================================
     # 0️⃣ PDF scraping disabled → immediately skip
     # ============================================================
-    if is_pdf and not configs.ALLOW_PDF_SCRAPING:
+    if url.lower().endswith(".pdf") and not configs.ALLOW_PDF_SCRAPING:
         logger.info(f"Skipping PDF scraping for {url} (ALLOW_PDF_SCRAPING = False)")
-        _FETCH_CACHE[url] = None
-        return None
+        cache.put(url, None)
+        return True, None, cached
+
+    return False, None, cached
+
+
+def _looks_like_pdf(url: str, content: bytes, content_type: Optional[str]) -> bool:
+    if content_type and "application/pdf" in content_type.lower():
+        return True
+    return url.lower().endswith(".pdf") or content[:5] == b"%PDF-"
+
 
+def extract_text(
+    url: str,
+    content: bytes,
+    content_type: Optional[str] = None,
+    encoding: Optional[str] = None,
+) -> Optional[str]:
+    """
+    CPU-side extraction chain over an already downloaded body. No extractor
+    touches the network: trafilatura and newspaper3k parse the decoded HTML,
+    pdfplumber reads the raw bytes, and the regex strip is the last resort.
+    The result is sentence-normalised and truncated to MAX_FETCHED_TEXT_CHARS.
+    """
     text = None
-    headers = {"User-Agent": getattr(configs, "HTTP_USER_AGENT", "Mozilla/5.0")}
 
-    try:
-        # Fetch HTML or PDF content
-        r = requests.get(url, headers=headers, timeout=timeout)
-        if r.status_code != 200:
+    if _looks_like_pdf(url, content, content_type):
+        # ============================================================
+        # 1️⃣ PDF extraction (only if allowed)
+        # ============================================================
+        if not (configs.ALLOW_PDF_SCRAPING and _HAS_PDFPLUMBER):
             return None
-
-        html_content = r.text
+        text_pages = []
+        try:
+            with pdfplumber.open(io.BytesIO(content)) as pdf:
+                for page in pdf.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        text_pages.append(page_text)
+            text = "\n".join(text_pages).strip()
+        except Exception as pdf_err:
+            logger.warning(f"PDF parsing failed for {url}: {pdf_err}")
+    else:
+        html_content = content.decode(encoding or "utf-8", errors="replace")
 
         # ============================================================
-        # 1️⃣ Trafilatura extraction
+        # 2️⃣ Trafilatura extraction
         # ============================================================
         if _HAS_TRAFILATURA:
             extracted = trafilatura.extract(html_content, url=url)
@@ -75,43 +114,18 @@ def fetch_full_text(url: str, timeout: Optional[int] = None) -> Optional[str]:
                 text = extracted.strip()
 
         # ============================================================
-        # 2️⃣ Newspaper3k fallback
+        # 3️⃣ Newspaper3k fallback (parses the HTML we already have)
         # ============================================================
-        if not text and _HAS_NEWSPAPER and not is_pdf:
+        if not text and _HAS_NEWSPAPER:
             try:
                 article = Article(url)
-                article.download()
+                article.download(input_html=html_content)
                 article.parse()
                 if article.text:
                     text = article.text.strip()
             except Exception:
                 pass
 
-        # ============================================================
-        # 3️⃣ PDF extraction (only if allowed)
-        # ============================================================
-        if (
-            not text and
-            is_pdf and
-            configs.ALLOW_PDF_SCRAPING and
-            _HAS_PDFPLUMBER
-        ):
-            import io
-            r_pdf = requests.get(url, headers=headers, timeout=timeout)
-
-            if r_pdf.status_code == 200:
-                pdf_file = io.BytesIO(r_pdf.content)
-                text_pages = []
-                try:
-                    with pdfplumber.open(pdf_file) as pdf:
-                        for page in pdf.pages:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text_pages.append(page_text)
-                    text = "\n".join(text_pages).strip()
-                except Exception as pdf_err:
-                    logger.warning(f"PDF parsing failed for {url}: {pdf_err}")
-
         # ============================================================
         # 4️⃣ Very simple HTML strip fallback
         # ============================================================
@@ -121,20 +135,184 @@ def fetch_full_text(url: str, timeout: Optional[int] = None) -> Optional[str]:
             clean_html = re.sub(r"\s+", " ", clean_html)
             text = clean_html.strip()
 
-        # ============================================================
-        # 5️⃣ Sentence splitting
-        # ============================================================
-        if text:
-            sentences = split_sentences(text)
-            text = " ".join([s.strip() for s in sentences if s.strip()])
+    # ============================================================
+    # 5️⃣ Sentence splitting
+    # ============================================================
+    if text:
+        sentences = split_sentences(text)
+        text = " ".join([s.strip() for s in sentences if s.strip()])
+
+        # Truncate if too large
+        max_chars = getattr(configs, "MAX_FETCHED_TEXT_CHARS", 20000)
+        text = text[:max_chars]
+
+    return text
+
 
-            # Truncate if too large
-            max_chars = getattr(configs, "MAX_FETCHED_TEXT_CHARS", 20000)
-            text = text[:max_chars]
+# ============================================================
+# Download accounting (each URL should be downloaded once)
+# ============================================================
+_DOWNLOAD_STATS_MAX_URLS = 1024
+_DOWNLOAD_LOCK = threading.Lock()
+_DOWNLOAD_TOTALS = {"requests": 0, "bytes": 0}
+_DOWNLOADS_BY_URL: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+
+def record_download(url: str, num_bytes: int) -> None:
+    with _DOWNLOAD_LOCK:
+        _DOWNLOAD_TOTALS["requests"] += 1
+        _DOWNLOAD_TOTALS["bytes"] += num_bytes
+        entry = _DOWNLOADS_BY_URL.pop(url, None) or {"requests": 0, "bytes": 0}
+        entry["requests"] += 1
+        entry["bytes"] += num_bytes
+        _DOWNLOADS_BY_URL[url] = entry
+        while len(_DOWNLOADS_BY_URL) > _DOWNLOAD_STATS_MAX_URLS:
+            _DOWNLOADS_BY_URL.popitem(last=False)
+    if entry["requests"] > 1:
+        logger.debug("%s downloaded %d times (%d bytes total)", url, entry["requests"], entry["bytes"])
+
+
+def download_stats(url: Optional[str] = None) -> Dict:
+    """
+    Bytes/requests downloaded in this process, overall or for one URL
+    (per-URL figures are kept for the most recent URLs only).
+    """
+    with _DOWNLOAD_LOCK:
+        if url is not None:
+            return dict(_DOWNLOADS_BY_URL.get(url, {"requests": 0, "bytes": 0}))
+        return dict(_DOWNLOAD_TOTALS, urls_tracked=len(_DOWNLOADS_BY_URL))
+
+
+@traced("fetch_full_text")
+def fetch_full_text(url: str, timeout: Optional[int] = None) -> Optional[str]:
+    """
+    Fetch text from a URL using multiple scraping strategies.
+    Respects ALLOW_PDF_SCRAPING flag from configs.
+    Results go through the shared fetch cache; stale entries are revalidated
+    with a conditional request (If-None-Match / If-Modified-Since).
+    """
+    timeout = timeout or getattr(configs, "REQUEST_TIMEOUT", 10)
+    if not url:
+        return None
+
+    done, text, cached = _lookup_cache(url)
+    set_attributes(url=url, cached=done)
+    if done:
+        return text
+
+    cache = get_fetch_cache()
+    etag = last_modified = None
+    try:
+        # Fetch HTML or PDF content
+        r = requests.get(url, headers=_request_headers(cached), timeout=timeout)
+        if r.status_code == 304 and cached is not None:
+            cache.touch(url, cached)
+            set_attributes(status=304)
+            return cached["text"]
+        if r.status_code != 200:
+            return None
+
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        content = r.content
+        record_download(url, len(content))
+        set_attributes(status=r.status_code, bytes=len(content))
+        text = extract_text(url, content, r.headers.get("Content-Type"), r.encoding or r.apparent_encoding)
 
     except Exception as e:
         logger.warning("Failed to fetch/parse %s: %s", url, e)
         text = None
 
-    _FETCH_CACHE[url] = text
+    cache.put(url, text, etag=etag, last_modified=last_modified)
+    return text
+
+
+# ============================================================
+# Async fetch path (pooled aiohttp session)
+# ============================================================
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def _read_capped(resp: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+    """Stream the body, stopping once max_bytes have been read."""
+    chunks = []
+    total = 0
+    async for chunk in resp.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        total += len(chunk)
+        if total >= max_bytes:
+            logger.debug("Truncated body of %s at %d bytes", resp.url, max_bytes)
+            break
+    return b"".join(chunks)[:max_bytes]
+
+
+@traced("fetch_full_text")
+async def fetch_full_text_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    executor=None,
+    max_retries: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Async counterpart of fetch_full_text() that downloads through a pooled
+    aiohttp session (keep-alive, per-host limits set on its connector).
+    The body is streamed and capped at MAX_FETCHED_BYTES; transient failures
+    (connection errors, timeouts, 429/5xx) are retried with exponential backoff.
+    Only the CPU-bound extraction runs on `executor`.
+    """
+    if not url:
+        return None
+
+    done, text, cached = _lookup_cache(url)
+    set_attributes(url=url, cached=done)
+    if done:
+        return text
+
+    cache = get_fetch_cache()
+    max_retries = max_retries or getattr(configs, "MAX_RETRIES", 3)
+    backoff = getattr(configs, "RETRY_BACKOFF", 1.0)
+    max_bytes = getattr(configs, "MAX_FETCHED_BYTES", 2 * 1024 * 1024)
+
+    body = None
+    etag = last_modified = None
+    charset = content_type = None
+    for attempt in range(max_retries):
+        try:
+            async with session.get(url, headers=_request_headers(cached), allow_redirects=True) as resp:
+                if resp.status == 304 and cached is not None:
+                    cache.touch(url, cached)
+                    set_attributes(status=304)
+                    return cached["text"]
+                if resp.status in _RETRY_STATUSES and attempt + 1 < max_retries:
+                    logger.debug("Fetching %s returned %s, retrying", url, resp.status)
+                elif resp.status != 200:
+                    return None
+                else:
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+                    charset = resp.charset
+                    content_type = resp.headers.get("Content-Type")
+                    body = await _read_capped(resp, max_bytes)
+                    record_download(url, len(body))
+                    set_attributes(status=resp.status, bytes=len(body), attempts=attempt + 1)
+                    break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt + 1 >= max_retries:
+                logger.warning("Failed to fetch %s after %d attempts: %s", url, attempt + 1, e)
+                cache.put(url, None)
+                return None
+            logger.debug("Fetching %s failed (%s), retrying", url, e)
+        await asyncio.sleep(backoff * (2 ** attempt))
+
+    if body is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    try:
+        text = await loop.run_in_executor(executor, extract_text, url, body, content_type, charset)
+    except Exception as e:
+        logger.warning("Failed to parse %s: %s", url, e)
+        text = None
+
+    cache.put(url, text, etag=etag, last_modified=last_modified)
     return text
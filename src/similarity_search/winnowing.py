@@ -0,0 +1,184 @@
+# src/similarity_search/winnowing.py
+"""
+Winnowing fingerprints (Schleimer, Wilkerson & Aiken) with a Rabin-Karp hash.
+
+Text is turned into an array of codepoints (or word ids), every k-gram is
+hashed with a polynomial rolling hash mod 2^31 - 1 -- computed for all
+positions at once in k vectorized NumPy passes -- and in every window of
+`window` consecutive hashes the rightmost minimum is kept. Any shared
+substring of at least window + k - 1 units is guaranteed to share a
+fingerprint.
+
+FingerprintIndex maps fingerprint hash -> [(source, offset)], so one pass
+over the user text finds every source it shares fingerprints with, with
+positions on both sides.
+"""
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+MOD = (1 << 31) - 1
+BASE = 1_000_003  # < 2**20, so hash * BASE + codepoint stays well inside int64
+
+
+def codepoints(text: str) -> np.ndarray:
+    """Unicode codepoints of `text` as an int64 array."""
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+
+def word_ids(words: List[str]) -> np.ndarray:
+    """Stable 32-bit id per word (crc32), computed once per distinct word."""
+    if not words:
+        return np.zeros(0, dtype=np.int64)
+    uniques, inverse = np.unique(np.asarray(words, dtype=object), return_inverse=True)
+    ids = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in uniques), dtype=np.int64, count=len(uniques))
+    return ids[inverse] % MOD
+
+
+def rolling_hashes(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Rabin-Karp hash of every k-gram of `values`:
+    h[i] = sum(values[i + j] * BASE**(k - 1 - j)) mod MOD, for all i at once.
+    """
+    n = len(values) - k + 1
+    if k <= 0 or n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64) % MOD
+    h = values[:n].copy()
+    for j in range(1, k):
+        h *= BASE
+        h += values[j:j + n]
+        h %= MOD
+    return h
+
+
+def winnow(hashes: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Robust winnowing: the rightmost minimal hash of every `window` consecutive
+    hashes, each selected position reported once.
+    Returns (hashes, positions) in position order.
+    """
+    if len(hashes) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    window = max(1, min(window, len(hashes)))
+    windows = np.lib.stride_tricks.sliding_window_view(hashes, window)
+    # argmin returns the first minimum; search the reversed windows to get the rightmost one
+    rightmost = window - 1 - np.argmin(windows[:, ::-1], axis=1)
+    positions = np.arange(len(windows)) + rightmost
+    keep = np.ones(len(positions), dtype=bool)
+    keep[1:] = positions[1:] != positions[:-1]
+    positions = positions[keep]
+    return hashes[positions], positions
+
+
+def fingerprints(text: str, k: int = 25, window: int = 4, lower: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Character-level winnowing fingerprints of `text`: (hashes, start offsets).
+    Offsets index into `text` itself; case is folded only when that keeps offsets aligned.
+    """
+    if lower:
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            text = lowered
+    return winnow(rolling_hashes(codepoints(text), k), window)
+
+
+def word_fingerprints(text: str, k: int = 5, window: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """Word-level winnowing fingerprints: (hashes, word offsets) over k-word shingles."""
+    return winnow(rolling_hashes(word_ids(text.split()), k), window)
+
+
+class FingerprintIndex:
+    """
+    Inverted index from fingerprint hash to [(source, offset)], built over all
+    sources of a document. Sources are added once; user text is matched
+    against all of them with one lookup per user fingerprint.
+    """
+
+    def __init__(self, k: int = 25, window: int = 4):
+        self.k = k
+        self.window = window
+        self._postings: Dict[int, List[Tuple[Hashable, int]]] = defaultdict(list)
+        self._counts: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, source: Hashable) -> bool:
+        return source in self._counts
+
+    def add(self, source: Hashable, text: str) -> int:
+        """Index `text` under `source`; returns the number of fingerprints added."""
+        if source in self._counts:
+            return 0
+        hashes, offsets = fingerprints(text, self.k, self.window)
+        for h, off in zip(hashes.tolist(), offsets.tolist()):
+            self._postings[h].append((source, off))
+        self._counts[source] = len(hashes)
+        return len(hashes)
+
+    def lookup(self, text: str) -> List[Tuple[int, Hashable, int]]:
+        """Every (user offset, source, source offset) sharing a fingerprint with `text`."""
+        return self._lookup(*fingerprints(text, self.k, self.window))
+
+    def _lookup(self, hashes: np.ndarray, offsets: np.ndarray) -> List[Tuple[int, Hashable, int]]:
+        hits = []
+        for h, off in zip(hashes.tolist(), offsets.tolist()):
+            for source, src_off in self._postings.get(h, ()):
+                hits.append((off, source, src_off))
+        return hits
+
+    def match(self, text: str, min_fingerprints: int = 1) -> List[Dict[str, Any]]:
+        """
+        Per-source summary of the fingerprints `text` shares with the index,
+        with matching regions merged into spans (k-grams on the same diagonal
+        that overlap or touch). Sorted by number of shared fingerprints.
+        """
+        hashes, offsets = fingerprints(text, self.k, self.window)
+        user_total = len(hashes)
+        by_source: Dict[Hashable, List[Tuple[int, int]]] = defaultdict(list)
+        for off, source, src_off in self._lookup(hashes, offsets):
+            by_source[source].append((off, src_off))
+
+        results = []
+        for source, pairs in by_source.items():
+            matched = len({off for off, _ in pairs})
+            if matched < min_fingerprints:
+                continue
+            results.append({
+                "source": source,
+                "matched_fingerprints": matched,
+                "coverage_percent": round(100.0 * matched / max(1, user_total), 2),
+                "spans": self._merge_spans(pairs),
+            })
+        results.sort(key=lambda r: r["matched_fingerprints"], reverse=True)
+        return results
+
+    def _merge_spans(self, pairs: List[Tuple[int, int]]) -> List[Dict[str, int]]:
+        spans: List[Dict[str, int]] = []
+        last_for_diagonal: Dict[int, Dict[str, int]] = {}
+        for off, src_off in sorted(pairs):
+            diagonal = src_off - off
+            span = last_for_diagonal.get(diagonal)
+            if span is not None and off <= span["user_end"]:
+                span["user_end"] = max(span["user_end"], off + self.k)
+                span["source_end"] = span["user_end"] + diagonal
+                continue
+            span = {
+                "user_start": off,
+                "user_end": off + self.k,
+                "source_start": src_off,
+                "source_end": src_off + self.k,
+            }
+            spans.append(span)
+            last_for_diagonal[diagonal] = span
+        return spans
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sources": len(self._counts),
+            "fingerprints": sum(self._counts.values()),
+            "distinct_hashes": len(self._postings),
+        }
@@ -0,0 +1,86 @@
+# tests/test_api_executor.py
+import asyncio
+import threading
+import time
+
+from src.api.executor import ApiExecutor, _parse_limits
+
+
+def test_offload_runs_off_the_event_loop_and_records_metrics():
+    executor = ApiExecutor(thread_workers=4, default_limit=4)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        worker_thread = await executor.offload("parse", lambda: (time.sleep(0.05), threading.get_ident())[1])
+        await tick_task
+        return loop_thread, worker_thread, ticks
+
+    try:
+        loop_thread, worker_thread, ticks = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert worker_thread != loop_thread
+    # The loop kept ticking while the blocking call ran
+    assert len(ticks) == 5
+    route = executor.stats()["routes"]["parse"]
+    assert route["completed"] == 1 and route["failed"] == 0
+    assert route["run_seconds_p50"] >= 0.04
+
+
+def test_route_limit_caps_concurrency_and_reports_queue_time():
+    executor = ApiExecutor(thread_workers=8, limits={"full": 2})
+    active, peak = [0], [0]
+
+    async def job():
+        async with executor.route_limit("full"):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.02)
+            active[0] -= 1
+
+    async def run():
+        await asyncio.gather(*(job() for _ in range(6)))
+
+    asyncio.run(run())
+    route = executor.stats()["routes"]["full"]
+    assert peak[0] == 2
+    assert route["limit"] == 2 and route["completed"] == 6
+    assert route["waiting"] == 0 and route["in_flight"] == 0
+    assert route["queue_seconds_p99"] >= 0.03
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_call_finishes():
+    executor = ApiExecutor(thread_workers=4, limits={"parse": 1})
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.create_task(executor.offload("parse", release.wait))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        await asyncio.sleep(0.02)
+        # The blocking call is still running, so the single slot is still taken
+        second = asyncio.create_task(executor.offload("parse", lambda: "second"))
+        await asyncio.sleep(0.05)
+        busy = (second.done(), executor.stats()["routes"]["parse"]["in_flight"])
+        release.set()
+        return first.cancelled(), busy, await second
+
+    try:
+        cancelled, busy, second = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert cancelled and busy == (False, 1) and second == "second"
+    route = executor.stats()["routes"]["parse"]
+    assert route["failed"] == 1 and route["completed"] == 1 and route["in_flight"] == 0
+
+
+def test_parse_limits():
+    assert _parse_limits("pipeline.full=2, metadata_enrich=8,bad") == {"pipeline.full": 2, "metadata_enrich": 8}
@@ -0,0 +1,122 @@
+# tests/test_corpus_index.py
+import sys
+import os
+import shutil
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from similarity_search import corpus_index
+from similarity_search.corpus_index import CorpusIndex
+
+
+def _clustered(n, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    return centers[rng.integers(0, clusters, n)] + 0.2 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def test_saved_index_is_memory_mapped_and_finds_neighbours(tmp_path):
+    vectors = _clustered(2000)
+    index = CorpusIndex(n_probe=4)
+    index.add("doc-a", [f"a{i}" for i in range(1000)], vectors[:1000])
+    index.add("doc-b", [f"b{i}" for i in range(1000)], vectors[1000:], section="body")
+    index.save(str(tmp_path))
+
+    loaded = CorpusIndex.load(str(tmp_path), n_probe=4)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert len(loaded) == 2000 and "doc-a" in loaded
+
+    hits = loaded.search(vectors[[5, 1500]], top_k=2)
+    assert hits[0][0]["sentence"] == "a5"
+    assert hits[1][0] == {"doc_id": "doc-b", "section": "body", "sentence": "b500", "score": hits[1][0]["score"]}
+    assert hits[1][0]["score"] > 0.999
+
+
+def test_exclude_doc_and_pending_documents(tmp_path):
+    vectors = _clustered(400, seed=1)
+    index = CorpusIndex(n_probe=2)
+    index.add("doc-a", [f"a{i}" for i in range(400)], vectors)
+    index.save(str(tmp_path))
+
+    loaded = CorpusIndex.load(str(tmp_path))
+    # Added after the build: searched from the pending buffer until the next save
+    loaded.add("doc-b", ["copy"], vectors[7:8])
+    hits = loaded.search(vectors[7:8], top_k=2)[0]
+    assert {h["sentence"] for h in hits} == {"a7", "copy"}
+
+    hits = loaded.search(vectors[7:8], top_k=1, exclude_doc_id="doc-a")[0]
+    assert [h["sentence"] for h in hits] == ["copy"]
+
+
+def test_saves_publish_whole_generations(tmp_path):
+    vectors = _clustered(300, seed=2)
+    index = CorpusIndex(n_probe=2)
+    index.add("doc-a", [f"a{i}" for i in range(100)], vectors[:100])
+    index.save(str(tmp_path))
+    reader = CorpusIndex.load(str(tmp_path))
+
+    for doc, rows in (("doc-b", slice(100, 200)), ("doc-c", slice(200, 300))):
+        index.add(doc, [f"{doc}-{i}" for i in range(100)], vectors[rows])
+        index.save(str(tmp_path))
+
+    # Only the current and previous generations stay on disk
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ["base-000002", "base-000003"]
+    assert len(CorpusIndex.load(str(tmp_path))) == 300
+    # A reader that resolved generation 1 keeps its own consistent snapshot
+    assert reader.manifest["generation"] == 1 and len(reader) == 100
+    assert reader.search(vectors[3:4], top_k=1)[0][0]["sentence"] == "a3"
+
+    # Indexes saved before generations (arrays directly in the directory) still open
+    legacy = tmp_path / "legacy"
+    shutil.copytree(tmp_path / "base-000003", legacy)
+    assert len(CorpusIndex.load(str(legacy))) == 300
+
+
+class _HashEmbedder:
+    def encode_many(self, texts, normalize=True):
+        return np.stack([_clustered(1, seed=sum(map(ord, t)))[0] for t in texts])
+
+
+def test_added_submissions_are_visible_to_a_running_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_index.configs, "CORPUS_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(corpus_index, "_INDEX", None)
+    assert len(corpus_index.get_corpus_index()) == 0
+
+    first = {"doc_id": "sub-1", "raw_text": "Students wrote this essay about rivers. It has two sentences here."}
+    assert corpus_index.add_to_corpus_index(first, embedder=_HashEmbedder()) == 2
+    assert corpus_index.add_to_corpus_index(first, embedder=_HashEmbedder()) == 0
+    assert "sub-1" in corpus_index.get_corpus_index()
+
+    second = {"doc_id": "sub-2", "sections": [{"name": "body", "text": "Another student copied the river essay text."}]}
+    corpus_index.add_to_corpus_index(second, embedder=_HashEmbedder())
+    reloaded = corpus_index.get_corpus_index()
+    assert "sub-2" in reloaded and len(reloaded) == 3
+    assert corpus_index.get_corpus_index() is reloaded
+
+
+def test_submissions_go_to_delta_segments_until_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_index.configs, "CORPUS_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(corpus_index.configs, "CORPUS_DELTA_MAX_SENTENCES", 3)
+    monkeypatch.setattr(corpus_index, "_INDEX", None)
+    doc = {"doc_id": "sub-1", "raw_text": "Students wrote this essay about rivers. It has two sentences here."}
+    corpus_index.add_to_corpus_index(doc, embedder=_HashEmbedder())
+    base = corpus_index.get_corpus_index()
+
+    doc = {"doc_id": "sub-2", "raw_text": "A second submission about the same rivers."}
+    corpus_index.add_to_corpus_index(doc, embedder=_HashEmbedder())
+    manifest = corpus_index._read_manifest(str(tmp_path))
+    assert manifest["base"] is None and manifest["deltas"] == ["delta-000001", "delta-000002"]
+    # The running index only read the new segment
+    index = corpus_index.get_corpus_index()
+    assert index is not base and len(index) == 3 and index.stats()["pending_sentences"] == 3
+    hit = index.search(_HashEmbedder().encode_many(["A second submission about the same rivers."]), top_k=1)[0][0]
+    assert hit["doc_id"] == "sub-2"
+
+    doc = {"doc_id": "sub-3", "raw_text": "Past the threshold the segments are folded into the lists."}
+    corpus_index.add_to_corpus_index(doc, embedder=_HashEmbedder())
+    manifest = corpus_index._read_manifest(str(tmp_path))
+    assert manifest["base"] == "base-000004" and manifest["deltas"] == []
+    index = corpus_index.get_corpus_index()
+    assert len(index) == 4 and index.stats()["pending_sentences"] == 0
@@ -0,0 +1,52 @@
+# tests/test_embedding_service.py
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from similarity_search.embedding_service import EmbeddingService
+
+
+class _CountingModel:
+    """Tiny stand-in for SentenceTransformer that records what it encodes."""
+
+    def __init__(self):
+        self.seen = []
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.seen.extend(texts)
+        return np.array([[len(t), 1.0, 0.0, 0.0] for t in texts], dtype=np.float32)
+
+
+def _service(cache_size=10):
+    svc = EmbeddingService("fake-model", cache_size=cache_size, batch_size=2)
+    svc._model = _CountingModel()
+    return svc
+
+
+def test_encode_many_dedupes_and_caches():
+    svc = _service()
+    out = svc.encode_many(["a", "bb", "a"])
+    assert out.shape == (3, 4)
+    assert np.allclose(out[0], out[2])
+    assert svc.model.seen == ["a", "bb"]
+
+    svc.encode_many(["bb", "ccc"])
+    assert svc.model.seen == ["a", "bb", "ccc"]
+
+    stats = svc.stats()
+    assert stats["cache_hits"] == 1
+    assert stats["texts_encoded"] == 3
+
+
+def test_lru_eviction_and_normalize():
+    svc = _service(cache_size=2)
+    svc.encode_many(["a", "bb", "ccc"])
+    assert svc.stats()["cache_entries"] == 2
+
+    vec = svc.encode("ccc", normalize=True)
+    assert np.isclose(np.linalg.norm(vec), 1.0)
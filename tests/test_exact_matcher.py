@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from similarity_search.evidence_algorithm.exact_matcher import ExactMatcher, encode_tokens, tokenize_with_offsets
+
+
+def test_tokenize_with_offsets_matches_text():
+    text = "  Hello, world!  It's 42 degrees.\n"
+    tokens, starts, ends = tokenize_with_offsets(text)
+    assert tokens == ["Hello", ",", "world", "!", "It", "'", "s", "42", "degrees", "."]
+    assert [text[s:e] for s, e in zip(starts, ends)] == tokens
+
+
+def test_overlapping_ngrams_merge_into_one_maximal_span():
+    original = "Intro text here. The quick brown fox jumps over the lazy dog today. Outro."
+    source = "Something else. The quick brown fox jumps over the lazy dog today. More."
+    matches = ExactMatcher(min_ngram=5).find_exact_matches(original, source)
+
+    assert len(matches) == 1
+    m = matches[0]
+    # The shared span includes the preceding full stop
+    assert m["original_text"] == ". The quick brown fox jumps over the lazy dog today."
+    assert m["source_text"] == m["original_text"]
+    assert original[slice(*m["original_span"])] == m["original_text"]
+    assert source[slice(*m["source_span"])] == m["source_text"]
+    assert m["match_length"] == 12
+    assert m["confidence"] == 0.99
+
+
+def test_no_match_below_min_ngram():
+    matcher = ExactMatcher(min_ngram=5)
+    assert matcher.find_exact_matches("one two three four", "one two three four") == []
+    assert matcher.find_exact_matches("a b c d e f g", "h i j k l m n") == []
+
+
+def test_pre_encoded_source_gives_the_same_matches():
+    source = "Something else. The quick brown fox jumps over the lazy dog today. More."
+    encoded = encode_tokens(source)
+    matcher = ExactMatcher(min_ngram=5)
+    for original in ("The quick brown fox jumps over the lazy dog.", "A lazy dog today. More."):
+        assert matcher.find_exact_matches(original, source, source_tokens=encoded) == \
+            matcher.find_exact_matches(original, source)
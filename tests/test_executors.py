@@ -0,0 +1,48 @@
+# tests/test_executors.py
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from similarity_search import configs, executors
+
+
+USER_FILE = [
+    {"sentence": "The cat sat on the mat.", "start": 0, "end": 23},
+    {"sentence": "Dogs bark at night.", "start": 24, "end": 43},
+]
+
+
+def test_fuzzy_offsets_batch_picks_first_close_sentence():
+    offsets = executors.fuzzy_offsets_batch(
+        ["Dogs bark at night!", "Something unrelated entirely."], USER_FILE
+    )
+    assert offsets == [{"start": 24, "end": 43}, {"start": -1, "end": -1}]
+
+
+def test_stage_backend_selection(monkeypatch):
+    monkeypatch.setattr(configs, "FUZZY_EXECUTOR_BACKEND", "process")
+    monkeypatch.setattr(configs, "NLP_EXECUTOR_BACKEND", "bogus")
+    assert executors.stage_backend("fuzzy") == "process"
+    assert executors.stage_backend("nlp") == "thread"
+    with pytest.raises(ValueError):
+        executors.stage_backend("unknown")
+
+
+def test_process_pool_runs_batch_jobs():
+    with executors.make_process_executor("fuzzy", max_workers=1) as pool:
+        result = pool.submit(executors.fuzzy_offsets_batch, ["The cat sat on a mat."], USER_FILE).result()
+    assert result == [{"start": 0, "end": 23}]
+
+
+def test_process_workers_keep_the_offset_index_per_document():
+    key = executors.SentenceOffsetIndex(sentences=USER_FILE).fingerprint()
+    with executors.make_process_executor("fuzzy", max_workers=1) as pool:
+        # Unknown document: the worker asks for it instead of failing
+        assert pool.submit(executors.fuzzy_offsets_by_key, key, ["Dogs bark at night!"]).result() is None
+        first = pool.submit(executors.fuzzy_offsets_by_key, key, ["Dogs bark at night!"], USER_FILE).result()
+        # Later jobs send the key only
+        again = pool.submit(executors.fuzzy_offsets_by_key, key, ["The cat sat on a mat."]).result()
+    assert first == [{"start": 24, "end": 43}] and again == [{"start": 0, "end": 23}]
@@ -0,0 +1,51 @@
+# tests/test_fetch_cache.py
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from similarity_search.fetch_cache import FetchCache
+
+
+def test_roundtrip_through_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    FetchCache(path).put("https://example.com/a", "some page text", etag='"v1"')
+
+    # A fresh instance has an empty hot tier, so this must come from SQLite
+    cache = FetchCache(path)
+    entry = cache.get("https://example.com/a")
+    assert entry["text"] == "some page text"
+    assert entry["etag"] == '"v1"'
+    assert entry["fresh"] is True
+    assert cache.get("https://example.com/missing") is None
+
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_stale_entries_are_returned_for_revalidation(tmp_path):
+    cache = FetchCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, hot_size=0)
+    cache.put("https://example.com/a", "text", last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    time.sleep(0.01)
+
+    entry = cache.get("https://example.com/a")
+    assert entry["fresh"] is False
+    assert entry["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    cache.touch("https://example.com/a", entry)
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = FetchCache(str(tmp_path / "cache.sqlite3"), max_bytes=600, hot_size=0)
+    for i in range(5):
+        cache.put(f"https://example.com/{i}", os.urandom(200).hex())
+        time.sleep(0.01)
+
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 600
+    assert stats["evictions"] > 0
+    assert cache.get("https://example.com/0") is None
+    assert cache.get("https://example.com/4") is not None
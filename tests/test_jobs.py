@@ -0,0 +1,105 @@
+# tests/test_jobs.py
+import asyncio
+
+import pytest
+
+from src.api.jobs import JobManager, JobStore, QueueFull
+
+
+def _manager(tmp_path, **kwargs):
+    return JobManager(JobStore(str(tmp_path / "jobs.sqlite3")), poll_seconds=0.05, **kwargs)
+
+
+async def _wait_done(manager, job_id):
+    async for view in manager.events(job_id):
+        last = view
+    return last
+
+
+def test_job_reports_stages_and_result(tmp_path):
+    async def handler(payload, progress):
+        await progress("module1")
+        await progress("module2", sections=3)
+        return {"echo": payload["x"]}
+
+    async def run():
+        manager = _manager(tmp_path)
+        manager.register("echo", handler)
+        job_id = manager.submit("echo", {"x": 42})
+        statuses = [view["status"] async for view in manager.events(job_id)]
+        job = manager.get(job_id, include_result=True)
+        await manager.stop()
+        return statuses, job
+
+    statuses, job = asyncio.run(run())
+    assert statuses[-1] == "succeeded"
+    assert job["result"] == {"echo": 42}
+    assert [p["stage"] for p in job["progress"]] == ["module1", "module2"]
+    assert job["progress"][1]["sections"] == 3
+
+
+def test_cancel_running_and_queued_jobs(tmp_path):
+    started = []
+
+    async def slow(payload, progress):
+        started.append(payload["n"])
+        await progress("module1")
+        await asyncio.sleep(30)
+
+    async def run():
+        manager = _manager(tmp_path, workers=1)
+        manager.register("slow", slow)
+        first = manager.submit("slow", {"n": 1})
+        second = manager.submit("slow", {"n": 2})
+        while not started:
+            await asyncio.sleep(0.01)
+        assert manager.cancel(second) == "cancelled"
+        manager.cancel(first)
+        final = await _wait_done(manager, first)
+        await asyncio.sleep(0.1)
+        await manager.stop()
+        return final
+
+    final = asyncio.run(run())
+    assert final["status"] == "cancelled"
+    assert started == [1]
+
+
+def test_queue_depth_and_failed_jobs(tmp_path):
+    async def boom(payload, progress):
+        raise RuntimeError("parser exploded")
+
+    async def run():
+        manager = _manager(tmp_path, max_queue=1)
+        manager.register("boom", boom)
+        job_id = manager.submit("boom", {})
+        with pytest.raises(QueueFull):
+            manager.submit("boom", {})
+        final = await _wait_done(manager, job_id)
+        # A finished job frees its slot
+        manager.submit("boom", {})
+        await manager.stop()
+        return final
+
+    final = asyncio.run(run())
+    assert final["status"] == "failed"
+    assert final["error"] == "parser exploded"
+
+
+def test_interrupted_jobs_are_requeued_on_start(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.insert("echo", {"x": 1}, max_depth=10)
+    store.claim()
+
+    async def handler(payload, progress):
+        return payload
+
+    async def run():
+        manager = JobManager(store, poll_seconds=0.05)
+        manager.register("echo", handler)
+        manager.start()
+        final = await _wait_done(manager, job_id)
+        await manager.stop()
+        return final
+
+    assert asyncio.run(run())["status"] == "succeeded"
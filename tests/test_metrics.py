@@ -0,0 +1,65 @@
+# tests/test_metrics.py
+import pytest
+
+from src.observability.metrics import Registry, REGISTRY, PROVIDER_REQUESTS, PROVIDER_ERRORS, provider_call
+
+
+def test_render_prometheus_text_format():
+    registry = Registry()
+    requests = registry.counter("df_test_requests", "Requests.", ("route",))
+    latency = registry.histogram("df_test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    requests.labels(route="/a").inc()
+    requests.labels(route="/a").inc(2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    registry.register_collector(lambda: [("df_test_depth", "gauge", "Depth.", [({"pool": 'x"y'}, 3)])])
+
+    text = registry.render()
+    assert "# TYPE df_test_requests_total counter" in text
+    assert 'df_test_requests_total{route="/a"} 3' in text
+    assert 'df_test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'df_test_latency_seconds_bucket{le="1"} 2' in text
+    assert 'df_test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "df_test_latency_seconds_count 3" in text
+    assert 'df_test_depth{pool="x\\"y"} 3' in text
+
+    with pytest.raises(ValueError):
+        requests.labels(path="/a")
+    # Re-registering the same definition returns the existing metric
+    assert registry.counter("df_test_requests", "Requests.", ("route",)) is requests
+
+
+def test_provider_call_records_status_and_errors():
+    ok = PROVIDER_REQUESTS.labels(provider="unit", outcome="200")
+    timeouts = PROVIDER_REQUESTS.labels(provider="unit", outcome="timeout")
+    errors = PROVIDER_ERRORS.labels(provider="unit")
+    before = (ok.value, timeouts.value, errors.value)
+
+    with provider_call("unit") as call:
+        call.status = 200
+    with pytest.raises(TimeoutError):
+        with provider_call("unit"):
+            raise TimeoutError("slow upstream")
+
+    assert (ok.value, timeouts.value, errors.value) == (before[0] + 1, before[1] + 1, before[2] + 1)
+
+
+def test_middleware_labels_requests_by_route_template():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.api.metrics_api import metrics_middleware
+
+    app = FastAPI()
+    app.middleware("http")(metrics_middleware)
+
+    @app.get("/unit/items/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for i in range(3):
+        assert client.get(f"/unit/items/{i}").status_code == 200
+
+    text = REGISTRY.render()
+    assert 'df_http_request_duration_seconds_count{method="GET",route="/unit/items/{item_id}",status="200"} 3' in text
+    assert "/unit/items/1" not in text
@@ -0,0 +1,67 @@
+# tests/test_ocr_pool.py
+import sys
+import os
+import shutil
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from ingestion.parsers import ocr_pool
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), 'samples/testPDF.pdf')
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Rasterizer and Tesseract replaced in-process; counts OCR calls."""
+    calls = []
+
+    def rasterize(pdf_path, page_number, settings):
+        return Image.new("L", (20, 10), color=page_number)
+
+    def ocr_image(image=None, lang="eng", config=""):
+        calls.append(image.getpixel((0, 0)))
+        return f"page text {image.getpixel((0, 0))}"
+
+    monkeypatch.setattr(ocr_pool, "_rasterize", rasterize)
+    monkeypatch.setattr(ocr_pool, "ocr_image", ocr_image)
+    monkeypatch.setattr(ocr_pool, "OCR_WORKERS", 1)
+    return calls
+
+
+def test_reupload_is_served_from_cache(tmp_path, fake_ocr):
+    cache = str(tmp_path / "ocr.sqlite3")
+
+    first = ocr_pool.ocr_pdf_pages(SAMPLE_PDF, [1, 0], cache_path=cache)
+    assert [r["page"] for r in first] == [2, 1]
+    assert [r["text"] for r in first] == ["page text 1", "page text 0"]
+    assert not any(r["cached"] for r in first)
+    assert all(r["raster_seconds"] >= 0 and r["ocr_seconds"] >= 0 for r in first)
+
+    second = ocr_pool.ocr_pdf_pages(SAMPLE_PDF, [0, 1], cache_path=cache)
+    assert [r["text"] for r in second] == ["page text 0", "page text 1"]
+    assert all(r["cached"] for r in second)
+    assert len(fake_ocr) == 2
+
+
+def test_same_page_image_in_another_file_skips_tesseract(tmp_path, fake_ocr):
+    cache = str(tmp_path / "ocr.sqlite3")
+    copy = str(tmp_path / "renamed.pdf")
+    shutil.copyfile(SAMPLE_PDF, copy)
+    with open(copy, "ab") as f:
+        f.write(b"\n% different bytes, same pages\n")
+
+    ocr_pool.ocr_pdf_pages(SAMPLE_PDF, [0], cache_path=cache)
+    result = ocr_pool.ocr_pdf_pages(copy, [0], cache_path=cache)
+
+    assert result[0]["cached"] and result[0]["text"] == "page text 0"
+    assert len(fake_ocr) == 1
+
+
+def test_profiles():
+    assert ocr_pool.resolve_profile("accurate")["dpi"] == 300
+    assert ocr_pool.resolve_profile("fast")["dpi"] < ocr_pool.resolve_profile("balanced")["dpi"]
+    with pytest.raises(ValueError):
+        ocr_pool.resolve_profile("nope")
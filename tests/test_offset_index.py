@@ -0,0 +1,31 @@
+# tests/test_offset_index.py
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from ingestion.utils import SentenceOffsetIndex, find_sentence_offsets_in_text
+
+TEXT = "The cat sat on the mat. Dogs bark at night. The cat sat on the mat again."
+
+
+def test_find_matches_str_find():
+    index = SentenceOffsetIndex(TEXT)
+    queries = ["The cat sat on the mat.", "Dogs bark at night.", "missing sentence", "cat"]
+    assert index.find_many(queries) == [find_sentence_offsets_in_text(q, TEXT) for q in queries]
+    # Memoized lookups return the same answer
+    assert index.find("Dogs bark at night.") == (24, 43)
+
+
+def test_containing_returns_first_user_sentence():
+    index = SentenceOffsetIndex(TEXT)
+    assert index.containing("cat sat") == {"start": 0, "end": 23}
+    assert index.containing("mat again") == {"start": 43, "end": 73}
+    assert index.containing("unicorns") is None
+
+
+def test_fuzzy_uses_earliest_close_sentence():
+    index = SentenceOffsetIndex(TEXT)
+    assert index.fuzzy("Dogs bark at nite.") == {"start": 23, "end": 43}
+    assert index.fuzzy("The cat sat on a mat.") == {"start": 0, "end": 23}
+    assert index.fuzzy("Completely different words here.") == {"start": -1, "end": -1}
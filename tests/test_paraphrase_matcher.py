@@ -0,0 +1,54 @@
+# tests/test_paraphrase_matcher.py
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from ingestion.utils import top_k_per_row
+from similarity_search.evidence_algorithm.paraphrase_matcher import ParaphraseMatcher
+
+
+class LetterCountEmbedder:
+    """Bag-of-letters vectors: sentences with the same letters get cosine 1."""
+
+    def encode(self, texts, normalize=True):
+        vecs = np.array([[t.lower().count(c) for c in "abcdefghijklmnopqrstuvwxyz"] for t in texts],
+                        dtype=np.float32)
+        return vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+
+
+def test_top_k_per_row_matches_full_matrix_across_tiles():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(37, 8)).astype(np.float32)
+    b = rng.normal(size=(301, 8)).astype(np.float32)
+
+    indices, scores = top_k_per_row(a, b, top_k=4, row_chunk=5, col_chunk=17)
+
+    full = a @ b.T
+    expected = -np.sort(-full, axis=1)[:, :4]
+    assert indices.shape == scores.shape == (37, 4)
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert np.allclose(np.take_along_axis(full, indices, axis=1), scores, atol=1e-5)
+
+
+def test_top_k_per_row_caps_k_at_source_count():
+    indices, scores = top_k_per_row(np.eye(3, dtype=np.float32), np.eye(3, dtype=np.float32)[:2], top_k=5)
+    assert indices.shape == (3, 2)
+    assert indices[0, 0] == 0 and indices[1, 0] == 1
+
+
+def test_document_matches_consider_every_user_sentence_and_source():
+    matcher = ParaphraseMatcher(embedder=LetterCountEmbedder(), sim_threshold=0.99, top_k=2, batch_size=2)
+    original = "The cat sat on the mat. Dogs bark loudly at night."
+    sources = {
+        "a": "Zebras graze. The mat sat on the cat.",
+        "b": "At night dogs bark loudly.",
+    }
+
+    matches = matcher.find_document_matches(original, sources)
+
+    found = {(m["original_index"], m["source"], m["source_index"]) for m in matches}
+    assert found == {(0, "a", 1), (1, "b", 0)}
+    assert all(m["type"] == "paraphrased_match" for m in matches)
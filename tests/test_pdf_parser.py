@@ -23,3 +23,19 @@ def test_parse_pdf_basic():
     # Metadata sanity checks
     assert result["metadata"]["file_type"] == "pdf"
     assert result["metadata"]["num_pages"] > 0
+
+
+def test_parse_pdf_streaming_matches_in_process(monkeypatch):
+    from ingestion.parsers import pdf_parser
+
+    sample_pdf = os.path.join(os.path.dirname(__file__), 'samples/testPDF2.pdf')
+    # Small page ranges so the 13-page sample is split across worker processes
+    monkeypatch.setattr(pdf_parser, "PDF_PAGES_PER_TASK", 4)
+    monkeypatch.setattr(pdf_parser, "PDF_WORKERS", 2)
+
+    streamed = parse_pdf(sample_pdf, ocr_if_no_text=False, streaming=True)
+    in_process = parse_pdf(sample_pdf, ocr_if_no_text=False, streaming=False)
+
+    assert streamed["raw_text"] == in_process["raw_text"]
+    assert streamed["sections"] == in_process["sections"]
+    assert streamed["metadata"] == in_process["metadata"]
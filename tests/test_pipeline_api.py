@@ -0,0 +1,51 @@
+# tests/test_pipeline_api.py
+import asyncio
+
+import pytest
+
+try:
+    from src.api import JsonUI, pipeline_api
+except Exception as e:  # spaCy model / Perplexity client not installed
+    pytestmark = pytest.mark.skip(reason=f"pipeline_api unavailable: {e}")
+
+
+def test_corpus_match_keeps_its_source_doc_id(monkeypatch):
+    module1 = {"doc_id": "doc-new", "raw_text": "Copied sentence.", "sections": []}
+    module3 = {"doc_id": "doc-new", "results": [{"block_id": "b0", "evidence": [
+        {
+            "sentence": "Copied sentence.",
+            "type": "corpus_match",
+            "source_text": "Copied sentence.",
+            "plagiarism_score": 0.97,
+            "semantic_similarity": 0.97,
+            "source_url": None,
+            "source_doc_id": "doc-old",
+            "source_section": "Introduction",
+            "user_file_offsets": {"start": 0, "end": 16},
+        },
+    ]}]}
+    asked = []
+
+    async def module2(module1_json):
+        return {"doc_id": module1_json["doc_id"], "blocks": []}
+
+    async def module3_engine(module2_json, raw_text=None):
+        return module3
+
+    def metadata(urls):
+        asked.append(list(urls))
+        return {}
+
+    monkeypatch.setattr(pipeline_api, "parse_upload", lambda path: module1)
+    monkeypatch.setattr(pipeline_api, "process_document_async", module2)
+    monkeypatch.setattr(pipeline_api, "process_module3", module3_engine)
+    monkeypatch.setattr(JsonUI, "call_llm_for_metadata", metadata)
+
+    result = asyncio.run(pipeline_api.run_pipeline("f1", "upload.txt"))
+
+    source = result["module3"]["results"][0]["sources"][0]
+    assert source["source_doc_id"] == "doc-old"
+    assert source["source_section"] == "Introduction"
+    assert source["metadata"]["document_type"] == "Prior submission"
+    assert "doc-old" in source["metadata"]["citation"]
+    assert asked == [[]]  # nothing to look up for a prior submission
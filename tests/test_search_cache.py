@@ -0,0 +1,62 @@
+# tests/test_search_cache.py
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from similarity_search.search_cache import SearchCache, query_fingerprint
+
+
+RESULTS = [{"title": "T", "url": "https://example.com", "snippet": "s", "score": 0.9}]
+
+
+def test_trivial_query_variants_share_a_key():
+    a = query_fingerprint("perplexity", "Deep  Learning, for NLP!", top_k=5)
+    b = query_fingerprint("perplexity", "deep learning for nlp", top_k=5)
+    assert a == b
+    assert a != query_fingerprint("google", "deep learning for nlp", top_k=5)
+    assert a != query_fingerprint("perplexity", "deep learning for nlp", top_k=10)
+
+
+def test_search_operators_keep_distinct_keys():
+    assert query_fingerprint("google", "foo -bar") != query_fingerprint("google", "foo bar")
+    assert query_fingerprint("google", '"foo bar" (a OR b)') != query_fingerprint("google", "foo bar a or b")
+    assert query_fingerprint("google", "a OR b") != query_fingerprint("google", "a or b")
+    assert query_fingerprint("google", "state-of-the-art  models") == query_fingerprint("google", "State of the art models")
+
+
+def test_roundtrip_and_persistence(tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    SearchCache(path).put("perplexity", "some query", RESULTS, top_k=5)
+
+    cache = SearchCache(path)
+    assert cache.get("perplexity", "Some query.", top_k=5) == RESULTS
+    assert cache.get("perplexity", "other query", top_k=5) is None
+    stats = cache.stats()["perplexity"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_modes_and_expiry(tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    SearchCache(path).put("google", "q", RESULTS, top_k=5)
+
+    # Expired entries are misses in readwrite mode but still replayed in cache-only mode
+    assert SearchCache(path, ttl_seconds=0).get("google", "q", top_k=5) is None
+    replay = SearchCache(path, ttl_seconds=0, mode="cache_only")
+    assert replay.get("google", "q", top_k=5) == RESULTS
+    replay.put("google", "new", RESULTS, top_k=5)
+    assert replay.get("google", "new", top_k=5) is None
+    assert replay.stats()["google"]["cache_only_misses"] == 1
+
+    off = SearchCache(path, mode="off")
+    assert off.get("google", "q", top_k=5) is None
+
+
+def test_empty_results_are_not_cached_and_memory_is_bounded():
+    cache = SearchCache(None, max_entries=2)
+    cache.put("perplexity", "empty", [], top_k=5)
+    assert cache.get("perplexity", "empty", top_k=5) is None
+    for q in ("a", "b", "c"):
+        cache.put("perplexity", q, RESULTS, top_k=5)
+    assert cache.get("perplexity", "a", top_k=5) is None
+    assert cache.get("perplexity", "c", top_k=5) == RESULTS
@@ -0,0 +1,86 @@
+# tests/test_tracing.py
+import json
+import asyncio
+
+from src.observability import tracing
+from src.observability import span, traced, set_attributes, set_exporters, flush, JsonExporter, to_otlp
+
+
+@traced("child")
+async def _child(n):
+    set_attributes(n=n)
+    await asyncio.sleep(0.01)
+    return n
+
+
+def test_spans_nest_across_tasks_and_threads():
+    def blocking():
+        # Runs in a worker thread with the caller's context
+        set_attributes(thread=True)
+
+    async def run():
+        with span("root", doc_id="d1") as root:
+            await asyncio.gather(*(_child(i) for i in range(3)))
+            await asyncio.to_thread(blocking)
+            with span("leaf"):
+                pass
+        return root
+
+    root = asyncio.run(run())
+    spans = {s.span_id: s for s in root.trace.spans}
+    children = [s for s in spans.values() if s.name == "child"]
+    assert len(children) == 3
+    assert all(s.parent_id == root.span_id and s.trace_id == root.trace_id for s in children)
+    assert sorted(s.attributes["n"] for s in children) == [0, 1, 2]
+    assert root.attributes == {"doc_id": "d1", "thread": True}
+    assert root.wall_seconds >= 0.01 and root.cpu_seconds >= 0.0
+
+    summary = root.trace.summary()
+    assert summary["stages"]["child"]["count"] == 3
+    assert summary["total_seconds"] == round(root.wall_seconds, 6)
+
+
+def test_errors_are_recorded_and_reraised():
+    try:
+        with span("outer") as outer:
+            with span("inner"):
+                raise ValueError("bad page")
+    except ValueError:
+        pass
+    inner = next(s for s in outer.trace.spans if s.name == "inner")
+    assert inner.status == "error" and inner.error == "ValueError: bad page"
+    assert outer.trace.summary()["stages"]["outer"]["errors"] == 1
+
+
+def test_json_exporter_and_otlp_payload(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    set_exporters([JsonExporter(str(path))])
+    try:
+        with span("pipeline", file_id="f1") as root:
+            with span("fetch_full_text", url="https://example.org", bytes=2048, cached=False):
+                pass
+        assert flush(timeout=5)
+    finally:
+        set_exporters([])
+
+    record = json.loads(path.read_text().strip())
+    assert record["trace_id"] == root.trace_id
+    assert [s["name"] for s in record["spans"]] == ["fetch_full_text", "pipeline"]
+
+    payload = to_otlp(root.trace.spans, service_name="df-test")
+    resource = payload["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "df-test"}
+    fetch, pipeline = resource["scopeSpans"][0]["spans"]
+    assert fetch["parentSpanId"] == pipeline["spanId"] and "parentSpanId" not in pipeline
+    assert len(fetch["traceId"]) == 32 and len(fetch["spanId"]) == 16
+    attrs = {a["key"]: a["value"] for a in fetch["attributes"]}
+    assert attrs["bytes"] == {"intValue": "2048"} and attrs["cached"] == {"boolValue": False}
+    assert int(fetch["endTimeUnixNano"]) >= int(fetch["startTimeUnixNano"])
+
+
+def test_disabled_tracing_is_a_noop(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", False)
+    with span("anything", x=1) as s:
+        s.set_attribute("y", 2)
+        set_attributes(z=3)
+    assert s is tracing.NOOP_SPAN and s.trace is None
@@ -0,0 +1,55 @@
+# tests/test_winnowing.py
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from similarity_search.winnowing import (
+    BASE, MOD, FingerprintIndex, codepoints, fingerprints, rolling_hashes, winnow,
+)
+
+TEXT = "Photosynthesis converts light energy into chemical energy stored in glucose."
+
+
+def test_rolling_hashes_match_direct_polynomial():
+    k = 5
+    values = [ord(c) for c in TEXT]
+    expected = [
+        sum(values[i + j] * pow(BASE, k - 1 - j, MOD) for j in range(k)) % MOD
+        for i in range(len(values) - k + 1)
+    ]
+    assert rolling_hashes(codepoints(TEXT), k).tolist() == expected
+    assert len(rolling_hashes(codepoints("abc"), 5)) == 0
+
+
+def test_winnow_keeps_rightmost_minimum_once():
+    hashes = np.array([5, 3, 3, 7, 1, 9, 9, 2], dtype=np.int64)
+    selected, positions = winnow(hashes, 3)
+    assert positions.tolist() == [2, 4, 7]
+    assert selected.tolist() == [3, 1, 2]
+
+
+def test_shared_substring_always_shares_a_fingerprint():
+    k, window = 10, 4
+    a = "completely unrelated prefix " + TEXT
+    b = TEXT + " and some other suffix text"
+    fa = set(fingerprints(a, k, window)[0].tolist())
+    fb = set(fingerprints(b, k, window)[0].tolist())
+    assert fa & fb
+
+
+def test_index_reports_sources_with_positions():
+    index = FingerprintIndex(k=10, window=4)
+    index.add("wiki", "Intro text. " + TEXT)
+    index.add("other", "Nothing in common with the user document at all, honestly.")
+    user = "My essay says: " + TEXT
+
+    matches = index.match(user)
+    assert [m["source"] for m in matches] == ["wiki"]
+    span = matches[0]["spans"][0]
+    length = span["user_end"] - span["user_start"]
+    assert length == span["source_end"] - span["source_start"]
+    assert user[span["user_start"]:span["user_end"]] == ("Intro text. " + TEXT)[span["source_start"]:span["source_end"]]
+